@@ -0,0 +1,38 @@
+"""
+Medición Vickers por lotes, sin interfaz gráfica.
+
+Mide la huella de la imagen de cada punto de la tabla de un proyecto usando
+todos los núcleos y guarda HV y desviación estándar en el mismo archivo:
+
+    python batch_vickers.py "projects/sample01/demo proyect 01.json"
+"""
+
+import argparse
+
+from rich import print
+
+from config import get_config
+from callbacks._batchVickers import measure_project
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Medición Vickers automática de todos los puntos de un proyecto")
+    parser.add_argument("project", help="archivo JSON del proyecto")
+    parser.add_argument("-o", "--output", help="guardar el resultado en otro archivo en lugar de sobrescribir el proyecto")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="procesos en paralelo (por defecto, todos los núcleos)")
+    parser.add_argument("--refine", action="store_true", help="refinar los vértices a la esquina subpíxel")
+    parser.add_argument("--skip-measured", action="store_true", help="no volver a medir los puntos que ya tienen HV")
+    args = parser.parse_args()
+
+    refine_window = get_config()['Vickers']['refine_window'] if args.refine else None
+    summary = measure_project(args.project, output_path=args.output, workers=args.workers,
+                              refine_window=refine_window, skip_measured=args.skip_measured)
+
+    print(f"[green]✓ {summary['measured']} puntos medidos en {summary['seconds']:.1f} s[/green]")
+    if summary["not_found"] or summary["missing_image"] or summary["failed"]:
+        print(f"[yellow]Sin huella: {summary['not_found']} | Sin imagen: {summary['missing_image']} | "
+              f"Errores: {summary['failed']}[/yellow]")
+
+
+if __name__ == "__main__":
+    main()
@@ -127,6 +127,7 @@ mkdir "%APP_DIR%"
 
 REM Copiar archivos principales
 copy "%~dp0main.py" "%APP_DIR%\" >nul
+copy "%~dp0batch_vickers.py" "%APP_DIR%\" >nul
 copy "%~dp0config.ini" "%APP_DIR%\" >nul
 copy "%~dp0dpg.ini" "%APP_DIR%\" >nul
 copy "%~dp0user_preferences.json" "%APP_DIR%\" >nul
@@ -46,6 +46,7 @@ echo [2/3] Copiando codigo fuente...
 
 REM Copiar archivos principales
 copy "%~dp0main.py" "%APP_DIR%\" >nul
+copy "%~dp0batch_vickers.py" "%APP_DIR%\" >nul
 copy "%~dp0config.ini" "%APP_DIR%\" >nul
 copy "%~dp0dpg.ini" "%APP_DIR%\" >nul
 copy "%~dp0version.txt" "%APP_DIR%\" >nul
@@ -1,14 +1,20 @@
-from ._vickersCB import VickersCB
-from ._heatMapCB import HeatMapCB
-from ._dataTableCB import DataTableCB
-from ._hmPlotCB import HMPlotCB
-from ._proyectoCB import ProyectoCB
+# The tab callbacks (Dear PyGui, matplotlib, plotly) are imported when Callbacks is created,
+# so batch_vickers.py and its worker processes can import the pure processing modules
+# (_imageBuffer, _imageFilters, _vickersDetection, _hardness, _batchVickers) without the GUI stack.
 
 
 class Callbacks:
     def __init__(self) -> None:
+        from ._vickersCB import VickersCB
+        from ._heatMapCB import HeatMapCB
+        from ._dataTableCB import DataTableCB
+        from ._hmPlotCB import HMPlotCB
+        from ._proyectoCB import ProyectoCB
+        from ._uiDispatcher import get_ui_dispatcher
+
         self.imageProcessing = VickersCB(self)
         self.heatMap = HeatMapCB(self)
         self.dataTable = DataTableCB(self)  # Pass self to access other callbacks
         self.hmPlot = HMPlotCB(self)  # Heat map plot callback
         self.proyecto = ProyectoCB(self)  # Project management callback
+        self.ui = get_ui_dispatcher()  # UI updates posted by background threads, run by the render loop
@@ -0,0 +1,177 @@
+"""
+Point images with their Vickers measurements drawn on, for the reports.
+
+Each image is downscaled to report resolution first and the stored
+measurements (outline, diagonals and vertices, as in the Vickers tab) are
+drawn on the small image with Pillow, so lines keep a constant width no
+matter the size of the micrograph. Rendering runs in a process pool and the
+results are stored as JPEG files in ``<project folder>/.cache/annotated``.
+Each file name is derived from the source image (path, mtime, size), the
+geometry of its measurements and the output size, so the next report only
+renders the points that were re-measured or got a new image.
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw
+from rich import print
+
+
+REPORT_IMAGE_SIZE = 800  # Max width/height in pixels of the images embedded in reports
+CACHE_SUBDIR = os.path.join(".cache", "annotated")
+
+OUTLINE_COLOR = (255, 255, 0)
+DIAGONAL_COLOR = (0, 220, 255)
+VERTEX_COLOR = (255, 80, 80)
+
+
+def measurement_pixels(measurement: dict, image_size: Tuple[int, int], calibration: float) -> Optional[np.ndarray]:
+    """
+    Vertex pixels (4, 2) of a stored measurement on an image of ``image_size`` (width, height).
+
+    Uses the stored ``pixels`` (rescaled if they were marked on an image of
+    another size); older measurements without them are mapped back from their
+    µm points with the calibration. Returns None if there is no usable geometry.
+    """
+    width, height = image_size
+    if "pixels" in measurement:
+        pixels = np.asarray(measurement["pixels"], dtype=np.float64).reshape(4, 2)
+        marked_size = np.asarray(measurement.get("image_size", image_size), dtype=np.float64)
+        return pixels * (np.asarray(image_size, dtype=np.float64) / marked_size)
+
+    points = measurement.get("points")
+    if not points or len(points) != 4 or not calibration:
+        return None
+    # Inverse of pixels_to_um(): the image spans int(size * calibration) µm with y flipped
+    points = np.asarray(points, dtype=np.float64).reshape(4, 2)
+    scale_x = int(width * calibration) / width
+    scale_y = int(height * calibration) / height
+    return np.stack([points[:, 0] / scale_x, height - points[:, 1] / scale_y], axis=-1)
+
+
+def geometry_hash(measurements: Sequence[dict], calibration: float) -> str:
+    """Short hash of what gets drawn: the vertices of every measurement (and the calibration for µm-only ones)."""
+    geometry = []
+    for m in measurements:
+        if "pixels" in m:
+            geometry.append({"pixels": m["pixels"], "image_size": m.get("image_size")})
+        else:
+            geometry.append({"points": m.get("points"), "calibration": calibration})
+    raw = json.dumps(geometry, sort_keys=True, default=list)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def annotated_key(image_path: str, measurements: Sequence[dict], calibration: float,
+                  max_size: int = REPORT_IMAGE_SIZE) -> Optional[str]:
+    """Cache key of an annotated image: hash of (image file, measurement geometry, size); None if the image is missing."""
+    try:
+        stat = os.stat(image_path)
+    except OSError:
+        return None
+
+    raw = f"{os.path.abspath(image_path)}|{stat.st_mtime_ns}|{stat.st_size}|{max_size}|{geometry_hash(measurements, calibration)}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def render_annotated(image_path: str, measurements: Sequence[dict], calibration: float,
+                     max_size: int = REPORT_IMAGE_SIZE) -> Image.Image:
+    """Decode ``image_path`` at report resolution and draw its measurements on it (RGB)."""
+    with Image.open(image_path) as img:
+        full_size = img.size
+        img.draft("RGB", (max_size, max_size))  # JPEG: decode directly at a reduced scale
+        image = img.convert("RGB")
+    image.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+
+    scale = np.asarray(image.size, dtype=np.float64) / np.asarray(full_size, dtype=np.float64)
+    line_width = max(1, round(max(image.size) / 400))
+    radius = 2 * line_width
+    draw = ImageDraw.Draw(image)
+
+    for measurement in measurements:
+        pixels = measurement_pixels(measurement, full_size, calibration)
+        if pixels is None:
+            continue
+        p1, p2, p3, p4 = [tuple(p) for p in (pixels * scale).tolist()]
+        draw.line([p1, p2, p3, p4, p1], fill=OUTLINE_COLOR, width=line_width, joint="curve")
+        draw.line([p1, p3], fill=DIAGONAL_COLOR, width=line_width)
+        draw.line([p2, p4], fill=DIAGONAL_COLOR, width=line_width)
+        for x, y in (p1, p2, p3, p4):
+            draw.ellipse([x - radius, y - radius, x + radius, y + radius], fill=VERTEX_COLOR)
+
+    return image
+
+
+def _render_to_file(image_path: str, measurements: List[dict], calibration: float, max_size: int, out_path: str) -> str:
+    """Render one annotated image to ``out_path`` (runs in a worker process)."""
+    image = render_annotated(image_path, measurements, calibration, max_size)
+    # Write to a temporary file and rename so readers never see a partial JPEG
+    tmp_path = f"{out_path}.{os.getpid()}.tmp"
+    image.save(tmp_path, format="JPEG", quality=90)
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+class AnnotatedImageCache:
+    """Project-local cache of report-resolution point images with their measurements drawn on."""
+
+    def __init__(self, project_folder: str, max_size: int = REPORT_IMAGE_SIZE) -> None:
+        self.project_folder = project_folder
+        self.cache_dir = os.path.join(project_folder, CACHE_SUBDIR)
+        self.max_size = max_size
+
+    def cache_path(self, image_path: str, measurements: Sequence[dict], calibration: float) -> Optional[str]:
+        """Path of the annotated image of a point (None if the source is missing)."""
+        key = annotated_key(image_path, measurements, calibration, self.max_size)
+        if key is None:
+            return None
+        return os.path.join(self.cache_dir, f"{key}.jpg")
+
+    def render_rows(self, rows: Sequence[dict], calibration: float, workers: Optional[int] = None) -> Dict[int, str]:
+        """
+        Annotated images of every table row that has an image and measurements.
+
+        Cached files are reused; the others are rendered in parallel.
+
+        Args:
+            rows: table rows ({id, image_path, measurements, ...}) with absolute image paths
+            calibration: µm per pixel, used only for measurements stored without vertex pixels
+            workers: number of processes (all cores by default)
+
+        Returns:
+            {row index: path of its annotated JPEG}
+        """
+        paths: Dict[int, str] = {}
+        jobs: Dict[int, Tuple[str, List[dict], str]] = {}
+        for index, row in enumerate(rows):
+            image_path, measurements = row.get("image_path"), row.get("measurements")
+            if not image_path or not measurements:
+                continue
+            cached = self.cache_path(image_path, measurements, calibration)
+            if cached is None:
+                continue
+            if os.path.isfile(cached):
+                paths[index] = cached
+            else:
+                jobs[index] = (image_path, measurements, cached)
+
+        if not jobs:
+            return paths
+
+        print(f"[cyan]Dibujando mediciones en {len(jobs)} imágenes ({len(paths)} en caché)...[/cyan]")
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(jobs))) as executor:
+            futures = {executor.submit(_render_to_file, image_path, measurements, calibration, self.max_size, out_path): index
+                       for index, (image_path, measurements, out_path) in jobs.items()}
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    paths[index] = future.result()
+                except Exception as e:
+                    print(f"[yellow]No se pudo dibujar la imagen del punto {rows[index].get('id')}: {e}[/yellow]")
+
+        return paths
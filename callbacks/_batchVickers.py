@@ -0,0 +1,141 @@
+"""
+Headless Vickers measurement of every point image of a project.
+
+Each row of the project's ``table.data`` with an ``image_path`` is measured
+in a separate process: the image is decoded with Pillow, the indentation is
+found with detect_indentation() (optionally snapping the vertices with
+refine_corner()) and its diagonals and hardness are computed with the same
+functions as the Vickers tab, using the project's calibration and load.
+The rows get ``hv``, ``std_dev`` and the measurement itself, and the project
+is written back. No Dear PyGui context is created, so it runs from a
+terminal (see ``batch_vickers.py``) on all cores.
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import List, Optional
+
+from rich import print
+
+from ._imageBuffer import ImageBuffer
+from ._imageFilters import luminance
+from ._vickersDetection import detect_indentation, refine_corner
+from ._hardness import measure_vertices, hv_statistics, pixels_to_um
+
+
+def resolve_image_path(image_path: Optional[str], project_dir: str) -> Optional[str]:
+    """Absolute path of a row image (relative paths are taken from the project folder), or None if missing."""
+    if not image_path:
+        return None
+    path = image_path if os.path.isabs(image_path) else os.path.join(project_dir, image_path)
+    return path if os.path.isfile(path) else None
+
+
+def measure_image(path: str, calibration: float, load: float, load_unit: str = "gf",
+                  refine_window: Optional[int] = None) -> Optional[dict]:
+    """
+    Detect and measure the indentation in one image (runs in a worker process).
+
+    Args:
+        path: image file
+        calibration: µm per pixel
+        load: applied load
+        load_unit: unit of ``load`` (gf, kgf or N)
+        refine_window: half window (px) for sub-pixel refinement of the vertices, None to skip it
+
+    Returns:
+        Measurement dict as stored by the Vickers tab ({points, d1, d2, d_avg, hv,
+        pixels, image_size}, points in plot µm), or None if no indentation was found.
+    """
+    image = ImageBuffer.decode(path)
+    lum = luminance(image.original)
+    width, height = image.width, image.height
+
+    vertices = detect_indentation(lum)
+    if vertices is None:
+        return None
+
+    if refine_window:
+        refined = [refine_corner(lum, col, row, half_window=refine_window) for col, row in vertices]
+        vertices = [r if r is not None else (col, row) for r, (col, row) in zip(refined, vertices)]
+
+    # Same pixel-to-µm mapping as the image series of the Vickers tab
+    pixels = [(float(col), float(row)) for col, row in vertices]
+    measurement = measure_vertices(pixels_to_um(pixels, (width, height), calibration).tolist(), load, load_unit)
+    measurement["pixels"] = pixels
+    measurement["image_size"] = (width, height)
+    return measurement
+
+
+def measure_project(project_path: str, output_path: Optional[str] = None, workers: Optional[int] = None,
+                    refine_window: Optional[int] = None, skip_measured: bool = False) -> dict:
+    """
+    Measure all point images of a project file and save the results.
+
+    Args:
+        project_path: project JSON saved by the application
+        output_path: where to write the updated project (``project_path`` by default)
+        workers: number of processes (all cores by default)
+        refine_window: half window (px) for sub-pixel refinement, None to skip it
+        skip_measured: leave rows that already have an HV value untouched
+
+    Returns:
+        Summary {measured, not_found, missing_image, failed, skipped, seconds}
+    """
+    with open(project_path, "r", encoding="utf-8") as f:
+        project_data = json.load(f)
+
+    project_dir = os.path.dirname(os.path.abspath(project_path))
+    vickers = project_data.get("vickers", {})
+    calibration = vickers.get("calibration", 1.0)
+    load = vickers.get("load", 500.0)
+    load_unit = vickers.get("load_unit", "gf")
+    rows: List[dict] = project_data.get("table", {}).get("data", [])
+
+    summary = {"measured": 0, "not_found": 0, "missing_image": 0, "failed": 0, "skipped": 0}
+    started = datetime.now()
+
+    jobs = {}
+    for index, row in enumerate(rows):
+        if skip_measured and row.get("hv"):
+            summary["skipped"] += 1
+            continue
+        path = resolve_image_path(row.get("image_path"), project_dir)
+        if path is None:
+            summary["missing_image"] += 1
+            print(f"[yellow]Punto {row.get('id')}: imagen no encontrada ({row.get('image_path')})[/yellow]")
+            continue
+        jobs[index] = path
+
+    print(f"[cyan]Midiendo {len(jobs)} imágenes (calibración {calibration} µm/px, carga {load} {load_unit})...[/cyan]")
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        futures = {executor.submit(measure_image, path, calibration, load, load_unit, refine_window): index
+                   for index, path in jobs.items()}
+        for done, future in enumerate(as_completed(futures), start=1):
+            row = rows[futures[future]]
+            try:
+                measurement = future.result()
+            except Exception as e:
+                summary["failed"] += 1
+                print(f"[red]Punto {row.get('id')}: error al medir {jobs[futures[future]]}: {e}[/red]")
+                continue
+
+            if measurement is None:
+                summary["not_found"] += 1
+                print(f"[yellow]Punto {row.get('id')}: no se encontró la huella ({done}/{len(jobs)})[/yellow]")
+                continue
+
+            row["hv"], row["std_dev"] = hv_statistics([measurement["hv"]])
+            row["measurements"] = [measurement]
+            summary["measured"] += 1
+            print(f"[green]Punto {row.get('id')}: HV={row['hv']:.1f} ({done}/{len(jobs)})[/green]")
+
+    project_data["saved_at"] = datetime.now().isoformat()
+    with open(output_path or project_path, "w", encoding="utf-8") as f:
+        json.dump(project_data, f, indent=2, ensure_ascii=False)
+
+    summary["seconds"] = (datetime.now() - started).total_seconds()
+    return summary
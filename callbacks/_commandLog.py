@@ -0,0 +1,111 @@
+"""
+Undo/redo log of editing actions.
+
+Each action (add, move or delete a point) is recorded as a Command holding
+the two callables that apply it and revert it. The callables are written
+to touch only what the action changed (one plot series, one table row), so
+undoing a single point among hundreds costs the same as marking it.
+Consecutive commands with the same ``merge_key`` (e.g. the frames of one
+drag) collapse into a single step. shortcut() maps Ctrl+Z / Ctrl+Y to the
+log of the active tab.
+"""
+
+from typing import Callable, List, Optional
+
+import dearpygui.dearpygui as dpg
+from rich import print
+
+
+class Command:
+    """One undoable action: ``redo`` applies it, ``undo`` reverts it."""
+
+    def __init__(self, label: str, redo: Callable[[], None], undo: Callable[[], None],
+                 merge_key: Optional[object] = None) -> None:
+        self.label = label
+        self.redo = redo
+        self.undo = undo
+        self.merge_key = merge_key
+
+
+class CommandLog:
+    """Undo and redo stacks of Commands, bounded to ``limit`` steps."""
+
+    def __init__(self, limit: int = 200) -> None:
+        self.limit = limit
+        self._undo: List[Command] = []
+        self._redo: List[Command] = []
+
+    def push(self, command: Command) -> None:
+        """
+        Record a command whose action has already been applied.
+
+        Clears the redo stack. A command with the same merge_key as the last
+        one replaces its redo, so undoing it reverts both at once.
+        """
+        last = self._undo[-1] if self._undo else None
+        if (command.merge_key is not None and last is not None and not self._redo
+                and last.merge_key == command.merge_key):
+            last.redo = command.redo
+            return
+
+        self._redo.clear()
+        self._undo.append(command)
+        if len(self._undo) > self.limit:
+            del self._undo[0]
+
+    def execute(self, command: Command) -> None:
+        """Apply a command and record it."""
+        command.redo()
+        self.push(command)
+
+    def undo(self) -> bool:
+        """Revert the last command; returns False if there is nothing to undo."""
+        if not self._undo:
+            print("[yellow]Nada para deshacer[/yellow]")
+            return False
+        command = self._undo.pop()
+        command.undo()
+        self._redo.append(command)
+        print(f"[cyan]Deshecho: {command.label}[/cyan]")
+        return True
+
+    def redo(self) -> bool:
+        """Apply again the last undone command; returns False if there is nothing to redo."""
+        if not self._redo:
+            print("[yellow]Nada para rehacer[/yellow]")
+            return False
+        command = self._redo.pop()
+        command.redo()
+        self._undo.append(command)
+        print(f"[cyan]Rehecho: {command.label}[/cyan]")
+        return True
+
+    def clear(self) -> None:
+        """Forget every step (new image, project or reset)."""
+        self._undo.clear()
+        self._redo.clear()
+
+    @property
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+
+def shortcut(key: int, tab_tag: str) -> Optional[str]:
+    """
+    "undo" for Ctrl+Z, "redo" for Ctrl+Y or Ctrl+Shift+Z, when ``tab_tag`` is the active tab; None otherwise.
+
+    Meant for key press handlers, which receive the key as app_data.
+    """
+    if not dpg.is_key_down(dpg.mvKey_ModCtrl) or not dpg.does_item_exist("tab_bar"):
+        return None
+    if dpg.get_item_alias(dpg.get_value("tab_bar")) != tab_tag:
+        return None
+    if key == dpg.mvKey_Y or (key == dpg.mvKey_Z and dpg.is_key_down(dpg.mvKey_ModShift)):
+        return "redo"
+    if key == dpg.mvKey_Z:
+        return "undo"
+    return None
@@ -1,14 +1,35 @@
+import itertools
 import os
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
 import dearpygui.dearpygui as dpg
 from rich import print
 from config import get_preference, get_config
+from ._thumbnailCache import ThumbnailCache, THUMBNAIL_SIZE
+from ._imageCache import get_image_cache
 
 
 class DataTableCB:
     def __init__(self, callbacks) -> None:
         self.callbacks = callbacks  # Reference to main callbacks to access heatMap data
         self.table_data = []  # List of dicts: {id, x, y, hv, std_dev, image_path}
-        self.image_textures = {}  # Store texture tags for cleanup
+        self.image_textures = {}  # Row key -> thumbnail texture tag, for cleanup
+        self.thumbnail_cache = None  # ThumbnailCache for the current project folder
+        
+        # Background thumbnail loading
+        self.thumbnail_executor = None  # ThreadPoolExecutor, created on first use
+        self.thumbnail_pending = {}  # Row key -> future of the thumbnail being loaded for it
+        self.thumbnail_results = queue.Queue()  # (row key, future) handed to the render thread
+        self.thumbnail_total = 0  # Thumbnails queued since the loader was last idle
+        self.thumbnail_done = 0
+        
+        # Row model: values currently shown by each table row, used to patch only changed cells.
+        # Row widgets are tagged by a key that stays with the row when rows are inserted or
+        # removed before it, so its cells and thumbnail move with its entry
+        self.rendered_rows = []
+        self.row_keys = []
+        self._row_key_counter = itertools.count()
     
     def updateFromHeatMap(self, sender=None, app_data=None):
         """Synchronize table data with Heat Map points (Mapeado tab).
@@ -40,16 +61,9 @@ class DataTableCB:
             point_id = f"P{point_number}"
             
             if point_id in existing_points:
-                # Point exists - update coordinates, keep image path and HV
+                # Point exists - update coordinates, keep HV, image path, measurements and corrections
                 existing_point = existing_points[point_id]
-                new_table_data.append({
-                    'id': point_id,
-                    'x': x,
-                    'y': y,
-                    'hv': existing_point.get('hv'),  # Preserve existing HV
-                    'std_dev': existing_point.get('std_dev'),  # Preserve existing std_dev
-                    'image_path': existing_point.get('image_path')  # Preserve existing image path
-                })
+                new_table_data.append({**existing_point, 'id': point_id, 'x': x, 'y': y})
             else:
                 # New point - create with defaults
                 default_image_path = os.path.join(last_project_folder, default_image_import_path, f"{point_number} 400x.jpg")
@@ -71,114 +85,394 @@ class DataTableCB:
         print(f"[green]Tabla sincronizada con {len(self.table_data)} puntos del Mapeado[/green]")
     
     def rebuildTable(self):
-        """Rebuild the entire table with current data."""
+        """
+        Bring the table UI in line with table_data.
+
+        Each row's widgets are tagged with a stable key (row_keys) and the row
+        remembers the values it displays (rendered_rows), so syncRow only patches
+        the cells that changed and thumbnails are only reloaded when the image
+        file changes. Here rows are appended or removed at the end; a point
+        inserted or removed in the middle goes through insertEntry/removeEntry,
+        which move the keyed rows along with their entries.
+        """
         if not dpg.does_item_exist("data_table"):
             return
         
-        # Clear existing rows
-        children = dpg.get_item_children("data_table", slot=1)
-        if children:
-            for child in children:
-                dpg.delete_item(child)
+        # Rows deleted from outside (or a table recreated by the UI) invalidate the row model
+        children = dpg.get_item_children("data_table", slot=1) or []
+        if len(children) != len(self.rendered_rows):
+            self.clearTable()
+        
+        # Remove rows that no longer have data
+        for index in range(len(self.rendered_rows) - 1, len(self.table_data) - 1, -1):
+            self.removeRow(index)
+        
+        # Patch existing rows and append new ones
+        for index in range(len(self.table_data)):
+            self.syncRow(index)
+        
+        self.updateThumbnailProgress()
+    
+    def refreshRow(self, index):
+        """Patch a single row after its entry in table_data changed (O(1) UI work)."""
+        if not dpg.does_item_exist("data_table") or index >= len(self.rendered_rows):
+            self.rebuildTable()
+            return
+        
+        self.syncRow(index)
+        self.updateThumbnailProgress()
+    
+    def insertEntry(self, index, data):
+        """
+        Insert a point's entry at ``index``; the ids of the following points move up by one.
+        Only the new row is built; the following rows keep their cells and thumbnails and
+        just show their new id.
+        """
+        self.table_data.insert(index, data)
+        self.renumberFrom(index)
+        if not dpg.does_item_exist("data_table") or len(self.rendered_rows) != len(self.table_data) - 1:
+            self.rebuildTable()
+            return
+        
+        key = next(self._row_key_counter)
+        before = f"table_row_{self.row_keys[index]}" if index < len(self.row_keys) else 0
+        self.addRow(key, data, before)
+        self.row_keys.insert(index, key)
+        self.rendered_rows.insert(index, self.rowSnapshot(data))
+        self.relabelRowsFrom(index + 1)
+        self.updateThumbnailProgress()
+    
+    def removeEntry(self, index):
+        """
+        Remove and return the entry at ``index``; the ids of the following points move down by one.
+        Only the removed row is deleted; the following rows just show their new id.
+        """
+        data = self.table_data.pop(index)
+        self.renumberFrom(index)
+        if not dpg.does_item_exist("data_table") or len(self.rendered_rows) != len(self.table_data) + 1:
+            self.rebuildTable()
+            return data
+        
+        self.removeRow(index)
+        self.relabelRowsFrom(index)
+        self.updateThumbnailProgress()
+        return data
+    
+    def renumberFrom(self, index):
+        """Keep the P<n> ids of entries from ``index`` on in line with their position."""
+        for i in range(index, len(self.table_data)):
+            self.table_data[i]['id'] = f"P{i + 1}"
+    
+    def relabelRowsFrom(self, index):
+        """Show the new ids of the rows from ``index`` on (the only cell a shift changes)."""
+        for i in range(index, len(self.rendered_rows)):
+            if self.rendered_rows[i]['id'] != self.table_data[i]['id']:
+                dpg.set_value(f"table_id_{self.row_keys[i]}", self.table_data[i]['id'])
+                self.rendered_rows[i]['id'] = self.table_data[i]['id']
+    
+    def rowIndex(self, key):
+        """Current position of the row with ``key`` (widget callbacks carry the key), or None."""
+        try:
+            return self.row_keys.index(key)
+        except ValueError:
+            return None
+    
+    def clearTable(self):
+        """Delete every row and thumbnail texture and forget the row model."""
+        self.cancelThumbnailLoading()
+        
+        if dpg.does_item_exist("data_table"):
+            children = dpg.get_item_children("data_table", slot=1)
+            if children:
+                for child in children:
+                    dpg.delete_item(child)
         
-        # Clear existing textures
         for texture_tag in self.image_textures.values():
             if dpg.does_item_exist(texture_tag):
                 dpg.delete_item(texture_tag)
         self.image_textures.clear()
+        self.rendered_rows = []
+        self.row_keys = []
+    
+    def removeRow(self, index):
+        """Delete row ``index`` of the table together with its thumbnail."""
+        key = self.row_keys[index]
+        self.cancelThumbnailLoading(key)
         
-        # Add rows for each data point
-        for i, data in enumerate(self.table_data):
-            with dpg.table_row(parent="data_table", tag=f"table_row_{i}"):
-                # Column 1: ID (read-only)
-                dpg.add_text(data['id'])
-                
-                # Column 2: X (read-only)
-                dpg.add_text(f"{data['x']:.3f}")
-                
-                # Column 3: Y (read-only)
-                dpg.add_text(f"{data['y']:.3f}")
-                
-                # Column 4: HV (editable)
-                dpg.add_input_float(
-                    default_value=data['hv'] if data['hv'] is not None else 0.0,
-                    width=100,
-                    format="%.1f",
-                    tag=f"table_hv_{i}",
-                    callback=lambda s, v, u: self.onValueChange(u, 'hv', v),
-                    user_data=i,
-                    step=0,
-                    step_fast=0
-                )
-                
-                # Column 5: Std Dev (read-only display)
-                std_dev_text = f"±{data['std_dev']:.2f}" if data.get('std_dev') is not None else "-"
-                dpg.add_text(std_dev_text, tag=f"table_stddev_{i}")
-                
-                # Column 6: Image Path (file selector)
-                dpg.add_button(
-                    label=data['image_path'] if data['image_path'] else "Seleccionar...",
-                    width=-1,
-                    tag=f"table_path_{i}",
-                    callback=lambda s, a, u: self.selectImageFile(u),
-                    user_data=i
-                )
-                
-                # Column 7: Image thumbnail
-                self.addImageThumbnail(i, data['image_path'])
+        if dpg.does_item_exist(f"table_row_{key}"):
+            dpg.delete_item(f"table_row_{key}")
+        
+        texture_tag = self.image_textures.pop(key, None)
+        if texture_tag and dpg.does_item_exist(texture_tag):
+            dpg.delete_item(texture_tag)
+        
+        del self.rendered_rows[index]
+        del self.row_keys[index]
+    
+    def rowSnapshot(self, data):
+        """Values displayed by a row; comparing snapshots tells which cells need patching."""
+        return {
+            'id': data.get('id'),
+            'x': data.get('x'),
+            'y': data.get('y'),
+            'hv': data.get('hv'),
+            'std_dev': data.get('std_dev'),
+            'image_path': data.get('image_path'),
+            'image_stat': self.imageSignature(data.get('image_path')),
+        }
+    
+    @staticmethod
+    def imageSignature(image_path):
+        """(mtime, size) of an image file, or None if it does not exist; a change triggers a thumbnail reload."""
+        if not image_path:
+            return None
+        try:
+            stat = os.stat(image_path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def syncRow(self, index):
+        """Create row ``index`` if it does not exist yet, otherwise update only the cells whose value changed."""
+        data = self.table_data[index]
+        snapshot = self.rowSnapshot(data)
+        
+        if index >= len(self.rendered_rows):
+            key = next(self._row_key_counter)
+            self.addRow(key, data)
+            self.row_keys.append(key)
+            self.rendered_rows.append(snapshot)
+            return
+        
+        previous = self.rendered_rows[index]
+        if previous == snapshot:
+            return
+        
+        key = self.row_keys[index]
+        if snapshot['id'] != previous['id']:
+            dpg.set_value(f"table_id_{key}", data['id'])
+        if snapshot['x'] != previous['x']:
+            dpg.set_value(f"table_x_{key}", f"{data['x']:.3f}")
+        if snapshot['y'] != previous['y']:
+            dpg.set_value(f"table_y_{key}", f"{data['y']:.3f}")
+        if snapshot['hv'] != previous['hv']:
+            dpg.set_value(f"table_hv_{key}", data['hv'] if data['hv'] is not None else 0.0)
+        if snapshot['std_dev'] != previous['std_dev']:
+            dpg.set_value(f"table_stddev_{key}", self.formatStdDev(data))
+        if snapshot['image_path'] != previous['image_path']:
+            dpg.set_item_label(f"table_path_{key}", data['image_path'] if data['image_path'] else "Seleccionar...")
+        if (snapshot['image_path'], snapshot['image_stat']) != (previous['image_path'], previous['image_stat']):
+            self.cancelThumbnailLoading(key)
+            self.setThumbnailCell(key, lambda: self.buildThumbnailCell(key, data['image_path']))
+        
+        self.rendered_rows[index] = snapshot
     
-    def addImageThumbnail(self, index, image_path):
-        """Add image thumbnail to table cell."""
+    @staticmethod
+    def formatStdDev(data):
+        return f"±{data['std_dev']:.2f}" if data.get('std_dev') is not None else "-"
+    
+    def addRow(self, key, data, before=0):
+        """Add the row widgets for ``data``, tagged with ``key``, at the end of the table or ``before`` another row."""
+        with dpg.table_row(parent="data_table", tag=f"table_row_{key}", before=before):
+            # Column 1: ID (read-only)
+            dpg.add_text(data['id'], tag=f"table_id_{key}")
+            
+            # Column 2: X (read-only)
+            dpg.add_text(f"{data['x']:.3f}", tag=f"table_x_{key}")
+            
+            # Column 3: Y (read-only)
+            dpg.add_text(f"{data['y']:.3f}", tag=f"table_y_{key}")
+            
+            # Column 4: HV (editable)
+            dpg.add_input_float(
+                default_value=data['hv'] if data['hv'] is not None else 0.0,
+                width=100,
+                format="%.1f",
+                tag=f"table_hv_{key}",
+                callback=lambda s, v, u: self.onValueChange(self.rowIndex(u), 'hv', v),
+                user_data=key,
+                step=0,
+                step_fast=0
+            )
+            
+            # Column 5: Std Dev (read-only display)
+            dpg.add_text(self.formatStdDev(data), tag=f"table_stddev_{key}")
+            
+            # Column 6: Image Path (file selector)
+            dpg.add_button(
+                label=data['image_path'] if data['image_path'] else "Seleccionar...",
+                width=-1,
+                tag=f"table_path_{key}",
+                callback=lambda s, a, u: self.selectImageFile(self.rowIndex(u)),
+                user_data=key
+            )
+            
+            # Column 7: Image thumbnail
+            with dpg.group(tag=f"table_thumb_cell_{key}"):
+                self.buildThumbnailCell(key, data['image_path'])
+    
+    def getThumbnailCache(self):
+        """Return the thumbnail cache of the current project folder (recreated if the folder changed)."""
+        project_folder = get_preference("last_project_folder", default=".") or "."
+        if self.thumbnail_cache is None or self.thumbnail_cache.project_folder != project_folder:
+            self.thumbnail_cache = ThumbnailCache(project_folder, THUMBNAIL_SIZE)
+        return self.thumbnail_cache
+
+    def buildThumbnailCell(self, key, image_path):
+        """
+        Add a placeholder to the current thumbnail cell of row ``key`` and queue the thumbnail for background loading.
+        The texture is created later on the render thread by processThumbnailQueue().
+        """
+        texture_tag = self.image_textures.pop(key, None)
+        if texture_tag and dpg.does_item_exist(texture_tag):
+            dpg.delete_item(texture_tag)
+        
         # Check if file exists
-        if not os.path.isfile(image_path):
-            dpg.add_text("(Sin imagen)", tag=f"table_thumb_{index}")
+        if not image_path or not os.path.isfile(image_path):
+            dpg.add_text("(Sin imagen)", tag=f"table_thumb_{key}")
             return
         
-        try:
-            # Load image
-            width, height, channels, data = dpg.load_image(image_path)
+        dpg.add_text("Cargando...", tag=f"table_thumb_{key}")
+        
+        if self.thumbnail_executor is None:
+            self.thumbnail_executor = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 4), thread_name_prefix="thumbnail")
+        
+        if not self.thumbnail_pending:
+            # Start a new progress count
+            self.thumbnail_total = 0
+            self.thumbnail_done = 0
+        
+        # Memory cache first, then the on-disk thumbnail cache, then a decode of the full image
+        future = self.thumbnail_executor.submit(get_image_cache().get, image_path, THUMBNAIL_SIZE, self.getThumbnailCache().get)
+        self.thumbnail_pending[key] = future
+        self.thumbnail_total += 1
+        future.add_done_callback(lambda f: self.thumbnail_results.put((key, f)))
+    
+    def cancelThumbnailLoading(self, key=None):
+        """Cancel the pending thumbnail of one row (by key), or of every row if key is None."""
+        keys = list(self.thumbnail_pending) if key is None else [key]
+        for k in keys:
+            future = self.thumbnail_pending.pop(k, None)
+            if future is not None:
+                future.cancel()
+                self.thumbnail_total = max(0, self.thumbnail_total - 1)
+    
+    def shutdownThumbnailLoader(self):
+        """Stop the worker pool without waiting for pending thumbnails (called on exit)."""
+        self.cancelThumbnailLoading()
+        if self.thumbnail_executor is not None:
+            self.thumbnail_executor.shutdown(wait=False, cancel_futures=True)
+            self.thumbnail_executor = None
+    
+    def processThumbnailQueue(self, budget_ms=8.0):
+        """
+        Create textures for thumbnails finished by the workers.
+        Must run on the render thread; called every frame with a small time budget.
+        """
+        deadline = time.perf_counter() + budget_ms / 1000.0
+        processed = 0
+        
+        while time.perf_counter() < deadline:
+            try:
+                key, future = self.thumbnail_results.get_nowait()
+            except queue.Empty:
+                break
             
-            # Calculate thumbnail size (max 140x140)
-            max_size = 140
-            if width > height:
-                thumb_width = max_size
-                thumb_height = int(height * max_size / width)
-            else:
-                thumb_height = max_size
-                thumb_width = int(width * max_size / height)
+            # Drop results replaced or cancelled since they were queued
+            if self.thumbnail_pending.get(key) is not future or future.cancelled():
+                continue
+            
+            del self.thumbnail_pending[key]
+            self.thumbnail_done += 1
+            processed += 1
             
-            # Create texture
-            texture_tag = f"table_texture_{index}"
+            try:
+                self.showThumbnail(key, future.result())
+            except Exception as e:
+                index = self.rowIndex(key)
+                image_path = self.table_data[index]['image_path'] if index is not None and index < len(self.table_data) else "?"
+                self.setThumbnailCell(key, lambda: dpg.add_text(f"(Error: {str(e)[:20]})", tag=f"table_thumb_{key}"))
+                print(f"[red]Error cargando imagen {image_path}: {e}[/red]")
+        
+        if processed:
+            self.updateThumbnailProgress()
+    
+    def setThumbnailCell(self, key, build):
+        """Replace the contents of row ``key``'s thumbnail cell with the items created by build()."""
+        cell = f"table_thumb_cell_{key}"
+        if not dpg.does_item_exist(cell):
+            return False
+        
+        dpg.delete_item(cell, children_only=True)
+        dpg.push_container_stack(cell)
+        try:
+            build()
+        finally:
+            dpg.pop_container_stack()
+        return True
+    
+    def showThumbnail(self, key, thumbnail):
+        """Upload a finished thumbnail as a texture and show it as a clickable image button."""
+        texture_tag = f"table_texture_{key}"
+        
+        def build():
             if dpg.does_item_exist(texture_tag):
                 dpg.delete_item(texture_tag)
             
             with dpg.texture_registry():
-                dpg.add_static_texture(width, height, data, tag=texture_tag)
+                dpg.add_static_texture(thumbnail.width, thumbnail.height, thumbnail.texture_data(), tag=texture_tag)
             
-            self.image_textures[index] = texture_tag
+            self.image_textures[key] = texture_tag
             
             # Add image button (clickable thumbnail)
             dpg.add_image_button(
                 texture_tag, 
-                width=thumb_width, 
-                height=thumb_height, 
-                tag=f"table_thumb_{index}",
-                callback=lambda s, a, u: self.goToVickersWithImage(u),
-                user_data=index
+                width=thumbnail.width, 
+                height=thumbnail.height, 
+                tag=f"table_thumb_{key}",
+                callback=lambda s, a, u: self.goToVickersWithImage(self.rowIndex(u)),
+                user_data=key
             )
-            
-        except Exception as e:
-            dpg.add_text(f"(Error: {str(e)[:20]})", tag=f"table_thumb_{index}")
-            print(f"[red]Error cargando imagen {image_path}: {e}[/red]")
+        
+        self.setThumbnailCell(key, build)
+    
+    def updateThumbnailProgress(self):
+        """Show how many thumbnails of the current table build are loaded."""
+        if not dpg.does_item_exist("thumbnail_progress_text"):
+            return
+        
+        if self.thumbnail_pending:
+            dpg.set_value("thumbnail_progress_text", f"Miniaturas: {self.thumbnail_done}/{self.thumbnail_total}")
+        elif self.image_textures:
+            dpg.set_value("thumbnail_progress_text", f"Miniaturas: {len(self.image_textures)} cargadas")
+        else:
+            dpg.set_value("thumbnail_progress_text", "")
+    
+    def updateImageCacheStats(self):
+        """Show the hit/miss counters and memory use of the shared decoded-image cache."""
+        if not dpg.does_item_exist("image_cache_stats_text"):
+            return
+        
+        stats = get_image_cache().stats()
+        dpg.set_value(
+            "image_cache_stats_text",
+            f"Caché de imágenes: {stats['entries']} ({stats['used_mb']:.0f}/{stats['budget_mb']:.0f} MB) | "
+            f"aciertos {stats['hits']} | fallos {stats['misses']}"
+        )
     
     def onValueChange(self, row_index, field, new_value):
         """Handle changes to editable fields."""
-        if row_index < len(self.table_data):
+        if row_index is not None and row_index < len(self.table_data):
             self.table_data[row_index][field] = new_value
+            if row_index < len(self.rendered_rows):
+                self.rendered_rows[row_index][field] = new_value  # The input already shows it
             print(f"[cyan]Fila {row_index + 1}, {field} actualizado: {new_value}[/cyan]")
     
     def selectImageFile(self, row_index):
         """Open file dialog to select image file for a specific row."""
+        if row_index is None:
+            return
+        
         def file_callback(sender, app_data):
             if app_data and 'file_path_name' in app_data:
                 file_path = app_data['file_path_name']
@@ -186,12 +480,8 @@ class DataTableCB:
                 self.table_data[row_index]['image_path'] = file_path
                 print(f"[cyan]Fila {row_index + 1}, imagen actualizada: {file_path}[/cyan]")
                 
-                # Update button label to show new path
-                if dpg.does_item_exist(f"table_path_{row_index}"):
-                    dpg.set_item_label(f"table_path_{row_index}", file_path)
-                
-                # Rebuild the entire table to update thumbnail properly
-                self.rebuildTable()
+                # Update the path label and reload only this row's thumbnail
+                self.refreshRow(row_index)
         
         # Create file dialog if not exists
         if not dpg.does_item_exist("table_file_dialog"):
@@ -237,7 +527,7 @@ class DataTableCB:
     
     def goToVickersWithImage(self, row_index):
         """Switch to Vickers tab and load the image for this point."""
-        if row_index >= len(self.table_data):
+        if row_index is None or row_index >= len(self.table_data):
             return
         
         image_path = self.table_data[row_index]['image_path']
@@ -264,6 +554,7 @@ class DataTableCB:
         
         # Set current index in Vickers callback
         vickers.current_table_index = row_index
+        vickers.prefetchNeighbors(row_index)
         
         print(f"[cyan]Mediciones reiniciadas para punto {point_id}[/cyan]")
     
@@ -287,17 +578,15 @@ class DataTableCB:
             dpg.configure_item("file_path_text", default_value="Ruta: " + file_dir)
         
         try:
-            # Load image
-            width, height, channels, data = dpg.load_image(image_path)
+            # Load image (already decoded if it was prefetched or shown before)
+            vickers.image_buffer = get_image_cache().get(image_path)
+            width, height = vickers.image_buffer.width, vickers.image_buffer.height
             
             # Store image dimensions
             vickers.image_width = width
             vickers.image_height = height
             vickers.current_image_path = image_path
-            
-            # Store original and current image data
-            vickers.original_image_data = [data[i] for i in range(len(data))]
-            vickers.current_image_data = vickers.original_image_data
+            vickers.resetFilterChain()
             
             # Get calibration
             from config import get_preference
@@ -305,28 +594,12 @@ class DataTableCB:
             real_width = int(width * calibration)
             real_height = int(height * calibration)
             
-            # Delete existing image series
-            if dpg.does_item_exist("image_series"):
-                dpg.delete_item("image_series")
-            
-            # Delete existing texture
-            if dpg.does_item_exist("loaded_image_texture"):
-                dpg.delete_item("loaded_image_texture")
-            
-            # Create texture
-            with dpg.texture_registry():
-                dpg.add_static_texture(width, height, data, tag="loaded_image_texture")
-            
-            # Add image series to plot (using correct axis tag and bounds format)
-            if dpg.does_item_exist("Processing_y_axis"):
-                dpg.add_image_series(
-                    "loaded_image_texture",
-                    bounds_min=(0, 0),
-                    bounds_max=(real_width, real_height),
-                    parent="Processing_y_axis",
-                    tag="image_series",
-                    label=file_name[-34:-4] if len(file_name) > 34 else file_name[:-4]
-                )
+            # Show the image in the Vickers plot (texture reused if the size matches)
+            vickers.image_slot.show(
+                vickers.image_buffer,
+                bounds_max=(real_width, real_height),
+                label=file_name[-34:-4] if len(file_name) > 34 else file_name[:-4]
+            )
             
             # Fit plot axes (using correct axis tags)
             if dpg.does_item_exist("Processing_x_axis"):
@@ -0,0 +1,99 @@
+"""
+Project-local store of decoded images as memory-mapped ``.npy`` files.
+
+JPEG decoding dominates the time needed to reopen a project. When
+``[Cache] decoded_sidecar`` is enabled, the first decode of an image also
+writes its float32 RGBA pixels to ``<project folder>/.cache/decoded``; later
+opens map that file with ``numpy.load(mmap_mode="r")``, so no decoding or
+copying happens and the pixels are paged in by the OS as the texture reads
+them. File names contain a hash of the source path plus its modification
+time and size; when the source changes, the stale file is replaced.
+"""
+
+import glob
+import hashlib
+import os
+import threading
+from typing import Optional
+
+import numpy as np
+from rich import print
+
+from config import get_config, get_preference
+from ._imageBuffer import ImageBuffer
+
+
+CACHE_SUBDIR = os.path.join(".cache", "decoded")
+
+
+class DecodedImageStore:
+    """Decoded RGBA images of one project folder, stored as uncompressed ``.npy`` files."""
+
+    def __init__(self, project_folder: str) -> None:
+        self.project_folder = project_folder
+        self.cache_dir = os.path.join(project_folder, CACHE_SUBDIR)
+
+    @staticmethod
+    def _prefix(image_path: str) -> str:
+        return hashlib.sha1(os.path.abspath(image_path).encode("utf-8")).hexdigest()[:20]
+
+    def sidecar_path(self, image_path: str) -> Optional[str]:
+        """Path of the ``.npy`` file for the current version of ``image_path`` (None if it does not exist)."""
+        try:
+            stat = os.stat(image_path)
+        except OSError:
+            return None
+        return os.path.join(self.cache_dir, f"{self._prefix(image_path)}-{stat.st_mtime_ns}-{stat.st_size}.npy")
+
+    def load(self, image_path: str) -> Optional[ImageBuffer]:
+        """Memory-map the stored pixels of ``image_path``, or return None if there is no up-to-date copy."""
+        sidecar = self.sidecar_path(image_path)
+        if sidecar is None or not os.path.isfile(sidecar):
+            return None
+        try:
+            return ImageBuffer(np.load(sidecar, mmap_mode="r"))
+        except (OSError, ValueError):
+            return None  # Truncated or corrupted file: decode again
+
+    def store(self, image_path: str, image: ImageBuffer) -> Optional[str]:
+        """Write the original pixels of ``image`` and delete copies of older versions of the file."""
+        sidecar = self.sidecar_path(image_path)
+        if sidecar is None:
+            return None
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{sidecar}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, image.original)
+            os.replace(tmp_path, sidecar)
+        except OSError as e:
+            print(f"[yellow]No se pudo guardar la imagen decodificada en caché ({sidecar}): {e}[/yellow]")
+            return None
+
+        for stale in glob.glob(os.path.join(self.cache_dir, f"{self._prefix(image_path)}-*.npy")):
+            if stale != sidecar:
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
+        return sidecar
+
+    def get(self, image_path: str) -> ImageBuffer:
+        """Return the memory-mapped pixels of ``image_path``, decoding and storing them on a miss."""
+        image = self.load(image_path)
+        if image is not None:
+            return image
+
+        image = ImageBuffer.decode(image_path)
+        if self.store(image_path, image) is not None:
+            # Serve the mapped copy so the decoded array can be freed
+            return self.load(image_path) or image
+        return image
+
+
+def get_decoded_store() -> Optional[DecodedImageStore]:
+    """Store of the current project folder, or None if ``[Cache] decoded_sidecar`` is disabled."""
+    if not get_config()['Cache']['decoded_sidecar']:
+        return None
+    return DecodedImageStore(get_preference("last_project_folder", default=".") or ".")
@@ -0,0 +1,216 @@
+"""
+Vectorized Vickers hardness kernel.
+
+Shared by the Vickers tab, the batch measurement, the data table and the
+reports so all of them give the same numbers. Vertices are (x, y) in µm,
+ordered like the clicks of the Vickers tab (the first diagonal joins points
+1 and 3, the second points 2 and 4). Any number of measurements is handled
+at once as an array of shape (..., 4, 2):
+
+    HV = 1.854 * F / d²    (F in kgf, d = mean diagonal in mm)
+
+Loads can be given in any of the ISO 6507 units (gf, kgf or N).
+Statistics skip missing values (NaN), so table columns with unmeasured
+points can be passed as they are.
+
+Measurements keep the vertex pixels (``pixels``, ``image_size``) they were
+marked on; µm positions, diagonals, HV and std_dev are derived from them, so
+recompute_measurements() and recompute_table() can refresh a whole project
+after a calibration or load correction in one vectorized pass.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+VICKERS_FACTOR = 1.854  # 2 sin(136° / 2), F in kgf and d in mm
+LOAD_UNITS = {"gf": 1e-3, "kgf": 1.0, "N": 1.0 / 9.80665}  # Factor to kgf
+
+
+def load_to_kgf(load, unit: str = "gf"):
+    """Convert a load (scalar or array) to kgf."""
+    if unit not in LOAD_UNITS:
+        raise ValueError(f"Unidad de carga desconocida: {unit} (use {', '.join(LOAD_UNITS)})")
+    return np.asarray(load, dtype=np.float64) * LOAD_UNITS[unit]
+
+
+def diagonals(points) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Diagonals d1, d2 and their mean (µm) of vertices with shape (..., 4, 2)."""
+    points = np.asarray(points, dtype=np.float64)
+    first = points[..., 2, :] - points[..., 0, :]
+    second = points[..., 3, :] - points[..., 1, :]
+    d1 = np.hypot(first[..., 0], first[..., 1])
+    d2 = np.hypot(second[..., 0], second[..., 1])
+    return d1, d2, (d1 + d2) / 2
+
+
+def vickers_hardness(d_avg, load, unit: str = "gf") -> np.ndarray:
+    """HV of mean diagonals in µm under ``load`` (scalar or per measurement); 0 for a null diagonal."""
+    d_mm = np.asarray(d_avg, dtype=np.float64) / 1000.0  # µm to mm
+    load_kgf = load_to_kgf(load, unit)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        hv = VICKERS_FACTOR * load_kgf / d_mm ** 2
+    return np.where(d_mm > 0, hv, 0.0)
+
+
+def measure(points, load, unit: str = "gf") -> Dict[str, np.ndarray]:
+    """Diagonals and hardness of measurements with vertices (..., 4, 2): {d1, d2, d_avg, hv} arrays."""
+    d1, d2, d_avg = diagonals(points)
+    return {"d1": d1, "d2": d2, "d_avg": d_avg, "hv": vickers_hardness(d_avg, load, unit)}
+
+
+def measure_vertices(points: Sequence[Tuple[float, float]], load, unit: str = "gf") -> dict:
+    """One measurement as stored by the Vickers tab: {points, d1, d2, d_avg, hv} with float values."""
+    result = measure(points, load, unit)
+    measurement = {"points": [tuple(p) for p in points]}
+    measurement.update({key: float(value) for key, value in result.items()})
+    return measurement
+
+
+def pixels_to_um(pixels, image_size, calibration) -> np.ndarray:
+    """
+    Plot µm of pixel positions (..., 2), with the mapping of the Vickers image series.
+
+    The image spans int(size * calibration) µm with row 0 at the top, so y is
+    flipped. ``image_size`` is (width, height), one for all points or one per
+    leading index of ``pixels``.
+    """
+    pixels = np.asarray(pixels, dtype=np.float64)
+    size = np.asarray(image_size, dtype=np.float64)
+    scale = np.floor(size * calibration) / size
+    while size.ndim < pixels.ndim:  # Broadcast one size per measurement over its vertices
+        size, scale = size[..., None, :], scale[..., None, :]
+    return np.stack([pixels[..., 0] * scale[..., 0], (size[..., 1] - pixels[..., 1]) * scale[..., 1]], axis=-1)
+
+
+def statistics(values) -> Dict[str, float]:
+    """n, mean, sample std (0 for a single value), min, max and range of the finite values."""
+    values = np.asarray(values, dtype=np.float64).ravel()
+    values = values[np.isfinite(values)]
+    n = len(values)
+    if n == 0:
+        return {"n": 0, "mean": 0.0, "std": 0.0, "min": 0.0, "max": 0.0, "range": 0.0}
+    low, high = float(values.min()), float(values.max())
+    return {
+        "n": n,
+        "mean": float(values.mean()),
+        "std": float(values.std(ddof=1)) if n > 1 else 0.0,
+        "min": low,
+        "max": high,
+        "range": high - low,
+    }
+
+
+def grouped_statistics(values, groups, n_groups: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    Statistics of values split by group index, e.g. the HV of every measurement of every point.
+
+    Args:
+        values: (N,) values (NaN entries are ignored)
+        groups: (N,) integer group of each value, 0 to n_groups - 1
+        n_groups: number of groups (max(groups) + 1 by default)
+
+    Returns:
+        Dict of (n_groups,) arrays with the keys of statistics(); groups without
+        values get n = 0 and NaN for the rest.
+    """
+    values = np.asarray(values, dtype=np.float64).ravel()
+    groups = np.asarray(groups, dtype=np.intp).ravel()
+    if n_groups is None:
+        n_groups = int(groups.max()) + 1 if len(groups) else 0
+
+    valid = np.isfinite(values)
+    values, groups = values[valid], groups[valid]
+
+    n = np.bincount(groups, minlength=n_groups)
+    total = np.bincount(groups, weights=values, minlength=n_groups)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = total / n
+        squares = np.bincount(groups, weights=(values - mean[groups]) ** 2, minlength=n_groups)
+        std = np.where(n > 1, np.sqrt(squares / (n - 1)), 0.0)
+
+    low = np.full(n_groups, np.inf)
+    high = np.full(n_groups, -np.inf)
+    np.minimum.at(low, groups, values)
+    np.maximum.at(high, groups, values)
+
+    empty = n == 0
+    for array in (mean, std, low, high):
+        array[empty] = np.nan
+    return {"n": n, "mean": mean, "std": std, "min": low, "max": high, "range": high - low}
+
+
+def _recomputable(measurement: dict) -> bool:
+    return "pixels" in measurement and "image_size" in measurement
+
+
+def _refresh(measurements: List[dict], calibration: float, load, unit: str) -> np.ndarray:
+    """Rewrite points, diagonals and HV of measurements that all have pixels; returns their HV."""
+    pixels = np.array([m["pixels"] for m in measurements], dtype=np.float64).reshape(-1, 4, 2)
+    sizes = np.array([m["image_size"] for m in measurements], dtype=np.float64).reshape(-1, 2)
+    points = pixels_to_um(pixels, sizes, calibration)
+    result = measure(points, load, unit)
+
+    clicked = [i for i, m in enumerate(measurements) if "clicked_pixels" in m]
+    if clicked:
+        clicked_points = pixels_to_um(np.array([measurements[i]["clicked_pixels"] for i in clicked], dtype=np.float64),
+                                      sizes[clicked], calibration)
+        corrections = np.linalg.norm(clicked_points - points[clicked], axis=-1)
+
+    points_list = points.tolist()
+    d1, d2, d_avg, hv = (result[key].tolist() for key in ("d1", "d2", "d_avg", "hv"))
+    for i, m in enumerate(measurements):
+        m["points"] = [tuple(p) for p in points_list[i]]
+        m["d1"], m["d2"], m["d_avg"], m["hv"] = d1[i], d2[i], d_avg[i], hv[i]
+    for k, i in enumerate(clicked):
+        measurements[i]["clicked_points"] = [tuple(p) for p in clicked_points[k].tolist()]
+        measurements[i]["corrections"] = corrections[k].tolist()
+    return result["hv"]
+
+
+def recompute_measurements(measurements: List[dict], calibration: float, load, unit: str = "gf") -> int:
+    """
+    Recompute in place the measurements that store their vertex pixels.
+
+    Returns the number of measurements updated (older ones without pixels are left as they are).
+    """
+    usable = [m for m in measurements if _recomputable(m)]
+    if usable:
+        _refresh(usable, calibration, load, unit)
+    return len(usable)
+
+
+def recompute_table(rows: List[dict], calibration: float, load, unit: str = "gf") -> List[int]:
+    """
+    Recompute ``hv`` and ``std_dev`` of table rows from their stored measurements.
+
+    Only rows whose measurements all store vertex pixels are touched (HV typed
+    by hand or measured before pixels were kept stays as is). All measurements
+    of all rows go through the kernel in a single call.
+
+    Returns:
+        Indices of the rows whose hv or std_dev changed.
+    """
+    indices = [i for i, row in enumerate(rows)
+               if row.get("measurements") and all(_recomputable(m) for m in row["measurements"])]
+    if not indices:
+        return []
+
+    measurements = [m for i in indices for m in rows[i]["measurements"]]
+    groups = np.repeat(np.arange(len(indices)), [len(rows[i]["measurements"]) for i in indices])
+    stats = grouped_statistics(_refresh(measurements, calibration, load, unit), groups, len(indices))
+
+    changed = []
+    for k, (hv, std_dev) in enumerate(zip(stats["mean"].tolist(), stats["std"].tolist())):
+        row = rows[indices[k]]
+        if row.get("hv") != hv or row.get("std_dev") != std_dev:
+            row["hv"], row["std_dev"] = hv, std_dev
+            changed.append(indices[k])
+    return changed
+
+
+def hv_statistics(hv_values: Sequence[float]) -> Tuple[float, float]:
+    """Mean and sample standard deviation of the HV of several measurements (0 for a single one)."""
+    stats = statistics(hv_values)
+    return stats["mean"], stats["std"]
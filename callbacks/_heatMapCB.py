@@ -1,8 +1,17 @@
 import os
 import math
+import itertools
 import dearpygui.dearpygui as dpg
 from rich import print
-from config import get_preference, save_preference
+from config import get_preference, save_preference, get_config
+from ._textureSlot import TextureSlot
+from ._commandLog import Command, CommandLog, shortcut
+from ._uiDispatcher import get_ui_dispatcher
+from ._imageCache import get_image_cache
+from ._tilePyramid import TilePyramid, TiledImageView, image_size, CACHE_SUBDIR as PYRAMID_CACHE_SUBDIR
+
+
+MAPPING_EXPORT_SIZE = 2048  # Max width/height of mapping_with_points.png for tiled images (drawn on a pyramid level)
 
 
 class HeatMapCB:
@@ -13,12 +22,23 @@ class HeatMapCB:
         self.image_width = None
         self.image_height = None
         self.current_image_path = None
-        self.original_image_data = None
-        self.current_image_data = None
+        self.image_buffer = None  # ImageBuffer with the surface image pixels
+        self.image_slot = TextureSlot("heatmap_image_texture", "heatmap_image_series", "HeatMap_y_axis")  # Reused across images
+        self.tiled_view = TiledImageView("heatmap_tile", "HeatMap_y_axis", "HeatMap_x_axis", "HeatMapPlotParent")  # Very large images
         
         # Heat map points
         self.points = []  # List of (x, y) coordinates
         self.point_series_tags = []  # List of series tags for cleanup
+        self.point_keys = []  # Tag suffix of each point's markers and table row; stays with the point when others are inserted or removed
+        self._point_key_counter = itertools.count()
+        
+        # Undo/redo of point edits; each step patches only the affected series and table rows
+        self.history = CommandLog()
+        self.pick_radius = 8  # Screen pixels around a point that grab it for dragging or deleting
+        self.drag_index = None  # Point being dragged with the left button
+        self.drag_start = None  # Its position when the drag started
+        self.drag_position = None  # Its position under the cursor
+        self.mapping_image_version = 0  # Debounces the mapping image saves of consecutive edits
         
         # Calibration mode
         self.calibration_mode = False  # True when calibrating
@@ -55,48 +75,7 @@ class HeatMapCB:
 
         # Load and display the image
         try:
-            width, height, channels, data = dpg.load_image(full_path)
-
-            self.image_width = width
-            self.image_height = height
-            self.current_image_path = full_path
-            
-            # Store original and current image data
-            self.original_image_data = [data[i] for i in range(len(data))]
-            self.current_image_data = self.original_image_data
-
-            # Get calibration value
-            calibration = get_preference("heatmap_calibration", default=0.001)
-            real_width = width * calibration
-            real_height = height * calibration
-
-            # Delete existing image series
-            if dpg.does_item_exist("heatmap_image_series"):
-                dpg.delete_item("heatmap_image_series")
-
-            # Delete existing texture
-            if dpg.does_item_exist("heatmap_image_texture"):
-                dpg.delete_item("heatmap_image_texture")
-
-            # Create texture
-            with dpg.texture_registry():
-                dpg.add_static_texture(width, height, data, tag="heatmap_image_texture")
-
-            # Add image series to plot
-            dpg.add_image_series(
-                "heatmap_image_texture",
-                bounds_min=(0, 0),
-                bounds_max=(real_width, real_height),
-                parent="HeatMap_y_axis",
-                tag="heatmap_image_series",
-                label=self.fileName[-34:-4],
-            )
-
-            # Reset axis
-            dpg.set_axis_limits_auto("HeatMap_x_axis")
-            dpg.set_axis_limits_auto("HeatMap_y_axis")
-            dpg.fit_axis_data("HeatMap_x_axis")
-            dpg.fit_axis_data("HeatMap_y_axis")
+            width, height = self._displayImage(full_path)
 
             # Clear previous points
             self.resetPoints()
@@ -112,6 +91,66 @@ class HeatMapCB:
             print(f"[red]Error loading image: {e}[/red]")
             traceback.print_exc()
 
+    def _displayImage(self, full_path):
+        """
+        Show the surface image in the plot and reset the axes.
+
+        Images larger than [Mapping] tile_threshold are shown through the tile
+        pyramid; smaller ones use a single texture.
+        Returns the image size in pixels.
+        """
+        mapping_config = get_config()['Mapping']
+        width, height = image_size(full_path)
+
+        self.image_width = width
+        self.image_height = height
+        self.current_image_path = full_path
+
+        # Get calibration value
+        calibration = get_preference("heatmap_calibration", default=0.001)
+        real_width = width * calibration
+        real_height = height * calibration
+
+        if max(width, height) > mapping_config['tile_threshold']:
+            # Too large for one texture: show only the tiles visible at the current zoom
+            self.image_buffer = None
+            self.image_slot.clear()
+            project_folder = get_preference("last_project_folder", default=".") or "."
+            pyramid = TilePyramid(full_path, os.path.join(project_folder, PYRAMID_CACHE_SUBDIR), mapping_config['tile_size'])
+            self.tiled_view.max_textures = mapping_config['max_tile_textures']
+            self.tiled_view.open(pyramid, (0, 0), (real_width, real_height))
+        else:
+            self.tiled_view.clear()
+            self.image_buffer = get_image_cache().get(full_path)
+
+            # Show the image in the plot (texture reused if the size matches)
+            self.image_slot.show(
+                self.image_buffer,
+                bounds_max=(real_width, real_height),
+                label=self.fileName[-34:-4],
+            )
+
+        # Reset axis
+        dpg.set_axis_limits_auto("HeatMap_x_axis")
+        dpg.set_axis_limits_auto("HeatMap_y_axis")
+        dpg.fit_axis_data("HeatMap_x_axis")
+        dpg.fit_axis_data("HeatMap_y_axis")
+        return width, height
+
+    def updateTiledView(self):
+        """Per-frame update of the tiled surface image (no-op for images shown as one texture)."""
+        if self.tiled_view.is_active:
+            self.tiled_view.update()
+
+    def surfaceOverview(self, max_size=4096):
+        """Surface image as an ImageBuffer no larger than max_size (downscaled from the pyramid when tiled)."""
+        if self.tiled_view.pyramid is not None:
+            pyramid = self.tiled_view.pyramid
+            return get_image_cache().get(self.current_image_path, max_size, loader=lambda path: pyramid.overview(max_size))
+        if self.image_buffer is not None:
+            return self.image_buffer
+        return get_image_cache().get(self.current_image_path)
+
     def cancelImportImage(self, sender=None, app_data=None):
         """Handle file dialog cancellation."""
         print("Heat Map - CANCEL was clicked.")
@@ -132,48 +171,7 @@ class HeatMapCB:
         
         # Load and display the image
         try:
-            width, height, channels, data = dpg.load_image(full_path)
-
-            self.image_width = width
-            self.image_height = height
-            self.current_image_path = full_path
-            
-            # Store original and current image data
-            self.original_image_data = [data[i] for i in range(len(data))]
-            self.current_image_data = self.original_image_data
-
-            # Get calibration value
-            calibration = get_preference("heatmap_calibration", default=0.001)
-            real_width = width * calibration
-            real_height = height * calibration
-
-            # Delete existing image series
-            if dpg.does_item_exist("heatmap_image_series"):
-                dpg.delete_item("heatmap_image_series")
-
-            # Delete existing texture
-            if dpg.does_item_exist("heatmap_image_texture"):
-                dpg.delete_item("heatmap_image_texture")
-
-            # Create texture
-            with dpg.texture_registry():
-                dpg.add_static_texture(width, height, data, tag="heatmap_image_texture")
-
-            # Add image series to plot
-            dpg.add_image_series(
-                "heatmap_image_texture",
-                bounds_min=(0, 0),
-                bounds_max=(real_width, real_height),
-                parent="HeatMap_y_axis",
-                tag="heatmap_image_series",
-                label=self.fileName[-34:-4],
-            )
-
-            # Reset axis
-            dpg.set_axis_limits_auto("HeatMap_x_axis")
-            dpg.set_axis_limits_auto("HeatMap_y_axis")
-            dpg.fit_axis_data("HeatMap_x_axis")
-            dpg.fit_axis_data("HeatMap_y_axis")
+            width, height = self._displayImage(full_path)
 
             print(f"[green]Imagen del mapa de calor cargada: {width}x{height} pixels[/green]")
             return True
@@ -194,7 +192,7 @@ class HeatMapCB:
         if self.image_width is None or self.image_height is None:
             return
 
-        if not dpg.does_item_exist("heatmap_image_series"):
+        if not dpg.does_item_exist("heatmap_image_series") and not self.tiled_view.is_active:
             return
 
         calibration = get_preference("heatmap_calibration", default=0.001)
@@ -206,7 +204,7 @@ class HeatMapCB:
         bounds_min = (-x_offset, -y_offset)
         bounds_max = (real_width - x_offset, real_height - y_offset)
 
-        dpg.configure_item("heatmap_image_series", bounds_min=bounds_min, bounds_max=bounds_max)
+        self._setImageBounds(bounds_min, bounds_max)
         dpg.fit_axis_data("HeatMap_x_axis")
         dpg.fit_axis_data("HeatMap_y_axis")
 
@@ -239,22 +237,184 @@ class HeatMapCB:
             self.handleCalibrationClick(plot_coords)
             return
 
+        # Shift+click deletes the point under the cursor, a click on a point starts dragging it
+        picked = self.pickPoint(plot_coords)
+        if dpg.is_key_down(dpg.mvKey_ModShift):
+            if picked is not None:
+                self.deletePoint(picked)
+            return
+        if picked is not None:
+            self.drag_index = picked
+            self.drag_start = list(self.points[picked][:2])
+            self.drag_position = None
+            return
+
         # Add point in Marcar Puntos mode
-        self.points.append(plot_coords)
-        point_index = len(self.points)
-        
-        print(f"[cyan]Punto P{point_index}: ({plot_coords[0]:.3f}, {plot_coords[1]:.3f}) mm[/cyan]")
+        self.addPoint(plot_coords)
 
-        # Draw point and update table
-        self.drawPoint(point_index - 1, plot_coords)
-        self.updatePointsTable()
-        
-        # Add point to Data Table tab
-        self.addPointToDataTable(point_index, plot_coords)
+    def onPlotDrag(self, sender, app_data):
+        """Move the dragged point's markers with the cursor (its other series and the tables wait for the release)."""
+        if self.drag_index is None:
+            return
+        self.drag_position = list(dpg.get_plot_mouse_pos()[:2])
+        self.drawPoint(self.drag_index, self.drag_position)
+
+    def onPlotRelease(self, sender, app_data):
+        """Finish a point drag as one undoable move."""
+        if self.drag_index is None:
+            return
+        index, start, end = self.drag_index, self.drag_start, self.drag_position
+        self.drag_index = self.drag_start = self.drag_position = None
+        if end is not None and end != start:
+            self.movePoint(index, end, start)
+
+    def pickPoint(self, coords):
+        """Index of the point closest to coords if it lies within pick_radius screen pixels, else None."""
+        if not self.points or not dpg.does_item_exist("HeatMap_x_axis"):
+            return None
+        x_min, x_max = dpg.get_axis_limits("HeatMap_x_axis")
+        plot_width = dpg.get_item_rect_size("HeatMapPlotParent")[0] or 1
+        radius = self.pick_radius * (x_max - x_min) / plot_width
+
+        x, y = coords[0], coords[1]
+        index = min(range(len(self.points)), key=lambda i: math.hypot(self.points[i][0] - x, self.points[i][1] - y))
+        if math.hypot(self.points[index][0] - x, self.points[index][1] - y) > radius:
+            return None
+        return index
+
+    def addPoint(self, coords):
+        """Mark a new point at the end of the list (undoable)."""
+        coords = list(coords[:2])
+        index = len(self.points)
+        row = self.newDataTableRow(index + 1, coords)
+        table_index = len(self.callbacks.dataTable.table_data) if row is not None else None  # Appended to the table
+        print(f"[cyan]Punto P{index + 1}: ({coords[0]:.3f}, {coords[1]:.3f}) mm[/cyan]")
+        self.history.execute(Command(
+            f"agregar P{index + 1}",
+            redo=lambda: self.insertPoint(index, coords, row, table_index),
+            undo=lambda: self.removePoint(index, table_index),
+        ))
+        if row is not None:
+            print(f"[green]Punto {row['id']} agregado a la tabla de datos[/green]")
+
+    def movePoint(self, index, coords, previous):
+        """Move point ``index`` from ``previous`` to ``coords`` (undoable)."""
+        coords, previous = list(coords[:2]), list(previous[:2])
+        print(f"[cyan]Punto P{index + 1} movido a ({coords[0]:.3f}, {coords[1]:.3f}) mm[/cyan]")
+        self.history.execute(Command(
+            f"mover P{index + 1}",
+            redo=lambda: self.setPoint(index, coords),
+            undo=lambda: self.setPoint(index, previous),
+        ))
+
+    def deletePoint(self, index):
+        """Delete point ``index``; later points are renumbered (undoable)."""
+        coords = list(self.points[index][:2])
+        table_index = self.dataTableIndex(index)
+        row = self.callbacks.dataTable.table_data[table_index] if table_index is not None else None
+        print(f"[yellow]Punto P{index + 1} eliminado[/yellow]")
+        self.history.execute(Command(
+            f"eliminar P{index + 1}",
+            redo=lambda: self.removePoint(index, table_index),
+            undo=lambda: self.insertPoint(index, coords, row, table_index),
+        ))
+
+    def insertPoint(self, index, coords, row=None, table_index=None):
+        """
+        Insert a point at ``index`` (and its data table row at ``table_index``).
+        Only its markers and row are created; the following points are just relabelled.
+        """
+        if index:
+            self.pointKey(index - 1)  # Keys of the points before exist
+        self.points.insert(index, list(coords))
+        self.point_keys.insert(index, next(self._point_key_counter))
+        self.drawPoint(index, self.points[index])
+        self.setPointsTableRow(index)
+        self.relabelPointsFrom(index + 1)
+        if row is not None and table_index is not None:
+            self.callbacks.dataTable.insertEntry(table_index, row)
+
+    def removePoint(self, index, table_index=None):
+        """
+        Remove point ``index`` (and the data table row at ``table_index``).
+        Only its markers and row are deleted; the following points are just relabelled.
+        """
+        key = self.pointKey(index)
+        self.points.pop(index)
+        del self.point_keys[index]
+        for tag in (f"heatmap_point_{key}_diamond", f"heatmap_point_{key}_center"):
+            if dpg.does_item_exist(tag):
+                dpg.delete_item(tag)
+            if tag in self.point_series_tags:
+                self.point_series_tags.remove(tag)
+        if dpg.does_item_exist(f"heatmap_points_row_{key}"):
+            dpg.delete_item(f"heatmap_points_row_{key}")
+        self.relabelPointsFrom(index)
+        if table_index is not None:
+            self.callbacks.dataTable.removeEntry(table_index)
+
+    def setPoint(self, index, coords):
+        """Place point ``index`` at ``coords``, patching its markers and table rows only."""
+        table_index = self.dataTableIndex(index)
+        self.points[index] = list(coords)
+        self.drawPoint(index, self.points[index])
+        self.setPointsTableRow(index)
+        self.pointsChanged()
+        if table_index is not None:
+            row = self.callbacks.dataTable.table_data[table_index]
+            row['x'], row['y'] = coords[0], coords[1]
+            self.callbacks.dataTable.refreshRow(table_index)
+
+    def dataTableIndex(self, index):
+        """Index of point ``index``'s row in the data table, or None if the table is not in step with the points."""
+        if self.callbacks is None or not hasattr(self.callbacks, 'dataTable'):
+            return None
+        table_data = self.callbacks.dataTable.table_data
+        if index < len(table_data) and table_data[index].get('id') == f"P{index + 1}":
+            return index
+        return None
+
+    def pointKey(self, index):
+        """Tag suffix of point ``index``'s markers and table row (created for points loaded without one)."""
+        while len(self.point_keys) <= index:
+            self.point_keys.append(next(self._point_key_counter))
+        return self.point_keys[index]
+
+    def relabelPointsFrom(self, start):
+        """Show the new P<n> labels of the points from ``start`` on after an insertion or removal before them."""
+        for i in range(start, len(self.points)):
+            key = self.pointKey(i)
+            if dpg.does_item_exist(f"heatmap_point_{key}_diamond"):
+                dpg.set_item_label(f"heatmap_point_{key}_diamond", f"P{i + 1}")
+            if dpg.does_item_exist(f"heatmap_points_id_{key}"):
+                dpg.set_value(f"heatmap_points_id_{key}", f"P{i + 1}")
+        self.pointsChanged()
+
+    def pointsChanged(self):
+        """Update the point count and schedule the mapping image save."""
+        if dpg.does_item_exist("heatmap_point_count"):
+            dpg.set_value("heatmap_point_count", f"Total: {len(self.points)} puntos")
+        self.scheduleMappingImageSave()
+
+    def undo(self, sender=None, app_data=None):
+        """Undo the last point edit."""
+        self.history.undo()
+
+    def redo(self, sender=None, app_data=None):
+        """Redo the last undone point edit."""
+        self.history.redo()
+
+    def onShortcut(self, sender, app_data):
+        """Ctrl+Z / Ctrl+Y while the Mapeado tab is active."""
+        action = shortcut(app_data, "tab_mapping")
+        if action == "undo":
+            self.undo()
+        elif action == "redo":
+            self.redo()
 
     def drawPoint(self, index, coords):
-        """Draw a diamond (rombo) at the specified coordinates."""
-        x, y = coords
+        """Draw a diamond (rombo) at the specified coordinates, or move the existing one of this index."""
+        x, y = coords[0], coords[1]
         
         # Create diamond vertices (rombo)
         # Diamond size in mm
@@ -264,13 +424,20 @@ class HeatMapCB:
         diamond_x = [x, x + size, x, x - size, x]
         diamond_y = [y + size, y, y - size, y, y + size]
         
+        # Existing markers are moved in place
+        key = self.pointKey(index)
+        tag = f"heatmap_point_{key}_diamond"
+        tag_center = f"heatmap_point_{key}_center"
+        if dpg.does_item_exist(tag) and dpg.does_item_exist(tag_center):
+            dpg.set_value(tag, [diamond_x, diamond_y])
+            dpg.set_value(tag_center, [[x], [y]])
+            return
+        
         # Draw diamond outline
-        tag = f"heatmap_point_{index}_diamond"
         dpg.add_line_series(diamond_x, diamond_y, parent="HeatMap_y_axis", tag=tag, label=f"P{index + 1}")
         self.point_series_tags.append(tag)
         
         # Draw center point
-        tag_center = f"heatmap_point_{index}_center"
         dpg.add_scatter_series([x], [y], parent="HeatMap_y_axis", tag=tag_center)
         self.point_series_tags.append(tag_center)
 
@@ -286,11 +453,8 @@ class HeatMapCB:
                 dpg.delete_item(child)
         
         # Add rows for each point
-        for i, (x, y) in enumerate(self.points):
-            with dpg.table_row(parent="heatmap_points_table"):
-                dpg.add_text(f"P{i + 1}")
-                dpg.add_text(f"{x:.2f}")
-                dpg.add_text(f"{y:.2f}")
+        for i in range(len(self.points)):
+            self.setPointsTableRow(i)
         
         # Update point count
         if dpg.does_item_exist("heatmap_point_count"):
@@ -299,6 +463,33 @@ class HeatMapCB:
         # Save mapping image with points
         self.saveMappingImage()
 
+    def setPointsTableRow(self, index):
+        """Show point ``index`` in the points table, creating its row if needed."""
+        if not dpg.does_item_exist("heatmap_points_table"):
+            return
+        x, y = self.points[index][0], self.points[index][1]
+        key = self.pointKey(index)
+        if dpg.does_item_exist(f"heatmap_points_row_{key}"):
+            dpg.set_value(f"heatmap_points_x_{key}", f"{x:.2f}")
+            dpg.set_value(f"heatmap_points_y_{key}", f"{y:.2f}")
+            return
+        # Placed before the next point's row when inserted in the middle
+        following = f"heatmap_points_row_{self.pointKey(index + 1)}" if index + 1 < len(self.points) else None
+        before = following if following and dpg.does_item_exist(following) else 0
+        with dpg.table_row(parent="heatmap_points_table", tag=f"heatmap_points_row_{key}", before=before):
+            dpg.add_text(f"P{index + 1}", tag=f"heatmap_points_id_{key}")
+            dpg.add_text(f"{x:.2f}", tag=f"heatmap_points_x_{key}")
+            dpg.add_text(f"{y:.2f}", tag=f"heatmap_points_y_{key}")
+
+    def scheduleMappingImageSave(self, delay=1.5):
+        """Save the mapping image once the points have not changed for ``delay`` seconds."""
+        self.mapping_image_version += 1
+        get_ui_dispatcher().post_later(delay, self._saveMappingImageIfCurrent, self.mapping_image_version)
+
+    def _saveMappingImageIfCurrent(self, version):
+        if version == self.mapping_image_version:
+            self.saveMappingImage()
+
     def saveMappingImage(self):
         """Save the mapping image with points overlaid to project folder."""
         if not self.current_image_path or not os.path.exists(self.current_image_path):
@@ -310,8 +501,14 @@ class HeatMapCB:
         try:
             from PIL import Image as PILImage, ImageDraw, ImageFont
             
-            # Open the image
-            original_img = PILImage.open(self.current_image_path)
+            # Tiled images are too large to decode whole: draw on a pyramid level instead,
+            # scaling the point coordinates to it
+            if self.tiled_view.is_active:
+                original_img = self.surfaceOverview(MAPPING_EXPORT_SIZE).to_pil()
+                scale = original_img.width / self.image_width
+            else:
+                original_img = get_image_cache().get(self.current_image_path).to_pil()
+                scale = 1.0
             
             # Add margin to prevent clipping of points and labels
             margin = 50  # pixels
@@ -335,8 +532,8 @@ class HeatMapCB:
                 # The points are stored in the transformed coordinate system (with origin_offset applied)
                 # To draw on the original image, we need to add back the origin_offset
                 # calibration is in mm/pixel, so pixels = mm / calibration
-                x_px = (x_mm + self.origin_offset[0]) / calibration
-                y_px = img_height - (y_mm + self.origin_offset[1]) / calibration  # Flip Y axis
+                x_px = (x_mm + self.origin_offset[0]) / calibration * scale
+                y_px = img_height - (y_mm + self.origin_offset[1]) / calibration * scale  # Flip Y axis
                 
                 # Apply margin offset
                 x_px += margin
@@ -404,6 +601,8 @@ class HeatMapCB:
         
         self.point_series_tags.clear()
         self.points.clear()
+        self.point_keys.clear()
+        self.history.clear()
         
         # Update table and count
         self.updatePointsTable()
@@ -621,7 +820,7 @@ class HeatMapCB:
         if self.image_width is None or self.image_height is None:
             return
 
-        if not dpg.does_item_exist("heatmap_image_series"):
+        if not dpg.does_item_exist("heatmap_image_series") and not self.tiled_view.is_active:
             return
 
         calibration = get_preference("heatmap_calibration", default=0.001)
@@ -633,12 +832,19 @@ class HeatMapCB:
         bounds_min = (-x_offset, -y_offset)
         bounds_max = (real_width - x_offset, real_height - y_offset)
 
-        dpg.configure_item("heatmap_image_series", bounds_min=bounds_min, bounds_max=bounds_max)
+        self._setImageBounds(bounds_min, bounds_max)
         dpg.fit_axis_data("HeatMap_x_axis")
         dpg.fit_axis_data("HeatMap_y_axis")
         
         print(f"[green]Imagen reposicionada. Origen desplazado: ({-x_offset:.3f}, {-y_offset:.3f}) mm[/green]")
 
+    def _setImageBounds(self, bounds_min, bounds_max):
+        """Move the surface image, whether it is a single texture or a tiled pyramid."""
+        if self.tiled_view.is_active:
+            self.tiled_view.set_bounds(bounds_min, bounds_max)
+        else:
+            dpg.configure_item("heatmap_image_series", bounds_min=bounds_min, bounds_max=bounds_max)
+
     def drawCoordinateAxes(self):
         """Draw thin blue coordinate axes at the origin (0,0)."""
         # Clear previous axes
@@ -704,17 +910,16 @@ class HeatMapCB:
         
         print("[yellow]Modo establecer origen cancelado[/yellow]")
     
-    def addPointToDataTable(self, point_index, coords):
-        """Add the point to the Data Table tab."""
+    def newDataTableRow(self, point_index, coords):
+        """Data table row of a new point, or None if the Data Table callback is not available."""
         if self.callbacks is None or not hasattr(self.callbacks, 'dataTable'):
             print("[yellow]Data Table callback no disponible[/yellow]")
-            return
+            return None
         
-        x, y = coords
+        x, y = coords[0], coords[1]
         point_id = f"P{point_index}"
         
         # Get default image import path from config
-        from config import get_config
         config = get_config()
         default_path = config['Paths'].get('default_image_import_path', 'images/')
         
@@ -724,16 +929,10 @@ class HeatMapCB:
         # Construct default image path
         default_image_path = os.path.join(last_project_folder, default_path, f"{point_index} 400x.jpg")
         
-        # Add to data table
-        self.callbacks.dataTable.table_data.append({
+        return {
             'id': point_id,
             'x': x,
             'y': y,
             'hv': None,  # To be filled by user or Vickers calculation
             'image_path': default_image_path
-        })
-        
-        # Rebuild the data table to show the new point
-        self.callbacks.dataTable.rebuildTable()
-        
-        print(f"[green]Punto {point_id} agregado a la tabla de datos[/green]")
+        }
@@ -0,0 +1,339 @@
+"""
+Interpolation of the hardness points onto the heat map grid.
+
+Interpolating ``grid_resolution``² nodes is the expensive part of a heat map;
+colour scale, contour lines, point labels and the surface overlay only
+change how the result is drawn. InterpolationCache memoizes the grids in a
+small thread-safe LRU keyed by a hash of the point arrays and the
+interpolation settings (method, resolution, padding), so redrawing with
+other cosmetic options, or generating the web and the local map from the
+same data, reuses the grid.
+
+Linear and cubic interpolation both work on the Delaunay triangulation of
+the points. It is built once per point set (also kept in the cache) and
+handed to LinearNDInterpolator / CloughTocher2DInterpolator, so a new
+resolution or a switch between linear and cubic only evaluates the grid.
+
+When the values change but the grid stays the same (a point re-measured or
+measured for the first time inside the current bounds), update_grid()
+starts from the previous grid of the same settings: cells lying in a
+triangle that still exists, with unchanged vertex values, keep their value,
+and only the cells in the triangles around the changed points are evaluated
+again. For cubic, each vertex also keeps the gradient its surrounding cells
+were evaluated with (``reference_grad``); the vertex counts as changed once
+its gradient drifts past a tolerance from that reference, not from the
+previous update, so small changes cannot pile up over successive edits.
+
+"rbf" and "kriging" (see _hmLocalInterpolation) estimate each cell from its
+nearest points only; kriging also returns a ``variance_grid``.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+try:
+    from scipy.interpolate import CloughTocher2DInterpolator, LinearNDInterpolator, NearestNDInterpolator
+    from scipy.spatial import Delaunay
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+from ._hmLocalInterpolation import DEFAULT_NEIGHBORS, LOCAL_METHODS, LocalInterpolator
+
+
+TRIANGULATED_METHODS = ("linear", "cubic")
+GRADIENT_TOLERANCE = 1e-4  # Cubic updates: vertex gradient change (in HV range per edge) still treated as unchanged
+
+
+def grid_bounds(x_data: np.ndarray, y_data: np.ndarray, padding: float = 0.1) -> Tuple[float, float, float, float]:
+    """(x_min, x_max, y_min, y_max) of the points, widened by ``padding`` times their extent on each side."""
+    x_min, x_max = float(x_data.min()), float(x_data.max())
+    y_min, y_max = float(y_data.min()), float(y_data.max())
+    x_range, y_range = x_max - x_min, y_max - y_min
+    return (x_min - x_range * padding, x_max + x_range * padding,
+            y_min - y_range * padding, y_max + y_range * padding)
+
+
+def make_interpolator(x_data: np.ndarray, y_data: np.ndarray, z_data: np.ndarray, method: str = "cubic",
+                      triangulation: Optional["Delaunay"] = None, neighbors: int = DEFAULT_NEIGHBORS):
+    """
+    Interpolator of the points, equivalent to scipy's griddata for ``method``.
+
+    Linear and cubic use ``triangulation`` (the Delaunay triangulation of the
+    points) if given, instead of triangulating again. "rbf" and "kriging" use
+    the ``neighbors`` nearest points of each location.
+    """
+    points = np.column_stack([x_data, y_data]).astype(np.float64)
+    if method == "nearest":
+        return NearestNDInterpolator(points, z_data)
+    if method in LOCAL_METHODS:
+        return LocalInterpolator(points, z_data, method, neighbors)
+    if method not in TRIANGULATED_METHODS:
+        raise ValueError(f"Método de interpolación desconocido: {method}")
+
+    triangulation = triangulation if triangulation is not None else Delaunay(points)
+    if method == "linear":
+        return LinearNDInterpolator(triangulation, z_data)
+    return CloughTocher2DInterpolator(triangulation, z_data)
+
+
+def interpolate_grid(x_data: np.ndarray, y_data: np.ndarray, z_data: np.ndarray, method: str = "cubic",
+                     resolution: int = 500, padding: float = 0.1,
+                     triangulation: Optional["Delaunay"] = None,
+                     neighbors: int = DEFAULT_NEIGHBORS) -> Dict[str, np.ndarray]:
+    """
+    Interpolate scattered values on a resolution x resolution grid covering the padded bounds.
+
+    Returns:
+        {xi, yi, zi_grid, variance_grid, bounds}; zi_grid is NaN outside the convex
+        hull of the points for linear and cubic. variance_grid is the kriging
+        prediction variance (None for the other methods). The points,
+        triangulation and gradients are included for update_grid().
+    """
+    bounds = grid_bounds(x_data, y_data, padding)
+    x_min, x_max, y_min, y_max = bounds
+    xi = np.linspace(x_min, x_max, resolution)
+    yi = np.linspace(y_min, y_max, resolution)
+    xi_grid, yi_grid = np.meshgrid(xi, yi)
+    interpolator = make_interpolator(x_data, y_data, z_data, method, triangulation, neighbors)
+    if method in LOCAL_METHODS:
+        zi, variance = interpolator.predict(np.column_stack([xi_grid.ravel(), yi_grid.ravel()]))
+        zi_grid = zi.reshape(xi_grid.shape)
+        variance_grid = variance.reshape(xi_grid.shape) if variance is not None else None
+    else:
+        zi_grid, variance_grid = interpolator(xi_grid, yi_grid), None
+    return {
+        "xi": xi, "yi": yi, "zi_grid": zi_grid, "variance_grid": variance_grid, "bounds": bounds,
+        "x_data": x_data, "y_data": y_data, "z_data": z_data, "triangulation": triangulation,
+        "owners": None, "reference_grad": getattr(interpolator, "grad", None), "updated_cells": xi_grid.size,
+    }
+
+
+def cell_owners(triangulation: "Delaunay", xi: np.ndarray, yi: np.ndarray) -> np.ndarray:
+    """Triangle containing each grid cell, (len(yi), len(xi)) int array with -1 outside the hull."""
+    xi_grid, yi_grid = np.meshgrid(xi, yi)
+    return triangulation.find_simplex(np.column_stack([xi_grid.ravel(), yi_grid.ravel()])).reshape(xi_grid.shape)
+
+
+def longest_edges(triangulation: "Delaunay") -> np.ndarray:
+    """Length of the longest triangulation edge at each point."""
+    simplices = triangulation.simplices
+    corners = triangulation.points[simplices]
+    lengths = np.linalg.norm(corners - np.roll(corners, -1, axis=1), axis=2)  # Edge i joins vertices i and i+1
+    longest = np.zeros(len(triangulation.points))
+    for i in range(3):
+        np.maximum.at(longest, simplices[:, i], np.maximum(lengths[:, i], lengths[:, i - 1]))
+    return longest
+
+
+def _stable_vertices(previous: dict, x_data: np.ndarray, y_data: np.ndarray, z_data: np.ndarray,
+                     interpolator, method: str,
+                     triangulation: "Delaunay") -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+    """
+    Index of each new point among the previous points (-1 if new), whether
+    the interpolant around it is unchanged (same value and, for cubic, a
+    gradient within tolerance of the one its cells were evaluated with) and,
+    for cubic, the reference gradients for the next update.
+    """
+    old_index = {xy: i for i, xy in enumerate(zip(previous["x_data"].tolist(), previous["y_data"].tolist()))}
+    mapping = np.array([old_index.get(xy, -1) for xy in zip(x_data.tolist(), y_data.tolist())], dtype=np.intp)
+    known = mapping >= 0
+
+    stable = known.copy()
+    stable[known] = previous["z_data"][mapping[known]] == z_data[known]
+    if method != "cubic":
+        return mapping, stable, None
+
+    # Gradients are estimated from all the points, but the change fades quickly away from the
+    # edited ones: accept gradient changes worth less than GRADIENT_TOLERANCE of the HV range
+    # over the longest edge at the vertex. They are measured from the gradient the vertex's
+    # cells were evaluated with, which only moves when the vertex is rebuilt, so the error
+    # stays bounded however many edits follow
+    tolerance = GRADIENT_TOLERANCE * max(float(np.ptp(z_data)), 1e-12) / np.maximum(longest_edges(triangulation), 1e-12)
+    grad = interpolator.grad.reshape(len(z_data), 2)
+    reference = np.array(grad)
+    reference[known] = previous["reference_grad"].reshape(-1, 2)[mapping[known]]
+    stable[known] &= np.abs(grad[known] - reference[known]).max(axis=1) <= tolerance[known]
+    reference[~stable] = grad[~stable]
+    return mapping, stable, reference
+
+
+def _triangle_codes(simplices: np.ndarray, n_points: int) -> np.ndarray:
+    """One int64 per triangle identifying its three vertices regardless of their order."""
+    ordered = np.sort(simplices, axis=1).astype(np.int64)
+    return (ordered[:, 0] * n_points + ordered[:, 1]) * n_points + ordered[:, 2]
+
+
+def update_grid(previous: dict, x_data: np.ndarray, y_data: np.ndarray, z_data: np.ndarray, method: str,
+                triangulation: "Delaunay") -> Dict[str, np.ndarray]:
+    """
+    Grid for new values from the grid of the previous values with the same bounds and settings.
+
+    Args:
+        previous: result of a previous linear or cubic evaluation (with x_data,
+            y_data, z_data, triangulation, owners and, for cubic, reference_grad)
+        triangulation: Delaunay triangulation of the new points
+
+    Returns:
+        Same dict as interpolate_grid() plus the state needed for the next update.
+    """
+    interpolator = make_interpolator(x_data, y_data, z_data, method, triangulation)
+    mapping, stable, reference_grad = _stable_vertices(previous, x_data, y_data, z_data, interpolator, method,
+                                                       triangulation)
+
+    # Triangles present before (same three points) whose vertices are all stable,
+    # matched through an integer code of their sorted vertex indices
+    n_old = len(previous["z_data"])
+    old_simplices = previous["triangulation"].simplices
+    old_codes = _triangle_codes(old_simplices, n_old)
+    order = np.argsort(old_codes)
+    candidate = stable[triangulation.simplices].all(axis=1)
+    new_codes = _triangle_codes(np.where(candidate[:, None], mapping[triangulation.simplices], 0), n_old)
+    position = np.minimum(np.searchsorted(old_codes[order], new_codes), len(order) - 1)
+    survived = candidate & (old_codes[order][position] == new_codes)
+    old_to_new = np.full(len(old_simplices), -1, dtype=np.intp)
+    old_to_new[order[position[survived]]] = np.nonzero(survived)[0]
+
+    # Cells of surviving triangles keep their value; the rest is evaluated again, except cells
+    # that were outside the hull and cannot be reached by any rebuilt triangle
+    xi, yi = previous["xi"], previous["yi"]
+    old_owners = previous["owners"]
+    owners = np.where(old_owners >= 0, old_to_new[old_owners], -1)
+    zi_grid = np.array(previous["zi_grid"])
+    stale = owners < 0
+    rebuilt = ~survived
+    if rebuilt.any():
+        corners = triangulation.points[triangulation.simplices[rebuilt]]
+        (bx_min, by_min), (bx_max, by_max) = corners.min(axis=(0, 1)), corners.max(axis=(0, 1))
+        reachable = ((yi >= by_min) & (yi <= by_max))[:, None] & ((xi >= bx_min) & (xi <= bx_max))[None, :]
+        stale &= (old_owners >= 0) | reachable
+    else:
+        stale &= old_owners >= 0
+
+    rows, cols = np.nonzero(stale)
+    cells = np.column_stack([xi[cols], yi[rows]])
+    owners[rows, cols] = triangulation.find_simplex(cells)
+    zi_grid[rows, cols] = interpolator(cells)
+
+    return {
+        "xi": previous["xi"], "yi": previous["yi"], "zi_grid": zi_grid, "variance_grid": None,
+        "bounds": previous["bounds"],
+        "x_data": x_data, "y_data": y_data, "z_data": z_data, "triangulation": triangulation,
+        "owners": owners, "reference_grad": reference_grad, "updated_cells": len(rows),
+    }
+
+
+def points_key(x_data: np.ndarray, y_data: np.ndarray) -> str:
+    """Hash of the point positions (the triangulation does not depend on the values)."""
+    digest = hashlib.sha1()
+    for array in (x_data, y_data):
+        digest.update(np.ascontiguousarray(array, dtype=np.float64).tobytes())
+        digest.update(b"|")
+    return digest.hexdigest()
+
+
+def interpolation_key(x_data: np.ndarray, y_data: np.ndarray, z_data: np.ndarray, method: str,
+                      resolution: int, padding: float, neighbors: int = DEFAULT_NEIGHBORS) -> str:
+    """Hash of the point arrays and the settings that determine the interpolated grid."""
+    digest = hashlib.sha1()
+    for array in (x_data, y_data, z_data):
+        digest.update(np.ascontiguousarray(array, dtype=np.float64).tobytes())
+        digest.update(b"|")
+    digest.update(f"{method}|{int(resolution)}|{float(padding)!r}|{int(neighbors)}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class InterpolationCache:
+    """Thread-safe LRU of interpolated grids (a few entries: each 500² grid is about 2 MB) and of triangulations."""
+
+    def __init__(self, max_entries: int = 4) -> None:
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Dict[str, np.ndarray]]" = OrderedDict()  # Most recently used last
+        self._triangulations: "OrderedDict[str, Delaunay]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def triangulation(self, x_data: np.ndarray, y_data: np.ndarray) -> "Delaunay":
+        """Delaunay triangulation of the points, built once per point set."""
+        key = points_key(x_data, y_data)
+        with self._lock:
+            triangulation = self._triangulations.get(key)
+            if triangulation is not None:
+                self._triangulations.move_to_end(key)
+                return triangulation
+
+        triangulation = Delaunay(np.column_stack([x_data, y_data]).astype(np.float64))
+
+        with self._lock:
+            self._triangulations[key] = triangulation
+            while len(self._triangulations) > self.max_entries:
+                self._triangulations.popitem(last=False)
+        return triangulation
+
+    def get(self, x_data: np.ndarray, y_data: np.ndarray, z_data: np.ndarray, method: str = "cubic",
+            resolution: int = 500, padding: float = 0.1,
+            neighbors: int = DEFAULT_NEIGHBORS) -> Dict[str, np.ndarray]:
+        """
+        Interpolated grid of the points ({xi, yi, zi_grid, variance_grid, bounds, updated_cells, ...}),
+        computed only on a miss.
+
+        A miss with the same settings and bounds as a cached grid (new values
+        at the same or added points) is an incremental update_grid().
+        The cached arrays are shared and read-only; copy them before modifying.
+        """
+        key = interpolation_key(x_data, y_data, z_data, method, resolution, padding, neighbors)
+        settings = (method, int(resolution), float(padding), int(neighbors))
+        bounds = grid_bounds(x_data, y_data, padding)
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+            self.misses += 1
+            # Latest grid with the same settings and bounds, to update instead of evaluating everything
+            previous = next((entry for entry in reversed(self._entries.values())
+                             if entry["settings"] == settings and entry["bounds"] == bounds), None)
+
+        x_data, y_data, z_data = (np.array(a, dtype=np.float64) for a in (x_data, y_data, z_data))
+        triangulation = self.triangulation(x_data, y_data) if method in TRIANGULATED_METHODS else None
+        if previous is not None and triangulation is not None:
+            if previous["owners"] is None:
+                previous["owners"] = cell_owners(previous["triangulation"], previous["xi"], previous["yi"])
+            result = update_grid(previous, x_data, y_data, z_data, method, triangulation)
+        else:
+            result = interpolate_grid(x_data, y_data, z_data, method, resolution, padding, triangulation, neighbors)
+        result["settings"] = settings
+        for name in ("xi", "yi", "zi_grid", "variance_grid", "x_data", "y_data", "z_data"):
+            if result[name] is not None:
+                result[name].flags.writeable = False
+
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._triangulations.clear()
+
+
+_shared_cache: Optional[InterpolationCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_interpolation_cache() -> InterpolationCache:
+    """Return the process-wide interpolation cache."""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = InterpolationCache()
+        return _shared_cache
@@ -0,0 +1,266 @@
+"""
+Neighbourhood-limited RBF and ordinary kriging for the heat map grid.
+
+A global RBF or kriging system has one row per point, so it costs O(n³) and
+stops being usable at the few thousand points of a long traverse. Here each
+grid cell is estimated only from its ``neighbors`` nearest points, found
+with a KD-tree. Neighbouring cells usually share the same nearest points:
+cells are grouped by their (sorted) neighbour set and one small system is
+solved per set, batched with numpy, then every cell of the set is evaluated
+with its own distances. Both methods fill the whole padded grid, without
+the NaN that linear and cubic leave outside the convex hull. Points at the
+same location would make their systems singular and are merged first,
+with the mean of their values.
+
+- "rbf": thin plate spline with a linear polynomial, exact at the points.
+- "kriging": ordinary kriging with a spherical variogram fitted to the
+  empirical semivariogram of the points. Besides the estimate it returns the
+  prediction variance of every cell (zero at the points, growing away from
+  them), shown as a second map.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+try:
+    from scipy.optimize import curve_fit
+    from scipy.spatial import cKDTree
+    from scipy.spatial.distance import pdist
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+
+LOCAL_METHODS = ("rbf", "kriging")
+DEFAULT_NEIGHBORS = 16
+VARIOGRAM_SAMPLE = 800  # Points used for the empirical semivariogram (pairs grow as n²)
+VARIOGRAM_BINS = 15
+GROUP_CHUNK = 2048  # Neighbour sets solved per batch (bounds memory: chunk * (k+3)² floats)
+CELL_CHUNK = 4096  # Cells evaluated per batch (few points put most cells in a handful of sets)
+
+
+def spherical_variogram(h: np.ndarray, nugget: float, partial_sill: float, range_: float) -> np.ndarray:
+    """Spherical semivariogram; 0 at h = 0, ``nugget + partial_sill`` beyond ``range_``."""
+    ratio = np.minimum(np.asarray(h, dtype=np.float64) / range_, 1.0)
+    gamma = nugget + partial_sill * (1.5 * ratio - 0.5 * ratio ** 3)
+    return np.where(h > 0, gamma, 0.0)
+
+
+def fit_variogram(points: np.ndarray, values: np.ndarray, seed: int = 0) -> Tuple[float, float, float]:
+    """
+    (nugget, partial sill, range) of a spherical variogram fitted to the points.
+
+    The empirical semivariogram is computed on up to VARIOGRAM_SAMPLE points,
+    in VARIOGRAM_BINS lags up to half the diagonal of their bounding box. If
+    the fit fails, a pure spherical model with the variance of the values as
+    sill and a third of that distance as range is used.
+    """
+    if len(points) > VARIOGRAM_SAMPLE:
+        sample = np.random.default_rng(seed).choice(len(points), VARIOGRAM_SAMPLE, replace=False)
+        points, values = points[sample], values[sample]
+
+    cutoff = 0.5 * float(np.hypot(*np.ptp(points, axis=0)))
+    variance = float(np.var(values))
+    fallback = (0.0, max(variance, 1e-12), max(cutoff / 3, 1e-12))
+    if cutoff <= 0 or variance <= 0:
+        return fallback
+
+    distances = pdist(points)
+    semivariances = 0.5 * pdist(values[:, None], "sqeuclidean")
+    edges = np.linspace(0.0, cutoff, VARIOGRAM_BINS + 1)
+    bins = (distances * (VARIOGRAM_BINS / cutoff)).astype(np.intp)  # Equal-width lags
+    inside = bins < VARIOGRAM_BINS
+    counts = np.bincount(bins[inside], minlength=VARIOGRAM_BINS)
+    sums = np.bincount(bins[inside], weights=semivariances[inside], minlength=VARIOGRAM_BINS)
+    used = counts > 0
+    if used.sum() < 3:
+        return fallback
+
+    lags = (0.5 * (edges[:-1] + edges[1:]))[used]
+    gamma = sums[used] / counts[used]
+    try:
+        params, _ = curve_fit(
+            spherical_variogram, lags, gamma,
+            p0=(float(gamma[0]), variance, cutoff / 3),
+            bounds=([0.0, 0.0, cutoff / VARIOGRAM_BINS], [np.inf, np.inf, 4 * cutoff]),
+            sigma=1.0 / np.sqrt(counts[used]),  # Lags with more pairs weigh more
+        )
+    except (RuntimeError, ValueError):
+        return fallback
+    nugget, partial_sill, range_ = (float(p) for p in params)
+    if partial_sill + nugget <= 0:
+        return fallback
+    return nugget, partial_sill, range_
+
+
+def thin_plate(r: np.ndarray) -> np.ndarray:
+    """Thin plate spline kernel r² log r (0 at r = 0)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(r > 0, r * r * np.log(np.where(r > 0, r, 1.0)), 0.0)
+
+
+def _singular(matrices: np.ndarray) -> np.ndarray:
+    """Which matrices of the batch are singular or too ill-conditioned for an exact solve."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        condition = np.linalg.cond(matrices)
+    return ~(condition < 1 / np.finfo(np.float64).eps)
+
+
+def _solve(matrices: np.ndarray, rhs: np.ndarray) -> np.ndarray:
+    """Batched solve, using the pseudo-inverse only for the singular systems (e.g. collinear points)."""
+    try:
+        return np.linalg.solve(matrices, rhs)
+    except np.linalg.LinAlgError:
+        singular = _singular(matrices)
+        result = np.empty(rhs.shape)
+        result[~singular] = np.linalg.solve(matrices[~singular], rhs[~singular])
+        result[singular] = np.linalg.pinv(matrices[singular]) @ rhs[singular]
+        return result
+
+
+def _inverse(matrices: np.ndarray) -> np.ndarray:
+    """Batched inverse, using the pseudo-inverse only for the singular matrices."""
+    try:
+        return np.linalg.inv(matrices)
+    except np.linalg.LinAlgError:
+        singular = _singular(matrices)
+        result = np.empty(matrices.shape)
+        result[~singular] = np.linalg.inv(matrices[~singular])
+        result[singular] = np.linalg.pinv(matrices[singular])
+        return result
+
+
+def merge_coincident(points: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Points with repeated coordinates (re-measured indentations, imported duplicates)
+    merged into one carrying the mean of their values.
+    """
+    unique, inverse, counts = np.unique(points, axis=0, return_inverse=True, return_counts=True)
+    if len(unique) == len(points):
+        return points, values
+    inverse = inverse.ravel()
+    return unique, np.bincount(inverse, weights=values, minlength=len(unique)) / counts
+
+
+class LocalInterpolator:
+    """
+    RBF or ordinary kriging of scattered values, each estimate using only the nearest points.
+
+    Called like scipy's interpolators: ``interpolator(xi, yi)`` or ``interpolator(points)``.
+    predict() also returns the kriging variance.
+    """
+
+    def __init__(self, points: np.ndarray, values: np.ndarray, method: str = "kriging",
+                 neighbors: int = DEFAULT_NEIGHBORS) -> None:
+        if method not in LOCAL_METHODS:
+            raise ValueError(f"Método de interpolación desconocido: {method}")
+        self.points, self.values = merge_coincident(np.asarray(points, dtype=np.float64),
+                                                    np.asarray(values, dtype=np.float64))
+        self.method = method
+        self.neighbors = max(1, min(int(neighbors), len(self.points)))
+        self.tree = cKDTree(self.points)
+        self.variogram = fit_variogram(self.points, self.values) if method == "kriging" else None
+
+    def __call__(self, *xi) -> np.ndarray:
+        if len(xi) == 2:
+            x, y = np.broadcast_arrays(*xi)
+            return self.predict(np.column_stack([x.ravel(), y.ravel()]))[0].reshape(x.shape)
+        return self.predict(np.asarray(xi[0], dtype=np.float64))[0]
+
+    def _kernel(self, r: np.ndarray) -> np.ndarray:
+        if self.method == "kriging":
+            return spherical_variogram(r, *self.variogram)
+        return thin_plate(r)
+
+    def predict(self, cells: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Estimates at ``cells`` (N, 2) and, for kriging, their prediction variance (None for RBF).
+        """
+        cells = np.asarray(cells, dtype=np.float64).reshape(-1, 2)
+        k = self.neighbors
+        distances, indices = self.tree.query(cells, k, workers=-1)
+        distances, indices = distances.reshape(len(cells), k), indices.reshape(len(cells), k)
+
+        # Group the cells by neighbour set (exact match of the sorted indices as raw bytes)
+        order = np.argsort(indices, axis=1)
+        indices = np.ascontiguousarray(np.take_along_axis(indices, order, axis=1), dtype=np.int64)
+        distances = np.take_along_axis(distances, order, axis=1)
+        _, first, group = np.unique(indices.view(np.dtype((np.void, 8 * k))).ravel(),
+                                    return_index=True, return_inverse=True)
+        group = group.ravel()
+        sets = indices[first]
+
+        estimate = np.empty(len(cells))
+        variance = np.empty(len(cells)) if self.method == "kriging" else None
+        cell_order = np.argsort(group, kind="stable")
+        starts = np.searchsorted(group[cell_order], np.arange(0, len(sets) + GROUP_CHUNK, GROUP_CHUNK))
+        for chunk, start in enumerate(range(0, len(sets), GROUP_CHUNK)):
+            chunk_sets = sets[start:start + GROUP_CHUNK]
+            chunk_cells = cell_order[starts[chunk]:starts[chunk + 1]]
+            local_group = group[chunk_cells] - start
+            if self.method == "kriging":
+                values, var = self._krige(chunk_sets, local_group, distances[chunk_cells])
+                variance[chunk_cells] = var
+            else:
+                values = self._rbf(chunk_sets, local_group, distances[chunk_cells], cells[chunk_cells])
+            estimate[chunk_cells] = values
+        return estimate, variance
+
+    def _system(self, sets: np.ndarray, extra: int) -> np.ndarray:
+        """(G, k + extra, k + extra) matrices with the kernel between the points of each set in the top-left block."""
+        k = sets.shape[1]
+        coords = self.points[sets]
+        pairwise = np.linalg.norm(coords[:, :, None, :] - coords[:, None, :, :], axis=-1)
+        matrices = np.zeros((len(sets), k + extra, k + extra))
+        matrices[:, :k, :k] = self._kernel(pairwise)
+        return matrices
+
+    def _rbf(self, sets: np.ndarray, group: np.ndarray, distances: np.ndarray, cells: np.ndarray) -> np.ndarray:
+        """Thin plate spline with a linear polynomial (in coordinates centred on each set)."""
+        k = sets.shape[1]
+        coords = self.points[sets]
+        centers = coords.mean(axis=1)
+        matrices = self._system(sets, 3)
+        polynomial = np.concatenate([np.ones((len(sets), k, 1)), coords - centers[:, None, :]], axis=2)
+        matrices[:, :k, k:] = polynomial
+        matrices[:, k:, :k] = polynomial.transpose(0, 2, 1)
+        rhs = np.zeros((len(sets), k + 3, 1))
+        rhs[:, :k, 0] = self.values[sets]
+        coefficients = _solve(matrices, rhs)[:, :, 0]
+
+        estimate = np.empty(len(group))
+        for start in range(0, len(group), CELL_CHUNK):
+            part = slice(start, start + CELL_CHUNK)
+            c = coefficients[group[part]]
+            offset = cells[part] - centers[group[part]]
+            estimate[part] = ((thin_plate(distances[part]) * c[:, :k]).sum(axis=1)
+                              + c[:, k] + offset[:, 0] * c[:, k + 1] + offset[:, 1] * c[:, k + 2])
+        return estimate
+
+    def _krige(self, sets: np.ndarray, group: np.ndarray, distances: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Ordinary kriging in dual form: with A = [[Γ, 1], [1ᵀ, 0]] and r = [γ(cell), 1],
+        the estimate is rᵀ A⁻¹ [z, 0] and the variance rᵀ A⁻¹ r.
+        """
+        k = sets.shape[1]
+        matrices = self._system(sets, 1)
+        matrices[:, :k, k] = 1.0
+        matrices[:, k, :k] = 1.0
+        inverses = _inverse(matrices)
+        data = np.zeros((len(sets), k + 1))
+        data[:, :k] = self.values[sets]
+        weights = np.einsum("gij,gj->gi", inverses, data)
+
+        # Gathering one inverse per cell is (cells, k+1, k+1): evaluate in slices of CELL_CHUNK cells
+        estimate = np.empty(len(group))
+        variance = np.empty(len(group))
+        for start in range(0, len(group), CELL_CHUNK):
+            part = slice(start, start + CELL_CHUNK)
+            cell_group = group[part]
+            rhs = np.empty((len(cell_group), k + 1))
+            rhs[:, :k] = self._kernel(distances[part])
+            rhs[:, k] = 1.0
+            estimate[part] = np.einsum("ni,ni->n", rhs, weights[cell_group])
+            variance[part] = np.einsum("ni,nij,nj->n", rhs, inverses[cell_group], rhs)
+        return estimate, np.maximum(variance, 0.0)
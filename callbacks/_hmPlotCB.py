@@ -5,16 +5,19 @@ import threading
 import numpy as np
 import dearpygui.dearpygui as dpg
 from rich import print
-from config import get_preference, save_preference
+from config import get_preference, save_preference, get_config
+from ._imageBuffer import ImageBuffer
+from ._hardness import statistics
+from ._uiDispatcher import get_ui_dispatcher
+from ._hmInterpolation import get_interpolation_cache
 
 try:
     import plotly.graph_objects as go
     import plotly.io as pio
-    from scipy.interpolate import griddata
     PLOTLY_AVAILABLE = True
 except ImportError:
     PLOTLY_AVAILABLE = False
-    print("[yellow]plotly/scipy no disponibles. Instale con: pip install plotly scipy[/yellow]")
+    print("[yellow]plotly no disponible. Instale con: pip install plotly[/yellow]")
 
 try:
     import matplotlib
@@ -26,6 +29,11 @@ except ImportError:
     print("[yellow]matplotlib no disponible. Instale con: pip install matplotlib[/yellow]")
 
 
+PREVIEW_RESOLUTION = 64  # Grid of the preview shown before the full-resolution local heat map
+PREVIEW_NEIGHBORS = 8  # Nearest points per cell for rbf/kriging previews (about 3x cheaper than 16)
+REFRESH_DELAY = 0.2  # Seconds without setting changes before the local heat map is regenerated
+
+
 class HMPlotCB:
     def __init__(self, callbacks) -> None:
         self.callbacks = callbacks  # Reference to main callbacks to access data table
@@ -34,13 +42,21 @@ class HMPlotCB:
         self.show_points = False
         self.show_lines = False  # Show contour lines
         self.show_surface_overlay = False  # Show surface image overlay
+        self.show_variance = False  # Show the kriging variance as a second map
         self.grid_resolution = 500  # Grid resolution for interpolation
+        self.grid_padding = 0.1  # Margin around the points, as a fraction of their extent
+        self.neighbors = get_config()['HeatMap']['neighbors']  # Nearest points per cell for rbf/kriging
+        self.interpolation_cache = get_interpolation_cache()  # Grids reused while only cosmetic options change
         self.contour_levels = 40  # Number of contour levels
         self.figure_scale = get_preference("heatmap_figure_scale", default=1.0)  # Figure size multiplier
         self.last_figure = None
         self.heatmap_texture = None
         self.last_heatmap_image_path = None  # Store path to last generated heatmap image
         self.surface_texture = None  # Texture for surface image overlay
+        self.variance_texture = None  # Texture for the kriging variance map
+        self.ui = get_ui_dispatcher()  # Generation threads post their UI changes here
+        self.generation = 0  # Incremented per local heat map request; older passes stop when it changes
+        self._render_lock = threading.Lock()  # Full-resolution renders run one at a time (pyplot is not thread-safe)
 
     def _hide_progress(self):
         """Hide progress bar and text."""
@@ -49,8 +65,27 @@ class HMPlotCB:
         if dpg.does_item_exist("hm_progress_text"):
             dpg.configure_item("hm_progress_text", show=False)
 
-    def _prepare_data(self):
-        """Helper to prepare data for plotting."""
+    def _set_progress(self, value):
+        """Move the progress bar (render thread; workers post it through self.ui)."""
+        if dpg.does_item_exist("hm_progress_bar"):
+            dpg.set_value("hm_progress_bar", value)
+
+    def _set_info_text(self, text):
+        if dpg.does_item_exist("hm_plot_info_text"):
+            dpg.set_value("hm_plot_info_text", text)
+
+    def _finish_progress(self):
+        """Fill the progress bar and hide it half a second later (callable from any thread)."""
+        self.ui.post(self._set_progress, 1.0)
+        self.ui.post_later(0.5, self._hide_progress)
+
+    def _prepare_data(self, resolution=None, neighbors=None):
+        """
+        Helper to prepare data for plotting (runs in the generation threads; UI changes are posted).
+        ``resolution`` and ``neighbors`` override grid_resolution and self.neighbors (coarse previews).
+        """
+        resolution = resolution or self.grid_resolution
+        neighbors = neighbors or self.neighbors
         if not hasattr(self.callbacks, 'dataTable'):
             print("[red]Data Table callback no disponible[/red]")
             return None
@@ -59,8 +94,7 @@ class HMPlotCB:
         
         if len(table_data) == 0:
             print("[yellow]No hay datos en la tabla para generar el mapa de calor[/yellow]")
-            if dpg.does_item_exist("hm_plot_info_text"):
-                dpg.set_value("hm_plot_info_text", "No hay datos disponibles. Agregue puntos en la Tabla.")
+            self.ui.post(self._set_info_text, "No hay datos disponibles. Agregue puntos en la Tabla.")
             return None
         
         # Filter points with HV values
@@ -68,8 +102,7 @@ class HMPlotCB:
         
         if len(points_with_hv) < 3:
             print(f"[yellow]Se necesitan al menos 3 puntos con valores HV. Actuales: {len(points_with_hv)}[/yellow]")
-            if dpg.does_item_exist("hm_plot_info_text"):
-                dpg.set_value("hm_plot_info_text", f"Se necesitan al menos 3 puntos con HV. Actuales: {len(points_with_hv)}")
+            self.ui.post(self._set_info_text, f"Se necesitan al menos 3 puntos con HV. Actuales: {len(points_with_hv)}")
             return None
         
         print(f"[green]Generando mapa de calor con {len(points_with_hv)} puntos...[/green]")
@@ -79,38 +112,25 @@ class HMPlotCB:
         y_data = np.array([p[1] for p in points_with_hv])
         z_data = np.array([p[2] for p in points_with_hv])
         
-        # Create grid for interpolation
-        x_min, x_max = x_data.min(), x_data.max()
-        y_min, y_max = y_data.min(), y_data.max()
-        
-        # Add padding
-        x_range = x_max - x_min
-        y_range = y_max - y_min
-        padding = 0.1
-        x_min -= x_range * padding
-        x_max += x_range * padding
-        y_min -= y_range * padding
-        y_max += y_range * padding
-        
-        # Create grid
-        xi = np.linspace(x_min, x_max, self.grid_resolution)
-        yi = np.linspace(y_min, y_max, self.grid_resolution)
-        xi_grid, yi_grid = np.meshgrid(xi, yi)
-        
-        # Interpolate
-        method = self.interpolation if self.interpolation != 'linear' else 'linear'
-        zi_grid = griddata((x_data, y_data), z_data, (xi_grid, yi_grid), method=method)
+        # Interpolate on the padded grid (memoized: cosmetic changes reuse the previous grid)
+        started = time.perf_counter()
+        hits = self.interpolation_cache.hits
+        grid = self.interpolation_cache.get(x_data, y_data, z_data, self.interpolation,
+                                            resolution, self.grid_padding, neighbors)
+        partial = f", {grid['updated_cells']} celdas recalculadas" if self.interpolation_cache.hits == hits else ""
+        print(f"[cyan]Interpolación {self.interpolation} {resolution}x{resolution}: "
+              f"{time.perf_counter() - started:.3f} s (caché: {self.interpolation_cache.hits} aciertos{partial})[/cyan]")
 
         return {
             'x_data': x_data, 'y_data': y_data, 'z_data': z_data,
-            'xi': xi, 'yi': yi, 'zi_grid': zi_grid,
-            'bounds': (x_min, x_max, y_min, y_max)
+            'xi': grid['xi'], 'yi': grid['yi'], 'zi_grid': grid['zi_grid'],
+            'variance_grid': grid['variance_grid'], 'bounds': grid['bounds']
         }
 
     def generateWebHeatMap(self, sender=None, app_data=None):
         """Generate heat map visualization in browser using Plotly."""
         if not PLOTLY_AVAILABLE:
-            print("[red]plotly/scipy no disponibles[/red]")
+            print("[red]plotly no disponible[/red]")
             return
 
         # Show progress bar
@@ -128,21 +148,18 @@ class HMPlotCB:
         """Thread function for web heat map generation."""
         try:
             # Update progress
-            if dpg.does_item_exist("hm_progress_bar"):
-                dpg.set_value("hm_progress_bar", 0.1)
+            self.ui.post(self._set_progress, 0.1)
             
             data = self._prepare_data()
             if not data:
-                self._hide_progress()
+                self.ui.post(self._hide_progress)
                 return
             
             # Update progress
-            if dpg.does_item_exist("hm_progress_bar"):
-                dpg.set_value("hm_progress_bar", 0.3)
+            self.ui.post(self._set_progress, 0.3)
 
             # Update progress
-            if dpg.does_item_exist("hm_progress_bar"):
-                dpg.set_value("hm_progress_bar", 0.5)
+            self.ui.post(self._set_progress, 0.5)
             
             # Create Plotly figure
             fig = go.Figure()
@@ -188,8 +205,7 @@ class HMPlotCB:
                 ))
             
             # Update progress
-            if dpg.does_item_exist("hm_progress_bar"):
-                dpg.set_value("hm_progress_bar", 0.7)
+            self.ui.post(self._set_progress, 0.7)
         
             # Update layout
             fig.update_layout(
@@ -206,31 +222,30 @@ class HMPlotCB:
             )
             
             # Update progress
-            if dpg.does_item_exist("hm_progress_bar"):
-                dpg.set_value("hm_progress_bar", 0.9)
+            self.ui.post(self._set_progress, 0.9)
             
-            self.last_figure = fig
+            with self._render_lock:
+                self._keepFigure(fig)
             fig.show() # <-- ¡Esto inicia el servidor y abre el navegador!
             
-            if dpg.does_item_exist("hm_plot_info_text"):
-                self._update_info_text(data['z_data'], len(data['x_data']))
-                current_text = dpg.get_value("hm_plot_info_text")
-                dpg.set_value("hm_plot_info_text", current_text + "\n\nEl gráfico interactivo se ha abierto en su navegador web.")
-            
-            if dpg.does_item_exist("hm_plot_placeholder"):
-                dpg.set_value("hm_plot_placeholder", "El gráfico interactivo se está mostrando en una ventana externa (navegador).")
-            
-            # Update progress to complete
-            if dpg.does_item_exist("hm_progress_bar"):
-                dpg.set_value("hm_progress_bar", 1.0)
+            self.ui.post(self._showWebHeatMapInfo, data['z_data'], len(data['x_data']))
             
-            # Hide progress after delay
-            time.sleep(0.5)
-            self._hide_progress()
+            # Complete the progress bar and hide it after a delay
+            self._finish_progress()
         
         except Exception as e:
             print(f"[red]Error generando mapa web: {e}[/red]")
-            self._hide_progress()
+            self.ui.post(self._hide_progress)
+
+    def _showWebHeatMapInfo(self, z_data, num_points):
+        """Report the heat map opened in the browser (render thread)."""
+        if dpg.does_item_exist("hm_plot_info_text"):
+            self._update_info_text(z_data, num_points)
+            current_text = dpg.get_value("hm_plot_info_text")
+            dpg.set_value("hm_plot_info_text", current_text + "\n\nEl gráfico interactivo se ha abierto en su navegador web.")
+        
+        if dpg.does_item_exist("hm_plot_placeholder"):
+            dpg.set_value("hm_plot_placeholder", "El gráfico interactivo se está mostrando en una ventana externa (navegador).")
 
     def generateLocalHeatMap(self, sender=None, app_data=None):
         """Generate heat map visualization inside Dear PyGui using Matplotlib."""
@@ -245,219 +260,330 @@ class HMPlotCB:
         if dpg.does_item_exist("hm_progress_text"):
             dpg.configure_item("hm_progress_text", show=True)
         
-        # Run generation in thread
-        thread = threading.Thread(target=self._generateLocalHeatMapThread)
+        # Read checkbox state at generation time
+        if dpg.does_item_exist("hm_show_overlay_checkbox"):
+            self.show_surface_overlay = dpg.get_value("hm_show_overlay_checkbox")
+            print(f"[cyan]Estado del overlay al generar: {self.show_surface_overlay}[/cyan]")
+        
+        # Run generation in thread; starting a new one makes the passes in progress stale
+        self.generation += 1
+        thread = threading.Thread(target=self._generateLocalHeatMapThread, args=(self.generation,))
         thread.start()
     
-    def _generateLocalHeatMapThread(self):
-        """Thread function for local heat map generation."""
+    def _isStale(self, generation):
+        """True if a newer local heat map was requested after ``generation`` started."""
+        return generation != self.generation
+    
+    def _generateLocalHeatMapThread(self, generation):
+        """
+        Thread function for local heat map generation.
+        First posts a PREVIEW_RESOLUTION² preview coloured directly from the grid
+        (tens of milliseconds), then renders the full map. Textures and plot items
+        are created on the render thread by _showLocalHeatMap.
+        """
         try:
-            # Read checkbox state at generation time
-            if dpg.does_item_exist("hm_show_overlay_checkbox"):
-                self.show_surface_overlay = dpg.get_value("hm_show_overlay_checkbox")
-                print(f"[cyan]Estado del overlay al generar: {self.show_surface_overlay}[/cyan]")
-            
             # Update progress
-            if dpg.does_item_exist("hm_progress_bar"):
-                dpg.set_value("hm_progress_bar", 0.1)
+            self.ui.post(self._set_progress, 0.1)
             
-            data = self._prepare_data()
-            if not data:
-                self._hide_progress()
+            preview = self._prepare_data(PREVIEW_RESOLUTION, min(self.neighbors, PREVIEW_NEIGHBORS))
+            if not preview:
+                self.ui.post(self._hide_progress)
                 return
+            self.ui.post(self._showLocalHeatMap, preview, self._renderPreview(preview), None, None, generation)
             
-            # Update progress
-            if dpg.does_item_exist("hm_progress_bar"):
-                dpg.set_value("hm_progress_bar", 0.3)
-            
-            # Update progress
-            if dpg.does_item_exist("hm_progress_bar"):
-                dpg.set_value("hm_progress_bar", 0.5)
-            
-            x_min, x_max, y_min, y_max = data['bounds']
-            width_data = x_max - x_min
-            height_data = y_max - y_min
-            aspect_ratio = height_data / width_data
-            
-            # Create matplotlib figure with high DPI for better resolution
-            # Set figure size to match aspect ratio to avoid distortion when filling axes
-            base_width = 10
-            fig_width = base_width
-            fig_height = base_width * aspect_ratio
-            
-            # Use transparent background if overlay is enabled
-            fig_bg = 'none' if self.show_surface_overlay else 'white'
-            fig, ax = plt.subplots(figsize=(fig_width, fig_height), dpi=300, facecolor=fig_bg)
-            
-            # Ensure axes fill the figure completely
-            fig.subplots_adjust(left=0, right=1, top=1, bottom=0)
-            ax.set_xlim(x_min, x_max)
-            ax.set_ylim(y_min, y_max)
-            ax.axis('off')
-            ax.patch.set_alpha(0.0 if self.show_surface_overlay else 1.0)
-            
-            # Plot filled contours with transparency if overlay is enabled
-            # Map plotly colorscale names to matplotlib colormaps if possible
-            cmap = self.colorscale.lower()
-            if cmap == 'bluered': cmap = 'coolwarm' # Approximation
-            
-            # Adjust alpha based on overlay mode
-            contour_alpha = 0.5 if self.show_surface_overlay else 1.0
-            
-            try:
-                im = ax.contourf(data['xi'], data['yi'], data['zi_grid'], levels=self.contour_levels, cmap=cmap, alpha=contour_alpha)
-            except ValueError:
-                # Fallback if colormap not found
-                im = ax.contourf(data['xi'], data['yi'], data['zi_grid'], levels=self.contour_levels, cmap='viridis', alpha=contour_alpha)
-            
-            # Optionally add contour lines
-            if self.show_lines:
-                ax.contour(data['xi'], data['yi'], data['zi_grid'], levels=self.contour_levels, colors='black', linewidths=0.5, alpha=0.5)
-            
-            # Add points and labels directly to the matplotlib plot
-            if self.show_points:
-                ax.scatter(data['x_data'], data['y_data'], c='black', s=40, edgecolors='white', linewidths=1, zorder=10)
-                for i, (x, y, z) in enumerate(zip(data['x_data'], data['y_data'], data['z_data'])):
-                    ax.annotate(f"P{i+1}\n{z:.1f}HV", (x, y), 
-                               xytext=(0, 8), textcoords='offset points', 
-                               ha='center', va='bottom',
-                               fontsize=7, color='black', fontweight='bold',
-                               bbox=dict(boxstyle='round,pad=0.1', fc='white', alpha=0.3, ec='none')
-                    )
+            # One full render at a time (pyplot is not thread-safe); passes made stale while waiting stop here
+            with self._render_lock:
+                if not self._isStale(generation):
+                    self._renderLocalHeatMap(generation)
+        
+        except Exception as e:
+            print(f"[red]Error generando mapa local: {e}[/red]")
+            self.ui.post(self._set_info_text, f"Error generando mapa local: {e}")
+            self.ui.post(self._hide_progress)
+    
+    def _renderPreview(self, data):
+        """Colour a coarse grid into an ImageBuffer with the contour levels of the full map, without matplotlib figures."""
+        zi_grid = data['zi_grid']
+        valid = np.isfinite(zi_grid)
+        levels = np.linspace(np.nanmin(zi_grid), np.nanmax(zi_grid), self.contour_levels + 1)
+        bands = np.clip(np.digitize(np.where(valid, zi_grid, levels[0]), levels) - 1, 0, self.contour_levels - 1)
+        rgba = plt.get_cmap(self._colormap(), self.contour_levels)(bands)
+        rgba[..., 3] = np.where(valid, 0.5 if self.show_surface_overlay else 1.0, 0.0)
+        return ImageBuffer.from_array((rgba[::-1] * 255).astype(np.uint8))  # Row 0 of the grid is y_min
+    
+    def _colormap(self):
+        """Matplotlib colormap name for the current colour scale."""
+        cmap = self.colorscale.lower()
+        if cmap == 'bluered': cmap = 'coolwarm' # Approximation
+        return cmap if cmap in matplotlib.colormaps else 'viridis'
+    
+    def _renderLocalHeatMap(self, generation):
+        """Full-resolution pass of _generateLocalHeatMapThread (holds the render lock)."""
+        data = self._prepare_data()
+        if not data or self._isStale(generation):
+            return
+        
+        # Update progress
+        self.ui.post(self._set_progress, 0.3)
+        
+        # Update progress
+        self.ui.post(self._set_progress, 0.5)
+        
+        x_min, x_max, y_min, y_max = data['bounds']
+        width_data = x_max - x_min
+        height_data = y_max - y_min
+        aspect_ratio = height_data / width_data
+        
+        # Create matplotlib figure with high DPI for better resolution
+        # Set figure size to match aspect ratio to avoid distortion when filling axes
+        base_width = 10
+        fig_width = base_width
+        fig_height = base_width * aspect_ratio
+        
+        # Use transparent background if overlay is enabled
+        fig_bg = 'none' if self.show_surface_overlay else 'white'
+        fig, ax = plt.subplots(figsize=(fig_width, fig_height), dpi=300, facecolor=fig_bg)
+        
+        # Ensure axes fill the figure completely
+        fig.subplots_adjust(left=0, right=1, top=1, bottom=0)
+        ax.set_xlim(x_min, x_max)
+        ax.set_ylim(y_min, y_max)
+        ax.axis('off')
+        ax.patch.set_alpha(0.0 if self.show_surface_overlay else 1.0)
+        
+        # Plot filled contours with transparency if overlay is enabled
+        # Map plotly colorscale names to matplotlib colormaps if possible
+        cmap = self._colormap()
+        
+        # Adjust alpha based on overlay mode
+        contour_alpha = 0.5 if self.show_surface_overlay else 1.0
+        
+        im = ax.contourf(data['xi'], data['yi'], data['zi_grid'], levels=self.contour_levels, cmap=cmap, alpha=contour_alpha)
+        
+        # Optionally add contour lines
+        if self.show_lines:
+            ax.contour(data['xi'], data['yi'], data['zi_grid'], levels=self.contour_levels, colors='black', linewidths=0.5, alpha=0.5)
+        
+        # Add points and labels directly to the matplotlib plot
+        if self.show_points:
+            ax.scatter(data['x_data'], data['y_data'], c='black', s=40, edgecolors='white', linewidths=1, zorder=10)
+            for i, (x, y, z) in enumerate(zip(data['x_data'], data['y_data'], data['z_data'])):
+                ax.annotate(f"P{i+1}\n{z:.1f}HV", (x, y), 
+                           xytext=(0, 8), textcoords='offset points', 
+                           ha='center', va='bottom',
+                           fontsize=7, color='black', fontweight='bold',
+                           bbox=dict(boxstyle='round,pad=0.1', fc='white', alpha=0.3, ec='none')
+                )
+
+        # Rasterizing at 300 dpi is the slow part: skip it if the settings changed meanwhile
+        if self._isStale(generation):
+            plt.close(fig)
+            return
 
-            # Save to buffer
-            buf = io.BytesIO()
-            plt.savefig(buf, format='png', transparent=True)
+        # Save to buffer
+        buf = io.BytesIO()
+        plt.savefig(buf, format='png', transparent=True)
+        buf.seek(0)
+        if self._isStale(generation):
+            plt.close(fig)
+            return
+        
+        # Save to project maps folder
+        from config import get_preference
+        last_project_folder = get_preference("last_project_folder", default=".")
+        maps_folder = os.path.join(last_project_folder, "maps")
+        os.makedirs(maps_folder, exist_ok=True)
+        project_heatmap_path = os.path.join(maps_folder, "heatmap.png")
+        fig.savefig(project_heatmap_path, format='png', transparent=False, facecolor='white', bbox_inches='tight', dpi=300)
+        self.last_heatmap_image_path = project_heatmap_path
+        print(f"[cyan]Mapa de calor guardado en: {project_heatmap_path}[/cyan]")
+        
+        # Keep the figure for export; the previous one is closed (regenerated on every settings change)
+        self._keepFigure(fig)
+        
+        from PIL import Image
+        img = Image.open(buf)
+        
+        # Convert RGBA to a float32 buffer normalized to 0-1
+        heatmap_buffer = ImageBuffer.from_array(np.asarray(img.convert('RGBA')))
+        
+        # Decode the surface image here too, so the render thread only uploads textures
+        surface = self._loadSurfaceOverlay() if self.show_surface_overlay else None
+        
+        # Kriging variance as a second map
+        variance_buffer = None
+        if self.show_variance:
+            if data['variance_grid'] is not None:
+                variance_buffer = self._renderVarianceMap(data, maps_folder)
+            else:
+                print("[yellow]La varianza solo está disponible con interpolación kriging[/yellow]")
+        
+        # Update progress
+        self.ui.post(self._set_progress, 0.8)
+        
+        self.ui.post(self._showLocalHeatMap, data, heatmap_buffer, surface, variance_buffer, generation)
+        
+        # Complete the progress bar and hide it after a delay
+        self._finish_progress()
+
+    def _keepFigure(self, fig):
+        """Store ``fig`` for export, closing the previous matplotlib figure (call with the render lock held)."""
+        if MATPLOTLIB_AVAILABLE and isinstance(self.last_figure, plt.Figure) and self.last_figure is not fig:
+            plt.close(self.last_figure)
+        self.last_figure = fig
+
+    def _renderVarianceMap(self, data, maps_folder):
+        """
+        Render the kriging prediction variance as a standard deviation map (generation thread).
+        Saves it next to the heat map and returns it as an ImageBuffer.
+        """
+        x_min, x_max, y_min, y_max = data['bounds']
+        fig, ax = plt.subplots(figsize=(10, 10 * (y_max - y_min) / (x_max - x_min)), dpi=150)
+        fig.subplots_adjust(left=0, right=1, top=1, bottom=0)
+        ax.set_xlim(x_min, x_max)
+        ax.set_ylim(y_min, y_max)
+        ax.axis('off')
+        ax.contourf(data['xi'], data['yi'], np.sqrt(data['variance_grid']), levels=self.contour_levels, cmap='magma')
+        ax.scatter(data['x_data'], data['y_data'], c='white', s=6, linewidths=0, zorder=10)
+
+        buf = io.BytesIO()
+        variance_path = os.path.join(maps_folder, "heatmap_variance.png")
+        try:
+            fig.savefig(buf, format='png')
             buf.seek(0)
-            
-            # Save to project maps folder
-            from config import get_preference
-            last_project_folder = get_preference("last_project_folder", default=".")
-            maps_folder = os.path.join(last_project_folder, "maps")
-            os.makedirs(maps_folder, exist_ok=True)
-            project_heatmap_path = os.path.join(maps_folder, "heatmap.png")
-            fig.savefig(project_heatmap_path, format='png', transparent=False, facecolor='white', bbox_inches='tight', dpi=300)
-            self.last_heatmap_image_path = project_heatmap_path
-            print(f"[cyan]Mapa de calor guardado en: {project_heatmap_path}[/cyan]")
-            
-            # Store figure for export (keep reference before closing)
-            self.last_figure = fig
-            
-            # Don't close fig immediately, keep it for export
-            # plt.close(fig)
-            
-            from PIL import Image
-            img = Image.open(buf)
-            img_array = np.array(img)
-            
-            # Convert RGBA to flat array normalized to 0-1
-            height, width = img_array.shape[:2]
-            img_flat = (img_array.flatten() / 255.0).tolist()
-            
-            # Delete old texture if exists
-            if self.heatmap_texture and dpg.does_item_exist(self.heatmap_texture):
-                dpg.delete_item(self.heatmap_texture)
-                self.heatmap_texture = None
-            
-            # Create texture with unique tag
-            import time
-            texture_tag = f"hm_texture_{int(time.time() * 1000000)}"
+            fig.savefig(variance_path, format='png', facecolor='white', bbox_inches='tight', dpi=300)
+        finally:
+            plt.close(fig)
+        print(f"[cyan]Mapa de varianza guardado en: {variance_path}[/cyan]")
+
+        from PIL import Image
+        return ImageBuffer.from_array(np.asarray(Image.open(buf).convert('RGBA')))
+
+    def _loadSurfaceOverlay(self):
+        """
+        Surface image and its bounds in mm for the local heat map overlay, or None.
+        Runs in the generation thread (may decode or downscale the image).
+        """
+        if not hasattr(self.callbacks, 'heatMap'):
+            return None
+        try:
+            surface_image_path = self.callbacks.heatMap.current_image_path
+            if not surface_image_path or not os.path.exists(surface_image_path):
+                print(f"[yellow]No se encontró imagen de superficie: {surface_image_path}[/yellow]")
+                return None
+            
+            print(f"[cyan]Cargando imagen de superficie: {surface_image_path}[/cyan]")
+            # Load surface image (downscaled overview for tiled images) and get its bounds
+            surface_buffer = self.callbacks.heatMap.surfaceOverview()
+            surf_width = self.callbacks.heatMap.image_width or surface_buffer.width
+            surf_height = self.callbacks.heatMap.image_height or surface_buffer.height
+            
+            # Get calibration and origin offset from heatMap
+            calibration = get_preference("heatmap_calibration", default=0.001)  # mm/pixel
+            origin_offset = self.callbacks.heatMap.origin_offset  # [x_offset, y_offset] in mm
+            
+            print(f"[cyan]Calibración: {calibration} mm/px, Origen: {origin_offset}[/cyan]")
+            
+            # Calculate bounds of surface image in mm coordinates
+            # The origin_offset shifts the coordinate system, so we need to subtract it
+            # from the image position (same logic as in _heatMapCB.py updateImageBounds)
+            surf_x_min = -origin_offset[0]
+            surf_y_min = -origin_offset[1]
+            surf_x_max = surf_x_min + surf_width * calibration
+            surf_y_max = surf_y_min + surf_height * calibration
+            
+            print(f"[cyan]Límites superficie: X[{surf_x_min:.2f}, {surf_x_max:.2f}] Y[{surf_y_min:.2f}, {surf_y_max:.2f}][/cyan]")
+            return surface_buffer, (surf_x_min, surf_y_min, surf_x_max, surf_y_max)
+        except Exception as surf_error:
+            print(f"[yellow]Error cargando imagen de superficie: {surf_error}[/yellow]")
+            import traceback
+            traceback.print_exc()
+            return None
+
+    def _showLocalHeatMap(self, data, heatmap_buffer, surface=None, variance_buffer=None, generation=None):
+        """
+        Create the textures and the plot of a generated local heat map (render thread).
+        Results of a stale ``generation`` (a newer map was requested) are dropped.
+        """
+        if generation is not None and self._isStale(generation):
+            return
+        x_min, x_max, y_min, y_max = data['bounds']
+        height, width = heatmap_buffer.height, heatmap_buffer.width
+        
+        # Delete old texture if exists
+        if self.heatmap_texture and dpg.does_item_exist(self.heatmap_texture):
+            dpg.delete_item(self.heatmap_texture)
+            self.heatmap_texture = None
+        
+        # Create texture with unique tag
+        texture_tag = f"hm_texture_{int(time.time() * 1000000)}"
+        with dpg.texture_registry():
+            self.heatmap_texture = dpg.add_static_texture(width, height, heatmap_buffer.texture_data(), tag=texture_tag)
+        
+        # Clear previous plot/image
+        dpg.delete_item("HMPlotDisplayChild", children_only=True)
+        
+        # With the variance map, both plots share the panel with linked axes
+        plot_parent = "HMPlotDisplayChild"
+        if variance_buffer is not None:
+            plot_parent = dpg.add_subplots(2, 1, parent="HMPlotDisplayChild", width=-1, height=-1,
+                                           link_all_x=True, link_all_y=True)
+        
+        # Create Plot
+        with dpg.plot(parent=plot_parent, label="Mapa de Calor Local (Matplotlib)", height=-1, width=-1, equal_aspects=True):
+            dpg.add_plot_legend()
+            dpg.add_plot_axis(dpg.mvXAxis, label="X (mm)")
+            with dpg.plot_axis(dpg.mvYAxis, label="Y (mm)"):
+                # Add surface image overlay if enabled
+                if surface is not None:
+                    surface_buffer, (surf_x_min, surf_y_min, surf_x_max, surf_y_max) = surface
+                    surf_height_px, surf_width_px = surface_buffer.height, surface_buffer.width
+                    
+                    # Delete old surface texture if exists
+                    if self.surface_texture and dpg.does_item_exist(self.surface_texture):
+                        dpg.delete_item(self.surface_texture)
+                        self.surface_texture = None
+                    
+                    # Create texture
+                    surf_texture_tag = f"surface_texture_{int(time.time() * 1000000)}"
+                    with dpg.texture_registry():
+                        self.surface_texture = dpg.add_static_texture(surf_width_px, surf_height_px, surface_buffer.texture_data(), tag=surf_texture_tag)
+                    
+                    print(f"[green]Textura de superficie creada: {surf_width_px}x{surf_height_px}[/green]")
+                    
+                    # Add surface image with lower opacity
+                    dpg.add_image_series(self.surface_texture, [surf_x_min, surf_y_min], [surf_x_max, surf_y_max], 
+                                       label="Imagen de Superficie", uv_min=(0, 1), uv_max=(1, 0))
+                    print(f"[green]Imagen de superficie agregada al plot[/green]")
+                
+                # Add the heatmap image series on top
+                dpg.add_image_series(self.heatmap_texture, [x_min, y_min], [x_max, y_max], label="Mapa de Calor")
+        
+        if self.variance_texture and dpg.does_item_exist(self.variance_texture):
+            dpg.delete_item(self.variance_texture)
+            self.variance_texture = None
+        if variance_buffer is not None:
             with dpg.texture_registry():
-                self.heatmap_texture = dpg.add_static_texture(width, height, img_flat, tag=texture_tag)
-            
-            # Update progress
-            if dpg.does_item_exist("hm_progress_bar"):
-                dpg.set_value("hm_progress_bar", 0.8)
-            
-            # Clear previous plot/image
-            dpg.delete_item("HMPlotDisplayChild", children_only=True)
-            
-            # Create Plot
-            with dpg.plot(parent="HMPlotDisplayChild", label="Mapa de Calor Local (Matplotlib)", height=-1, width=-1, equal_aspects=True):
+                self.variance_texture = dpg.add_static_texture(variance_buffer.width, variance_buffer.height,
+                                                               variance_buffer.texture_data(),
+                                                               tag=f"hm_variance_texture_{int(time.time() * 1000000)}")
+            with dpg.plot(parent=plot_parent, label="Desviación Estándar de Kriging (HV)", height=-1, width=-1, equal_aspects=True):
                 dpg.add_plot_legend()
                 dpg.add_plot_axis(dpg.mvXAxis, label="X (mm)")
-                with dpg.plot_axis(dpg.mvYAxis, label="Y (mm)") as y_axis:
-                    # Add surface image overlay if enabled
-                    if self.show_surface_overlay and hasattr(self.callbacks, 'heatMap'):
-                        try:
-                            surface_image_path = self.callbacks.heatMap.current_image_path
-                            if surface_image_path and os.path.exists(surface_image_path):
-                                print(f"[cyan]Cargando imagen de superficie: {surface_image_path}[/cyan]")
-                                # Load surface image and get its bounds
-                                from PIL import Image as PILImage
-                                surface_img = PILImage.open(surface_image_path)
-                                surf_width, surf_height = surface_img.size
-                                
-                                # Get calibration and origin offset from heatMap
-                                from config import get_preference
-                                calibration = get_preference("heatmap_calibration", default=0.001)  # mm/pixel
-                                origin_offset = self.callbacks.heatMap.origin_offset  # [x_offset, y_offset] in mm
-                                
-                                print(f"[cyan]Calibración: {calibration} mm/px, Origen: {origin_offset}[/cyan]")
-                                
-                                # Calculate bounds of surface image in mm coordinates
-                                # The origin_offset shifts the coordinate system, so we need to subtract it
-                                # from the image position (same logic as in _heatMapCB.py updateImageBounds)
-                                surf_x_min = -origin_offset[0]
-                                surf_y_min = -origin_offset[1]
-                                surf_x_max = surf_x_min + surf_width * calibration
-                                surf_y_max = surf_y_min + surf_height * calibration
-                                
-                                print(f"[cyan]Límites superficie: X[{surf_x_min:.2f}, {surf_x_max:.2f}] Y[{surf_y_min:.2f}, {surf_y_max:.2f}][/cyan]")
-                                
-                                # Convert surface image to texture
-                                surf_img_array = np.array(surface_img.convert('RGBA'))
-                                surf_height_px, surf_width_px = surf_img_array.shape[:2]
-                                surf_img_flat = (surf_img_array.flatten() / 255.0).tolist()
-                                
-                                # Delete old surface texture if exists
-                                if self.surface_texture and dpg.does_item_exist(self.surface_texture):
-                                    dpg.delete_item(self.surface_texture)
-                                    self.surface_texture = None
-                                
-                                # Create texture
-                                import time
-                                surf_texture_tag = f"surface_texture_{int(time.time() * 1000000)}"
-                                with dpg.texture_registry():
-                                    self.surface_texture = dpg.add_static_texture(surf_width_px, surf_height_px, surf_img_flat, tag=surf_texture_tag)
-                                
-                                print(f"[green]Textura de superficie creada: {surf_width_px}x{surf_height_px}[/green]")
-                                
-                                # Add surface image with lower opacity
-                                dpg.add_image_series(self.surface_texture, [surf_x_min, surf_y_min], [surf_x_max, surf_y_max], 
-                                                   label="Imagen de Superficie", uv_min=(0, 1), uv_max=(1, 0))
-                                print(f"[green]Imagen de superficie agregada al plot[/green]")
-                            else:
-                                print(f"[yellow]No se encontró imagen de superficie: {surface_image_path}[/yellow]")
-                        except Exception as surf_error:
-                            print(f"[yellow]Error cargando imagen de superficie: {surf_error}[/yellow]")
-                            import traceback
-                            traceback.print_exc()
-                    
-                    # Add the heatmap image series on top
-                    dpg.add_image_series(self.heatmap_texture, [x_min, y_min], [x_max, y_max], label="Mapa de Calor")
-            
-            # Update info text
-            if dpg.does_item_exist("hm_plot_info_text"):
-                self._update_info_text(data['z_data'], len(data['x_data']))
-                        
-            # Update progress to complete
-            if dpg.does_item_exist("hm_progress_bar"):
-                dpg.set_value("hm_progress_bar", 1.0)
-            
-            # Hide progress after delay
-            time.sleep(0.5)
-            self._hide_progress()
-
-        except Exception as e:
-            print(f"[red]Error generando mapa local: {e}[/red]")
-            if dpg.does_item_exist("hm_plot_info_text"):
-                dpg.set_value("hm_plot_info_text", f"Error generando mapa local: {e}")
-            self._hide_progress()
+                with dpg.plot_axis(dpg.mvYAxis, label="Y (mm)"):
+                    dpg.add_image_series(self.variance_texture, [x_min, y_min], [x_max, y_max], label="Desviación Estándar")
+        
+        # Update info text
+        if dpg.does_item_exist("hm_plot_info_text"):
+            self._update_info_text(data['z_data'], len(data['x_data']))
+            if data['variance_grid'] is not None:
+                std = np.sqrt(data['variance_grid'])
+                dpg.set_value("hm_plot_info_text", dpg.get_value("hm_plot_info_text") +
+                              f"\nDesv. kriging: media {std.mean():.1f} HV, máx {std.max():.1f} HV")
 
     def _update_info_text(self, z_data, num_points):
-        hv_min, hv_max = z_data.min(), z_data.max()
-        hv_avg = z_data.mean()
+        stats = statistics(z_data)
+        hv_min, hv_max, hv_avg = stats["min"], stats["max"], stats["mean"]
         dpg.set_value("hm_plot_info_text", 
                         f"Puntos: {num_points}\n"
                         f"HV mín: {hv_min:.1f}\n"
@@ -471,6 +597,21 @@ class HMPlotCB:
         self.generateWebHeatMap(sender, app_data)
 
 
+    def _scheduleRefresh(self):
+        """
+        Regenerate the local heat map (if one is shown) REFRESH_DELAY seconds after the last setting change.
+        The passes in progress become stale right away, so they stop at their next check.
+        """
+        if self.heatmap_texture is None:
+            return
+        self.generation += 1
+        self.ui.post_later(REFRESH_DELAY, self._refreshIfCurrent, self.generation)
+    
+    def _refreshIfCurrent(self, generation):
+        """Regenerate unless another setting changed after this refresh was scheduled (render thread)."""
+        if not self._isStale(generation):
+            self.generateLocalHeatMap()
+    
     def onColorScaleChange(self, sender, app_data):
         """Handle color scale change."""
         # Map matplotlib names to plotly if needed, or just use capitalized
@@ -486,40 +627,46 @@ class HMPlotCB:
         elif self.colorscale.lower() == 'rainbow': self.colorscale = 'Rainbow'
         
         print(f"[cyan]Escala de color cambiada a: {self.colorscale}[/cyan]")
-        # Regenerate if we have data (optional, maybe user wants to click generate)
-        # self.generateHeatMap()
+        self._scheduleRefresh()
     
     def onInterpolationChange(self, sender, app_data):
         """Handle interpolation method change."""
         self.interpolation = app_data
-        # self.generateHeatMap()
+        self._scheduleRefresh()
     
     def onShowPointsChange(self, sender, app_data):
         """Handle show points toggle."""
         self.show_points = app_data
         print(f"[cyan]Mostrar puntos: {self.show_points}[/cyan]")
-        # self.generateHeatMap()
+        self._scheduleRefresh()
     
     def onShowLinesChange(self, sender, app_data):
         """Handle show contour lines toggle."""
         self.show_lines = app_data
         print(f"[cyan]Mostrar líneas: {self.show_lines}[/cyan]")
-        # self.generateHeatMap()
+        self._scheduleRefresh()
+    
+    def onShowVarianceChange(self, sender, app_data):
+        """Handle show kriging variance toggle."""
+        self.show_variance = app_data
+        print(f"[cyan]Mostrar varianza de kriging: {self.show_variance}[/cyan]")
+        self._scheduleRefresh()
     
     def onShowSurfaceOverlayChange(self, sender, app_data):
         """Handle show surface overlay toggle."""
         self.show_surface_overlay = dpg.get_value(sender)
         print(f"[cyan]Mostrar imagen de superficie: {self.show_surface_overlay}[/cyan]")
-        # Note: Don't auto-regenerate, let user click generate button again
-        # This avoids issues with threading and losing the current map
+        self._scheduleRefresh()
     
     def onResolutionChange(self, sender, app_data):
         """Handle resolution/smoothness change."""
         self.grid_resolution = app_data
+        self._scheduleRefresh()
     
     def onLevelsChange(self, sender, app_data):
         """Handle contour levels change."""
         self.contour_levels = app_data
+        self._scheduleRefresh()
     
     def onFigureSizeChange(self, sender, app_data):
         """Handle figure size scale change."""
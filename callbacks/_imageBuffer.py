@@ -0,0 +1,123 @@
+"""
+Shared image buffer for the Vickers, Mapeado and Tabla tabs.
+
+Images are kept as a single float32 NumPy array of shape (height, width, 4)
+with RGBA values in the 0-1 range, which is the layout Dear PyGui textures
+expect. The original pixels are read-only and shared; a private copy is only
+made the first time the working image is modified (copy-on-write), and the
+flat view handed to textures never copies the data.
+"""
+
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+
+
+class ImageBuffer:
+    """Float32 RGBA image with a read-only original and a copy-on-write working copy."""
+
+    def __init__(self, pixels: np.ndarray) -> None:
+        """
+        Args:
+            pixels: float32 array of shape (height, width, 4) with values in 0-1
+        """
+        if pixels.ndim != 3 or pixels.shape[2] != 4:
+            raise ValueError(f"Se esperaba un arreglo RGBA (alto, ancho, 4), recibido {pixels.shape}")
+
+        pixels = np.ascontiguousarray(pixels, dtype=np.float32)
+        pixels.flags.writeable = False
+
+        self._original = pixels
+        self._current = pixels
+
+    @classmethod
+    def decode(cls, path: str) -> "ImageBuffer":
+        """
+        Decode an image file with Pillow.
+
+        Pillow releases the GIL while decoding, so this can be used from
+        worker threads.
+        """
+        with Image.open(path) as img:
+            return cls.from_array(np.asarray(img.convert("RGBA")))
+
+    @classmethod
+    def from_array(cls, array: np.ndarray) -> "ImageBuffer":
+        """
+        Build a buffer from an 8-bit or float array (e.g. ``np.asarray(pil_image)``).
+
+        Grayscale and RGB inputs are expanded to RGBA with an opaque alpha channel.
+        """
+        array = np.asarray(array)
+        if array.dtype == np.uint8:
+            array = array.astype(np.float32)
+            array *= np.float32(1.0 / 255.0)
+        else:
+            array = array.astype(np.float32, copy=False)
+
+        if array.ndim == 2:
+            array = np.repeat(array[:, :, None], 3, axis=2)
+        if array.shape[2] == 3:
+            alpha = np.ones(array.shape[:2] + (1,), dtype=np.float32)
+            array = np.concatenate([array, alpha], axis=2)
+
+        return cls(array)
+
+    @property
+    def width(self) -> int:
+        return self._original.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self._original.shape[0]
+
+    @property
+    def original(self) -> np.ndarray:
+        """Read-only original pixels."""
+        return self._original
+
+    @property
+    def current(self) -> np.ndarray:
+        """Working pixels (same object as ``original`` until modified)."""
+        return self._current
+
+    @property
+    def is_modified(self) -> bool:
+        return self._current is not self._original
+
+    def writable(self) -> np.ndarray:
+        """Return the working pixels for in-place edits, copying the original on first use."""
+        if self._current is self._original:
+            self._current = self._original.copy()
+        return self._current
+
+    def set_current(self, pixels: np.ndarray) -> None:
+        """Replace the working pixels with a new array of the same shape."""
+        if pixels.shape != self._original.shape:
+            raise ValueError(f"Dimensiones incompatibles: {pixels.shape} != {self._original.shape}")
+        self._current = np.ascontiguousarray(pixels, dtype=np.float32)
+
+    def reset(self) -> None:
+        """Drop any modification and point the working pixels back to the original."""
+        self._current = self._original
+
+    def texture_data(self, pixels: Optional[np.ndarray] = None) -> np.ndarray:
+        """Flat float32 view of the working pixels (or of ``pixels``) for Dear PyGui textures."""
+        if pixels is None:
+            pixels = self._current
+        return pixels.reshape(-1)
+
+    def to_pil(self) -> Image.Image:
+        """8-bit RGBA Pillow image of the working pixels."""
+        pixels = self._current * np.float32(255.0)
+        pixels += np.float32(0.5)
+        return Image.fromarray(pixels.astype(np.uint8), "RGBA")
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by this buffer (original plus private working copy, if any)."""
+        total = self._original.nbytes
+        if self.is_modified:
+            total += self._current.nbytes
+        return total
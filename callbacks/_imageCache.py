@@ -0,0 +1,160 @@
+"""
+Process-wide cache of decoded images.
+
+The Vickers viewer, the neighbour prefetcher, the data table thumbnails and
+the Mapeado/heat map code all decode the same files. ImageCache keeps the
+decoded pixels in memory, keyed by (path, modification time, file size,
+target size), and evicts the least recently used images when the total
+exceeds the MB budget set in ``[Cache] image_cache_mb`` of config.ini.
+It is safe to use from worker threads: concurrent requests for the same
+image wait for a single decode.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from config import get_config
+from ._imageBuffer import ImageBuffer
+from ._thumbnailCache import make_thumbnail
+from ._decodedStore import get_decoded_store
+
+
+CacheKey = Tuple[str, int, int, Optional[int]]  # (absolute path, mtime, file size, max size)
+
+
+def _decode(path: str, max_size: Optional[int]) -> ImageBuffer:
+    """
+    Default loader: full-resolution decode, or a downscaled one if max_size is given.
+
+    Full-resolution images come from the project's memory-mapped decoded store
+    when it is enabled.
+    """
+    if max_size is None:
+        store = get_decoded_store()
+        return store.get(path) if store is not None else ImageBuffer.decode(path)
+    return ImageBuffer.from_array(np.asarray(make_thumbnail(path, max_size)))
+
+
+class ImageCache:
+    """Thread-safe LRU of decoded ImageBuffers bounded by memory."""
+
+    def __init__(self, budget_mb: float = 1024) -> None:
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[CacheKey, ImageBuffer]" = OrderedDict()  # Most recently used last
+        self._loading: Dict[CacheKey, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(path: str, max_size: Optional[int] = None) -> Optional[CacheKey]:
+        """Cache key of an image file, or None if it does not exist."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return os.path.abspath(path), stat.st_mtime_ns, stat.st_size, max_size
+
+    def get(self, path: str, max_size: Optional[int] = None,
+            loader: Optional[Callable[[str], ImageBuffer]] = None) -> ImageBuffer:
+        """
+        Return the decoded image at ``path``, decoding it on a miss.
+
+        Args:
+            path: image file
+            max_size: fit the image in max_size x max_size (None for full resolution)
+            loader: custom decoder called with ``path`` on a miss (e.g. a disk cache)
+
+        The returned buffer shares the cached read-only pixels and has its own
+        copy-on-write working copy, so callers may filter it freely.
+
+        Raises:
+            FileNotFoundError: if ``path`` does not exist
+        """
+        key = self.key(path, max_size)
+        if key is None:
+            raise FileNotFoundError(path)
+
+        while True:
+            with self._lock:
+                if key in self._entries:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                    return ImageBuffer(self._entries[key].original)
+
+                loading = self._loading.get(key)
+                if loading is None:
+                    self._loading[key] = threading.Event()
+                    self.misses += 1
+                    break
+
+            # Another thread is decoding this image; use its result (or retry if it failed)
+            loading.wait()
+
+        image = None
+        try:
+            image = loader(path) if loader is not None else _decode(path, max_size)
+        finally:
+            with self._lock:
+                if image is not None:
+                    self._store(key, image)
+                self._loading.pop(key).set()
+
+        return ImageBuffer(image.original)
+
+    def touch(self, path: str, max_size: Optional[int] = None) -> bool:
+        """Mark an image as recently used; returns False if it is not cached."""
+        key = self.key(path, max_size)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return True
+            return False
+
+    def _store(self, key: CacheKey, image: ImageBuffer) -> None:
+        """Insert an image and evict old ones until the budget is met (lock held)."""
+        size = image.original.nbytes
+        if size > self.budget_bytes:
+            return  # Larger than the whole budget: never cached
+
+        self._entries[key] = image
+        self.used_bytes += size
+        while self.used_bytes > self.budget_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.used_bytes -= evicted.original.nbytes
+            self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.used_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "used_mb": self.used_bytes / (1024 * 1024),
+                "budget_mb": self.budget_bytes / (1024 * 1024),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+_shared_cache: Optional[ImageCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_image_cache() -> ImageCache:
+    """Return the process-wide image cache, created on first use with the budget from config.ini."""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = ImageCache(get_config()['Cache']['image_cache_mb'])
+        return _shared_cache
@@ -0,0 +1,61 @@
+"""
+Background decoding of the images next to the current point.
+
+When stepping through the points of a specimen in the Vickers tab, the
+images of the next and previous points are decoded in worker threads into
+the shared image cache while the current one is being measured, so moving
+to a neighbour only has to upload the texture.
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+
+from ._imageCache import ImageCache, get_image_cache
+
+
+class ImagePrefetcher:
+    """Decodes images ahead of time into the shared ImageCache."""
+
+    def __init__(self, cache: Optional[ImageCache] = None, workers: int = 2) -> None:
+        """
+        Args:
+            cache: image cache to fill (the process-wide one by default)
+            workers: number of decoding threads
+        """
+        self.cache = cache or get_image_cache()
+        self.workers = workers
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.pending: Dict[tuple, Future] = {}
+
+    def prefetch(self, paths: Iterable[str]) -> None:
+        """Start decoding ``paths`` (nearest first) and cancel queued decodes no longer needed."""
+        for key in [k for k, f in self.pending.items() if f.done()]:
+            del self.pending[key]
+
+        wanted = []
+        for path in paths:
+            key = ImageCache.key(path) if path else None
+            if key is not None and key not in wanted:
+                wanted.append(key)
+
+        for key in [k for k in self.pending if k not in wanted]:
+            self.pending.pop(key).cancel()
+
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="prefetch")
+
+        # Nearest images end up most recently used, so they are evicted last
+        cached = {key for key in reversed(wanted) if self.cache.touch(key[0])}
+
+        for key in wanted:
+            if key not in cached and key not in self.pending:
+                self.pending[key] = self.executor.submit(self.cache.get, key[0])
+
+    def shutdown(self) -> None:
+        """Stop the workers without waiting for queued decodes (called on exit)."""
+        for future in self.pending.values():
+            future.cancel()
+        self.pending.clear()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
@@ -0,0 +1,98 @@
+"""
+Magnifier loupe for placing Vickers vertices.
+
+Shows a zoomed, contrast-stretched crop of the working image around the
+cursor in a small raw texture next to the plot, so vertices can be placed
+precisely without zooming the main plot in and out. Each update slices a
+crop of ``loupe_size / loupe_zoom`` pixels from the ImageBuffer, stretches
+its luminance between the 1st and 99th percentiles and upscales it with
+nearest neighbour into a preallocated array, so the cost per frame depends
+only on the loupe size, not on the image size.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+import dearpygui.dearpygui as dpg
+
+from ._imageFilters import luminance
+
+
+CROSSHAIR_COLOR = (1.0, 0.2, 0.2)
+
+
+class Loupe:
+    """Zoomed crop around a pixel, displayed through one persistent raw texture."""
+
+    def __init__(self, texture_tag: str, size: int = 192, zoom: int = 4) -> None:
+        """
+        Args:
+            texture_tag: tag of the raw texture
+            size: approximate side of the texture in screen pixels (rounded to a multiple of zoom)
+            zoom: magnification (integer, nearest neighbour)
+        """
+        self.texture_tag = texture_tag
+        self.zoom = max(1, int(zoom))
+        self.crop = max(3, int(size) // self.zoom) | 1  # Odd, so the cursor pixel sits in the middle
+        self.size = self.crop * self.zoom
+        self.enhance = True
+        self._pixels = np.zeros((self.size, self.size, 4), dtype=np.float32)
+        self._pixels[:, :, 3] = 1.0
+        self._crop = np.zeros((self.crop, self.crop, 4), dtype=np.float32)
+        self._last: Optional[Tuple] = None
+
+    def create(self) -> None:
+        """Create the raw texture (once, while building the UI)."""
+        if not dpg.does_item_exist(self.texture_tag):
+            with dpg.texture_registry():
+                dpg.add_raw_texture(self.size, self.size, self._pixels.reshape(-1),
+                                    format=dpg.mvFormat_Float_rgba, tag=self.texture_tag)
+
+    def invalidate(self) -> None:
+        """Force the next update to redraw (image filtered or reloaded)."""
+        self._last = None
+
+    def update(self, pixels: np.ndarray, col: float, row: float) -> bool:
+        """
+        Show the neighbourhood of pixel (col, row) of an RGBA array.
+
+        Returns False without touching the texture if nothing changed since the last call.
+        """
+        key = (id(pixels), int(col), int(row), self.enhance)
+        if key == self._last or not dpg.does_item_exist(self.texture_tag):
+            return False
+        self._last = key
+
+        # Crop with a black border where it leaves the image
+        height, width = pixels.shape[:2]
+        half = self.crop // 2
+        c0, r0 = int(col) - half, int(row) - half
+        sc0, sr0 = max(c0, 0), max(r0, 0)
+        sc1, sr1 = min(c0 + self.crop, width), min(r0 + self.crop, height)
+        crop = self._crop
+        crop[:, :, :3] = 0.0
+        crop[:, :, 3] = 1.0
+        if sc1 > sc0 and sr1 > sr0:
+            crop[sr0 - r0:sr1 - r0, sc0 - c0:sc1 - c0] = pixels[sr0:sr1, sc0:sc1]
+
+        if self.enhance:
+            low, high = np.percentile(luminance(crop), (1, 99))
+            if high - low > 1e-3:
+                rgb = crop[:, :, :3]
+                rgb -= low
+                rgb *= 1.0 / (high - low)
+                np.clip(rgb, 0.0, 1.0, out=rgb)
+
+        # Nearest-neighbour upscale straight into the texture array
+        z = self.zoom
+        self._pixels.reshape(self.crop, z, self.crop, z, 4)[:] = crop[:, None, :, None, :]
+
+        # Crosshair on the cursor pixel, leaving that pixel visible
+        center_start, center_end = half * z, (half + 1) * z
+        mid = center_start + z // 2
+        for segment in (slice(0, center_start), slice(center_end, self.size)):
+            self._pixels[mid, segment, :3] = CROSSHAIR_COLOR
+            self._pixels[segment, mid, :3] = CROSSHAIR_COLOR
+
+        dpg.set_value(self.texture_tag, self._pixels.reshape(-1))
+        return True
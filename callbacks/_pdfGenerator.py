@@ -26,6 +26,8 @@ from PIL import Image
 import base64
 import webbrowser
 
+from ._hardness import statistics
+
 
 def generate_html_report(
     file_path: str,
@@ -34,6 +36,7 @@ def generate_html_report(
     table_data: Optional[List[Dict]],
     heatmap_html_path: Optional[str] = None,
     grid_columns: int = 4,
+    annotated_images: Optional[Dict[int, str]] = None,
 ) -> None:
     """
     Generate a comprehensive multi-page HTML report for Vickers hardness testing project.
@@ -45,6 +48,7 @@ def generate_html_report(
         table_data: List of point data dicts with id, x, y, hv, std_dev, image_path
         heatmap_html_path: Optional path to generated heat map HTML file
         grid_columns: Number of columns for hardness points grid (default 4)
+        annotated_images: Optional {row index: image with its measurements drawn}, shown instead of the raw image
     """
     # Ensure .html extension
     if not file_path.endswith(".html"):
@@ -56,7 +60,8 @@ def generate_html_report(
         heatmap_data,
         table_data,
         heatmap_html_path,
-        grid_columns
+        grid_columns,
+        annotated_images
     )
     
     # Save HTML file
@@ -74,7 +79,8 @@ def _build_html_report(
     heatmap_data: Optional[Dict],
     table_data: Optional[List[Dict]],
     heatmap_html_path: Optional[str],
-    grid_columns: int
+    grid_columns: int,
+    annotated_images: Optional[Dict[int, str]] = None
 ) -> str:
     """Build complete HTML report with embedded CSS and JavaScript."""
     
@@ -84,7 +90,7 @@ def _build_html_report(
     # Generate sections
     project_section = _generate_project_info_section(project_data)
     mapping_section = _generate_mapping_section(heatmap_data)
-    points_section = _generate_hardness_points_section(table_data, grid_columns)
+    points_section = _generate_hardness_points_section(table_data, grid_columns, annotated_images)
     heatmap_section = _generate_heatmap_section(heatmap_html_path)
     
     # Build complete HTML
@@ -319,20 +325,15 @@ def _generate_mapping_section(heatmap_data: Optional[Dict]) -> str:
     """
 
 
-def _generate_hardness_points_section(table_data: Optional[List[Dict]], grid_columns: int) -> str:
-    """Generate hardness points section HTML with grid layout."""
+def _generate_hardness_points_section(table_data: Optional[List[Dict]], grid_columns: int,
+                                     annotated_images: Optional[Dict[int, str]] = None) -> str:
+    """Generate hardness points section HTML with grid layout (annotated images where available)."""
     if not table_data or len(table_data) == 0:
         return '<section id="hardness" class="section"><p class="no-data">No hay datos de puntos de dureza disponibles</p></section>'
     
     # Calculate statistics
-    hv_values = [p.get('hv', 0) for p in table_data if p.get('hv') is not None]
-    if hv_values:
-        hv_avg = sum(hv_values) / len(hv_values)
-        hv_min = min(hv_values)
-        hv_max = max(hv_values)
-        hv_range = hv_max - hv_min
-    else:
-        hv_avg = hv_min = hv_max = hv_range = 0
+    stats = statistics([p['hv'] for p in table_data if p.get('hv') is not None])
+    hv_avg, hv_min, hv_max, hv_range = stats['mean'], stats['min'], stats['max'], stats['range']
     
     stats_html = f"""
     <div class="statistics">
@@ -361,7 +362,7 @@ def _generate_hardness_points_section(table_data: Optional[List[Dict]], grid_col
     
     # Generate grid of point cards
     points_html = ""
-    for point in table_data:
+    for index, point in enumerate(table_data):
         point_id = point.get('id', 'N/A')
         x = point.get('x', 0)
         y = point.get('y', 0)
@@ -370,13 +371,14 @@ def _generate_hardness_points_section(table_data: Optional[List[Dict]], grid_col
         image_path = point.get('image_path', None)
         filename = os.path.basename(image_path) if image_path else "N/A"
         
-        # Convert image to base64
+        # Convert image to base64 (the version with the measurements drawn on, if rendered)
         img_html = ""
-        if image_path and os.path.exists(image_path):
+        embedded_path = (annotated_images or {}).get(index, image_path)
+        if embedded_path and os.path.exists(embedded_path):
             try:
-                with open(image_path, 'rb') as img_file:
+                with open(embedded_path, 'rb') as img_file:
                     img_data = base64.b64encode(img_file.read()).decode('utf-8')
-                    ext = os.path.splitext(image_path)[1].lower()
+                    ext = os.path.splitext(embedded_path)[1].lower()
                     mime_type = 'image/jpeg' if ext in ['.jpg', '.jpeg'] else 'image/png'
                     img_html = f'<img src="data:{mime_type};base64,{img_data}" alt="{point_id}">'
             except:
@@ -33,6 +33,7 @@ class ProyectoCB:
                 self.callbacks.imageProcessing.measurements = []
                 self.callbacks.imageProcessing.current_measurement = 0
                 self.callbacks.imageProcessing.current_points = []
+                self.callbacks.imageProcessing.history.clear()
                 
                 # Reset UI
                 if dpg.does_item_exist("vickers_current_measurement"):
@@ -47,22 +48,14 @@ class ProyectoCB:
                 
                 # Clear plot - remove all series
                 if dpg.does_item_exist("Processing_y_axis"):
-                    if hasattr(self.callbacks.imageProcessing, 'vickers_series_tags'):
-                        for tag in self.callbacks.imageProcessing.vickers_series_tags:
-                            if dpg.does_item_exist(tag):
-                                dpg.delete_item(tag)
-                        self.callbacks.imageProcessing.vickers_series_tags.clear()
+                    self.callbacks.imageProcessing.overlay.clear()
                     
                     # Clear image if exists
-                    if dpg.does_item_exist("image_series"):
-                        dpg.delete_item("image_series")
-                    if dpg.does_item_exist("loaded_image_texture"):
-                        dpg.delete_item("loaded_image_texture")
+                    self.callbacks.imageProcessing.image_slot.clear()
                 
                 # Reset image data
                 self.callbacks.imageProcessing.current_image_path = None
-                self.callbacks.imageProcessing.original_image_data = None
-                self.callbacks.imageProcessing.current_image_data = None
+                self.callbacks.imageProcessing.image_buffer = None
                 self.callbacks.imageProcessing.image_width = None
                 self.callbacks.imageProcessing.image_height = None
                 self.callbacks.imageProcessing.filePath = None
@@ -96,22 +89,21 @@ class ProyectoCB:
                         dpg.delete_item(tag)
                 self.callbacks.heatMap.axis_series_tags.clear()
                 
-                # Clear image series and texture
-                if dpg.does_item_exist("heatmap_image_series"):
-                    dpg.delete_item("heatmap_image_series")
-                if dpg.does_item_exist("heatmap_image_texture"):
-                    dpg.delete_item("heatmap_image_texture")
+                # Clear image series and texture (single or tiled)
+                self.callbacks.heatMap.image_slot.clear()
+                self.callbacks.heatMap.tiled_view.clear()
                 
                 # Reset all data variables
                 self.callbacks.heatMap.points = []
+                self.callbacks.heatMap.point_keys.clear()
+                self.callbacks.heatMap.history.clear()
                 self.callbacks.heatMap.calibration_points = []
                 self.callbacks.heatMap.origin_offset = (0, 0)
                 self.callbacks.heatMap.calibration_mode = False
                 self.callbacks.heatMap.set_origin_mode = False
                 self.callbacks.heatMap.mode = "Marcar Puntos"
                 self.callbacks.heatMap.current_image_path = None
-                self.callbacks.heatMap.original_image_data = None
-                self.callbacks.heatMap.current_image_data = None
+                self.callbacks.heatMap.image_buffer = None
                 self.callbacks.heatMap.image_width = None
                 self.callbacks.heatMap.image_height = None
                 self.callbacks.heatMap.saved_mapping_image_path = None
@@ -157,22 +149,8 @@ class ProyectoCB:
                 # Clear table data
                 self.callbacks.dataTable.table_data = []
                 
-                # Clear UI table
-                if dpg.does_item_exist("data_table"):
-                    children = dpg.get_item_children("data_table", slot=1)
-                    if children:
-                        for child in children:
-                            dpg.delete_item(child)
-                
-                # Clear thumbnails if they exist
-                if hasattr(self.callbacks.dataTable, 'thumbnail_textures'):
-                    for texture_tag in self.callbacks.dataTable.thumbnail_textures.values():
-                        if dpg.does_item_exist(texture_tag):
-                            dpg.delete_item(texture_tag)
-                    self.callbacks.dataTable.thumbnail_textures = {}
-                
-                # Rebuild empty table to show headers
-                self.callbacks.dataTable.rebuildTable()
+                # Clear UI rows and thumbnail textures
+                self.callbacks.dataTable.clearTable()
                 
                 print("[green]✓ Tabla de datos limpiada completamente[/green]")
             
@@ -323,6 +301,7 @@ class ProyectoCB:
                 "vickers": {
                     "calibration": get_preference("vickers_calibration", default=1.0),
                     "load": get_preference("vickers_load", default=500.0),
+                    "load_unit": get_preference("vickers_load_unit", default="gf"),
                     "measurements": self.callbacks.imageProcessing.measurements if (self.callbacks and hasattr(self.callbacks, 'imageProcessing')) else [],
                     "n_measurements": self.callbacks.imageProcessing.n_measurements if (self.callbacks and hasattr(self.callbacks, 'imageProcessing')) else 2,
                 },
@@ -346,6 +325,7 @@ class ProyectoCB:
                     "interpolation": self.callbacks.hmPlot.interpolation if (self.callbacks and hasattr(self.callbacks, 'hmPlot')) else "cubic",
                     "show_points": self.callbacks.hmPlot.show_points if (self.callbacks and hasattr(self.callbacks, 'hmPlot')) else False,
                     "show_lines": self.callbacks.hmPlot.show_lines if (self.callbacks and hasattr(self.callbacks, 'hmPlot')) else False,
+                    "show_variance": self.callbacks.hmPlot.show_variance if (self.callbacks and hasattr(self.callbacks, 'hmPlot')) else False,
                     "grid_resolution": self.callbacks.hmPlot.grid_resolution if (self.callbacks and hasattr(self.callbacks, 'hmPlot')) else 500,
                     "contour_levels": self.callbacks.hmPlot.contour_levels if (self.callbacks and hasattr(self.callbacks, 'hmPlot')) else 40,
                     "figure_scale": self.callbacks.hmPlot.figure_scale if (self.callbacks and hasattr(self.callbacks, 'hmPlot')) else 1.0,
@@ -464,17 +444,21 @@ class ProyectoCB:
                 # Save to preferences
                 save_preference("vickers_calibration", vickers_data.get("calibration", 1.0))
                 save_preference("vickers_load", vickers_data.get("load", 500.0))
+                save_preference("vickers_load_unit", vickers_data.get("load_unit", "gf"))
                 
                 # Update UI
                 if dpg.does_item_exist("vickers_calibration_input"):
                     dpg.set_value("vickers_calibration_input", vickers_data.get("calibration", 1.0))
                 if dpg.does_item_exist("vickers_load_input"):
                     dpg.set_value("vickers_load_input", vickers_data.get("load", 500.0))
+                if dpg.does_item_exist("vickers_load_unit_combo"):
+                    dpg.set_value("vickers_load_unit_combo", vickers_data.get("load_unit", "gf"))
                 
                 # Restore measurements if available
                 if hasattr(self.callbacks, 'imageProcessing'):
                     measurements_list = vickers_data.get("measurements", [])
                     self.callbacks.imageProcessing.measurements = measurements_list
+                    self.callbacks.imageProcessing.history.clear()
                     self.callbacks.imageProcessing.n_measurements = vickers_data.get("n_measurements", 2)
                     
                     if dpg.does_item_exist("vickers_n_measurements_input"):
@@ -525,6 +509,8 @@ class ProyectoCB:
                 
                 # Restore points and origin
                 self.callbacks.heatMap.points = hm_data.get("points", [])
+                self.callbacks.heatMap.point_keys.clear()
+                self.callbacks.heatMap.history.clear()
                 self.callbacks.heatMap.origin_offset = tuple(hm_data.get("origin_offset", (0, 0)))
                 
                 # Apply origin offset to image position
@@ -554,6 +540,7 @@ class ProyectoCB:
                 self.callbacks.hmPlot.interpolation = hmplot_data.get("interpolation", "cubic")
                 self.callbacks.hmPlot.show_points = hmplot_data.get("show_points", False)
                 self.callbacks.hmPlot.show_lines = hmplot_data.get("show_lines", False)
+                self.callbacks.hmPlot.show_variance = hmplot_data.get("show_variance", False)
                 self.callbacks.hmPlot.grid_resolution = hmplot_data.get("grid_resolution", 500)
                 self.callbacks.hmPlot.contour_levels = hmplot_data.get("contour_levels", 40)
                 self.callbacks.hmPlot.figure_scale = hmplot_data.get("figure_scale", 1.0)
@@ -567,6 +554,8 @@ class ProyectoCB:
                     dpg.set_value("hm_show_points_checkbox", hmplot_data.get("show_points", False))
                 if dpg.does_item_exist("hm_show_lines_checkbox"):
                     dpg.set_value("hm_show_lines_checkbox", hmplot_data.get("show_lines", False))
+                if dpg.does_item_exist("hm_show_variance_checkbox"):
+                    dpg.set_value("hm_show_variance_checkbox", hmplot_data.get("show_variance", False))
                 if dpg.does_item_exist("hm_resolution_slider"):
                     dpg.set_value("hm_resolution_slider", hmplot_data.get("grid_resolution", 500))
                 if dpg.does_item_exist("hm_levels_slider"):
@@ -664,6 +653,14 @@ class ProyectoCB:
             config = get_config()
             grid_columns = int(config.get('Report', {}).get('grid_columns', 4))
             
+            # Point images with their measurements drawn on (cached per image and geometry)
+            annotated_images = None
+            if table_data:
+                from callbacks._annotatedImages import AnnotatedImageCache
+                image_size = int(config.get('Report', {}).get('image_size', 800))
+                annotated_images = AnnotatedImageCache(last_project_folder, image_size).render_rows(
+                    table_data, get_preference("vickers_calibration", default=1.0))
+            
             print(f"[cyan]Generando reporte HTML...[/cyan]")
             
             # Generate HTML report
@@ -673,7 +670,8 @@ class ProyectoCB:
                 heatmap_data=heatmap_data,
                 table_data=table_data,
                 heatmap_html_path=heatmap_html_path,
-                grid_columns=grid_columns
+                grid_columns=grid_columns,
+                annotated_images=annotated_images
             )
             
             print(f"[green]✓ Reporte HTML generado exitosamente[/green]")
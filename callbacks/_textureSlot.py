@@ -0,0 +1,78 @@
+"""
+Persistent texture and image series for a plot viewer.
+
+Each viewer (Vickers, Mapeado) owns one TextureSlot. The texture is a Dear
+PyGui raw texture that reads the ImageBuffer pixels directly, so showing a
+filtered or reset image only swaps the array the texture points to. The
+texture and its image series are only recreated when the image dimensions
+change (e.g. loading a micrograph from a different camera).
+"""
+
+from typing import Optional, Tuple
+
+import dearpygui.dearpygui as dpg
+
+from ._imageBuffer import ImageBuffer
+
+
+class TextureSlot:
+    """One raw texture plus the image series that displays it on a plot axis."""
+
+    def __init__(self, texture_tag: str, series_tag: str, axis_tag: str) -> None:
+        self.texture_tag = texture_tag
+        self.series_tag = series_tag
+        self.axis_tag = axis_tag
+        self.size: Optional[Tuple[int, int]] = None  # (width, height) of the current texture
+        self._pixels = None  # Keeps the array read by the raw texture alive
+
+    def show(self, image_buffer: ImageBuffer, bounds_min=(0, 0), bounds_max=None, label: str = "") -> None:
+        """
+        Display ``image_buffer`` with the given plot bounds.
+
+        The existing texture is reused when the size matches; otherwise the
+        texture and series are recreated.
+        """
+        size = (image_buffer.width, image_buffer.height)
+        if bounds_max is None:
+            bounds_max = size
+
+        if size != self.size or not dpg.does_item_exist(self.texture_tag):
+            self.clear()
+            self._pixels = image_buffer.texture_data()
+            with dpg.texture_registry():
+                dpg.add_raw_texture(
+                    size[0], size[1], self._pixels,
+                    format=dpg.mvFormat_Float_rgba,
+                    tag=self.texture_tag,
+                )
+            self.size = size
+        else:
+            self.update(image_buffer)
+
+        if dpg.does_item_exist(self.series_tag):
+            dpg.configure_item(self.series_tag, bounds_min=bounds_min, bounds_max=bounds_max, label=label)
+        elif dpg.does_item_exist(self.axis_tag):
+            dpg.add_image_series(
+                self.texture_tag,
+                bounds_min=bounds_min,
+                bounds_max=bounds_max,
+                parent=self.axis_tag,
+                tag=self.series_tag,
+                label=label,
+            )
+
+    def update(self, image_buffer: ImageBuffer) -> None:
+        """Point the texture at the current working pixels (after a filter or reset)."""
+        if not dpg.does_item_exist(self.texture_tag) or (image_buffer.width, image_buffer.height) != self.size:
+            return
+        self._pixels = image_buffer.texture_data()
+        dpg.set_value(self.texture_tag, self._pixels)
+
+    def clear(self) -> None:
+        """Delete the series and the texture (new project or image size change)."""
+        if dpg.does_item_exist(self.series_tag):
+            dpg.delete_item(self.series_tag)
+        if dpg.does_item_exist(self.texture_tag):
+            dpg.delete_item(self.texture_tag)
+        self.size = None
+        self._pixels = None
@@ -0,0 +1,99 @@
+"""
+On-disk thumbnail cache for the data table.
+
+Thumbnails are downscaled once with Pillow and stored as small PNG files in
+``<project folder>/.cache/thumbnails``. Each file name is derived from the
+source path, its modification time and its size in bytes, so an edited or
+replaced image gets a new thumbnail automatically and unchanged images are
+reused across sessions without decoding the full-resolution file.
+"""
+
+import hashlib
+import os
+import threading
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+from rich import print
+
+from ._imageBuffer import ImageBuffer
+
+
+THUMBNAIL_SIZE = 140  # Max width/height in pixels shown in the table
+CACHE_SUBDIR = os.path.join(".cache", "thumbnails")
+
+
+def thumbnail_key(image_path: str, max_size: int = THUMBNAIL_SIZE) -> Optional[str]:
+    """
+    Build the cache key for an image: hash of (absolute path, mtime, file size, thumbnail size).
+
+    Returns None if the file does not exist.
+    """
+    try:
+        stat = os.stat(image_path)
+    except OSError:
+        return None
+
+    raw = f"{os.path.abspath(image_path)}|{stat.st_mtime_ns}|{stat.st_size}|{max_size}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def make_thumbnail(image_path: str, max_size: int = THUMBNAIL_SIZE) -> Image.Image:
+    """
+    Decode and downscale an image to fit in ``max_size`` x ``max_size``.
+
+    For JPEG files ``Image.draft`` lets the decoder skip most of the DCT work
+    by decoding directly at 1/2, 1/4 or 1/8 scale.
+    """
+    with Image.open(image_path) as img:
+        img.draft("RGB", (max_size, max_size))
+        thumb = img.convert("RGBA")
+    thumb.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+    return thumb
+
+
+class ThumbnailCache:
+    """Project-local cache of downscaled images, returned as ImageBuffer objects."""
+
+    def __init__(self, project_folder: str, max_size: int = THUMBNAIL_SIZE) -> None:
+        self.project_folder = project_folder
+        self.cache_dir = os.path.join(project_folder, CACHE_SUBDIR)
+        self.max_size = max_size
+
+    def cache_path(self, image_path: str) -> Optional[str]:
+        """Path of the cached thumbnail for ``image_path`` (None if the source is missing)."""
+        key = thumbnail_key(image_path, self.max_size)
+        if key is None:
+            return None
+        return os.path.join(self.cache_dir, f"{key}.png")
+
+    def get(self, image_path: str) -> ImageBuffer:
+        """
+        Return the thumbnail of ``image_path``, generating and storing it on a cache miss.
+
+        Raises:
+            FileNotFoundError: if ``image_path`` does not exist
+        """
+        cached = self.cache_path(image_path)
+        if cached is None:
+            raise FileNotFoundError(image_path)
+
+        if os.path.isfile(cached):
+            try:
+                with Image.open(cached) as img:
+                    return ImageBuffer.from_array(np.asarray(img.convert("RGBA")))
+            except OSError:
+                pass  # Corrupted cache entry: regenerate below
+
+        thumb = make_thumbnail(image_path, self.max_size)
+        try:
+            # Write to a temporary file and rename so readers never see a partial PNG
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{cached}.{os.getpid()}.{threading.get_ident()}.tmp"
+            thumb.save(tmp_path, format="PNG")
+            os.replace(tmp_path, cached)
+        except OSError as e:
+            print(f"[yellow]No se pudo guardar la miniatura en caché ({cached}): {e}[/yellow]")
+
+        return ImageBuffer.from_array(np.asarray(thumb))
@@ -0,0 +1,384 @@
+"""
+Multi-resolution tile pyramid for very large surface (Mapeado) images.
+
+Stitched macro images of large parts can be far bigger than a single GPU
+texture. TilePyramid cuts the image once into fixed-size tiles at full
+resolution and at every 2x reduction, and stores them as PNG files in
+``<project folder>/.cache/pyramids/<key>``; the key changes when the source
+file changes. TiledImageView shows the pyramid on a plot axis: every frame
+it picks the level matching the current zoom, loads the visible tiles in a
+worker pool and uploads them as textures on the render thread, keeping a
+bounded number of tile textures alive.
+"""
+
+import json
+import math
+import os
+import queue
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import dearpygui.dearpygui as dpg
+from PIL import Image
+from rich import print
+
+from ._imageBuffer import ImageBuffer
+from ._thumbnailCache import thumbnail_key
+
+
+CACHE_SUBDIR = os.path.join(".cache", "pyramids")
+META_FILE = "meta.json"
+
+TileKey = Tuple[int, int, int]  # (level, column, row)
+
+
+@contextmanager
+def _allow_large_images():
+    """Temporarily lift Pillow's decompression-bomb limit (stitched images exceed it legitimately)."""
+    previous = Image.MAX_IMAGE_PIXELS
+    Image.MAX_IMAGE_PIXELS = None
+    try:
+        yield
+    finally:
+        Image.MAX_IMAGE_PIXELS = previous
+
+
+def image_size(image_path: str) -> Tuple[int, int]:
+    """(width, height) of an image file, read from its header without decoding the pixels."""
+    with _allow_large_images():
+        with Image.open(image_path) as img:
+            return img.size
+
+
+class TilePyramid:
+    """Tiles of an image at full resolution and every 2x reduction, cached on disk."""
+
+    def __init__(self, image_path: str, cache_root: str, tile_size: int = 512) -> None:
+        self.image_path = image_path
+        self.tile_size = tile_size
+        self.width, self.height = image_size(image_path)
+
+        # Level n has the size of level n-1 halved (rounded up) until it fits in one tile
+        self.levels: List[Tuple[int, int]] = [(self.width, self.height)]
+        while max(self.levels[-1]) > tile_size:
+            w, h = self.levels[-1]
+            self.levels.append(((w + 1) // 2, (h + 1) // 2))
+
+        # The tile size is part of the key: a different size needs different tiles
+        key = thumbnail_key(image_path, tile_size)
+        if key is None:
+            raise FileNotFoundError(image_path)
+        self.directory = os.path.join(cache_root, key)
+
+    @property
+    def top_level(self) -> int:
+        return len(self.levels) - 1
+
+    def grid(self, level: int) -> Tuple[int, int]:
+        """Number of (columns, rows) of tiles at ``level``."""
+        w, h = self.levels[level]
+        return -(-w // self.tile_size), -(-h // self.tile_size)
+
+    def tile_path(self, level: int, column: int, row: int) -> str:
+        return os.path.join(self.directory, str(level), f"{column}_{row}.png")
+
+    def is_built(self) -> bool:
+        return os.path.isfile(os.path.join(self.directory, META_FILE))
+
+    def build(self, progress=None) -> None:
+        """
+        Cut every level into tiles (no-op if the pyramid is already cached).
+
+        Args:
+            progress: optional callable receiving the fraction of tiles written (0-1)
+        """
+        if self.is_built():
+            return
+
+        total = sum(c * r for c, r in (self.grid(level) for level in range(len(self.levels))))
+        written = 0
+
+        with _allow_large_images():
+            with Image.open(self.image_path) as source:
+                image = source.convert("RGB")
+
+        for level in range(len(self.levels)):
+            if level > 0:
+                image = image.reduce(2)
+
+            os.makedirs(os.path.join(self.directory, str(level)), exist_ok=True)
+            columns, rows = self.grid(level)
+            for row in range(rows):
+                for column in range(columns):
+                    x0, y0 = column * self.tile_size, row * self.tile_size
+                    tile = image.crop((x0, y0, min(x0 + self.tile_size, image.width), min(y0 + self.tile_size, image.height)))
+                    tile.save(self.tile_path(level, column, row), format="PNG", compress_level=1)
+                    written += 1
+                    if progress is not None:
+                        progress(written / total)
+
+        # Written last so an interrupted build is redone next time
+        meta = {"source": os.path.abspath(self.image_path), "width": self.width, "height": self.height,
+                "tile_size": self.tile_size, "levels": self.levels}
+        with open(os.path.join(self.directory, META_FILE), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+    def load_tile(self, level: int, column: int, row: int) -> ImageBuffer:
+        with Image.open(self.tile_path(level, column, row)) as tile:
+            return ImageBuffer.from_array(np.asarray(tile.convert("RGBA")))
+
+    def tile_pixels(self, level: int, column: int, row: int) -> Tuple[int, int, int, int]:
+        """Full-resolution pixel rectangle (x0, y0, x1, y1) covered by a tile."""
+        scale = 2 ** level
+        span = self.tile_size * scale
+        x0, y0 = column * span, row * span
+        return x0, y0, min(x0 + span, self.width), min(y0 + span, self.height)
+
+    def overview(self, max_size: int = 4096) -> ImageBuffer:
+        """Stitch the largest level that fits in ``max_size`` x ``max_size`` into one image."""
+        level = next((n for n, size in enumerate(self.levels) if max(size) <= max_size), self.top_level)
+        width, height = self.levels[level]
+        canvas = Image.new("RGBA", (width, height))
+        columns, rows = self.grid(level)
+        for row in range(rows):
+            for column in range(columns):
+                with Image.open(self.tile_path(level, column, row)) as tile:
+                    canvas.paste(tile.convert("RGBA"), (column * self.tile_size, row * self.tile_size))
+        return ImageBuffer.from_array(np.asarray(canvas))
+
+
+class TiledImageView:
+    """Shows a TilePyramid on a plot axis, loading only the tiles visible at the current zoom."""
+
+    def __init__(self, tag_prefix: str, axis_tag: str, x_axis_tag: str, plot_tag: str, max_textures: int = 64) -> None:
+        self.tag_prefix = tag_prefix
+        self.axis_tag = axis_tag
+        self.x_axis_tag = x_axis_tag
+        self.plot_tag = plot_tag
+        self.max_textures = max_textures
+
+        self.pyramid: Optional[TilePyramid] = None
+        self.bounds_min = (0.0, 0.0)
+        self.bounds_max = (1.0, 1.0)
+
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.build_future = None
+        self.build_progress = 0.0
+        self.generation = 0  # Incremented on every open/clear so stale tile results are dropped
+        self.pending: Dict[TileKey, object] = {}  # Tiles being decoded
+        self.results = queue.Queue()  # (generation, key, future) handed to the render thread
+        self.textures: "OrderedDict[TileKey, int]" = OrderedDict()  # LRU of uploaded tile textures
+        self.shown: Dict[TileKey, int] = {}  # Tile -> image series currently on the plot
+        self.wanted: List[TileKey] = []  # Tiles needed for the current view
+        self._last_view = None
+        self._fit_pending = False  # Fit the axes once the first tile is on the plot
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 2), thread_name_prefix="tiles")
+        return self.executor
+
+    @property
+    def is_active(self) -> bool:
+        return self.pyramid is not None or self.build_future is not None
+
+    def open(self, pyramid: TilePyramid, bounds_min, bounds_max) -> None:
+        """Start showing ``pyramid``, building its tiles in the background if they are not cached."""
+        self.clear()
+        self.bounds_min = tuple(bounds_min)
+        self.bounds_max = tuple(bounds_max)
+        self._fit_pending = True
+
+        if pyramid.is_built():
+            self.pyramid = pyramid
+            self._showBackground()
+            return
+
+        print(f"[cyan]Generando pirámide de teselas para {os.path.basename(pyramid.image_path)} "
+              f"({pyramid.width}x{pyramid.height}, {len(pyramid.levels)} niveles)...[/cyan]")
+        self.build_progress = 0.0
+
+        def build():
+            pyramid.build(progress=lambda fraction: setattr(self, "build_progress", fraction))
+            return pyramid
+
+        self.build_future = self._get_executor().submit(build)
+
+    def set_bounds(self, bounds_min, bounds_max) -> None:
+        """Move/scale the image on the plot (calibration or origin change)."""
+        self.bounds_min = tuple(bounds_min)
+        self.bounds_max = tuple(bounds_max)
+        for key, series in self.shown.items():
+            dpg.configure_item(series, **self._tile_bounds(key))
+        self._last_view = None
+
+    def clear(self) -> None:
+        """Remove every tile from the plot and free their textures."""
+        self.generation += 1
+        if self.build_future is not None:
+            self.build_future.cancel()
+            self.build_future = None
+        for future in self.pending.values():
+            future.cancel()
+        self.pending.clear()
+        for series in self.shown.values():
+            if dpg.does_item_exist(series):
+                dpg.delete_item(series)
+        self.shown.clear()
+        for texture in self.textures.values():
+            if dpg.does_item_exist(texture):
+                dpg.delete_item(texture)
+        self.textures.clear()
+        self.wanted = []
+        self.pyramid = None
+        self._last_view = None
+
+    def shutdown(self) -> None:
+        self.clear()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def update(self, budget_ms: float = 6.0) -> None:
+        """Per-frame work on the render thread: finish builds, upload loaded tiles, follow the zoom."""
+        if self.build_future is not None:
+            if not self.build_future.done():
+                return
+            future, self.build_future = self.build_future, None
+            try:
+                self.pyramid = future.result()
+                print(f"[green]Pirámide de teselas lista: {self.pyramid.directory}[/green]")
+                self._showBackground()
+            except Exception as e:
+                print(f"[red]Error generando pirámide de teselas: {e}[/red]")
+                return
+
+        if self.pyramid is None:
+            return
+
+        deadline = time.perf_counter() + budget_ms / 1000.0
+        uploaded = False
+        while time.perf_counter() < deadline:
+            try:
+                generation, key, future = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if generation != self.generation or self.pending.get(key) is not future:
+                continue
+            del self.pending[key]
+            try:
+                self._uploadTile(key, future.result())
+                uploaded = True
+            except Exception as e:
+                print(f"[red]Error cargando tesela {key}: {e}[/red]")
+
+        view = (tuple(dpg.get_axis_limits(self.x_axis_tag)), tuple(dpg.get_axis_limits(self.axis_tag)),
+                tuple(dpg.get_item_rect_size(self.plot_tag)))
+        if uploaded or view != self._last_view:
+            self._last_view = view
+            self._refreshVisible(*view)
+
+    def _tile_bounds(self, key: TileKey) -> dict:
+        """Plot bounds of a tile; image row 0 is drawn at the top (bounds_max y)."""
+        x0, y0, x1, y1 = self.pyramid.tile_pixels(*key)
+        sx = (self.bounds_max[0] - self.bounds_min[0]) / self.pyramid.width
+        sy = (self.bounds_max[1] - self.bounds_min[1]) / self.pyramid.height
+        return {
+            "bounds_min": (self.bounds_min[0] + x0 * sx, self.bounds_max[1] - y1 * sy),
+            "bounds_max": (self.bounds_min[0] + x1 * sx, self.bounds_max[1] - y0 * sy),
+        }
+
+    def _showBackground(self) -> None:
+        """Load the single top-level tile, which stays under the detailed tiles as a fallback."""
+        self.wanted = [(self.pyramid.top_level, 0, 0)]
+        self._requestTile(self.wanted[0])
+        self._last_view = None
+
+    def _visibleTiles(self, x_limits, y_limits, plot_size) -> List[TileKey]:
+        pyramid = self.pyramid
+        plot_width = max(1.0, plot_size[0])
+        units_per_pixel = (self.bounds_max[0] - self.bounds_min[0]) / pyramid.width
+        image_pixels_per_screen_pixel = (x_limits[1] - x_limits[0]) / units_per_pixel / plot_width
+        level = int(math.floor(math.log2(image_pixels_per_screen_pixel))) if image_pixels_per_screen_pixel > 1 else 0
+        level = min(max(level, 0), pyramid.top_level)
+
+        # Visible rectangle in full-resolution pixels
+        sy = (self.bounds_max[1] - self.bounds_min[1]) / pyramid.height
+        px0 = (x_limits[0] - self.bounds_min[0]) / units_per_pixel
+        px1 = (x_limits[1] - self.bounds_min[0]) / units_per_pixel
+        py0 = (self.bounds_max[1] - y_limits[1]) / sy
+        py1 = (self.bounds_max[1] - y_limits[0]) / sy
+
+        span = pyramid.tile_size * 2 ** level
+        columns, rows = pyramid.grid(level)
+        c0, c1 = max(0, int(px0 // span)), min(columns - 1, int(px1 // span))
+        r0, r1 = max(0, int(py0 // span)), min(rows - 1, int(py1 // span))
+        return [(level, c, r) for r in range(r0, r1 + 1) for c in range(c0, c1 + 1)]
+
+    def _refreshVisible(self, x_limits, y_limits, plot_size) -> None:
+        background = (self.pyramid.top_level, 0, 0)
+        self.wanted = [background] + [key for key in self._visibleTiles(x_limits, y_limits, plot_size) if key != background]
+
+        for key in self.wanted:
+            if key in self.textures:
+                self.textures.move_to_end(key)
+                self._showTile(key)
+            else:
+                self._requestTile(key)
+
+        # Drop tiles of other levels once the current level is complete, so zooming never shows holes
+        if all(key in self.shown for key in self.wanted):
+            wanted = set(self.wanted)
+            for key in [k for k in self.shown if k not in wanted]:
+                series = self.shown.pop(key)
+                if dpg.does_item_exist(series):
+                    dpg.delete_item(series)
+
+    def _requestTile(self, key: TileKey) -> None:
+        if key in self.pending or key in self.textures:
+            return
+        generation = self.generation
+        future = self._get_executor().submit(self.pyramid.load_tile, *key)
+        future.add_done_callback(lambda f: self.results.put((generation, key, f)))
+        self.pending[key] = future
+
+    def _uploadTile(self, key: TileKey, tile: ImageBuffer) -> None:
+        with dpg.texture_registry():
+            texture = dpg.add_static_texture(tile.width, tile.height, tile.texture_data(),
+                                             tag=f"{self.tag_prefix}_texture_{key[0]}_{key[1]}_{key[2]}")
+        self.textures[key] = texture
+
+        # Evict least recently used textures that are not needed for the current view
+        wanted = set(self.wanted)
+        for old_key in list(self.textures):
+            if len(self.textures) <= self.max_textures:
+                break
+            if old_key in wanted:
+                continue
+            series = self.shown.pop(old_key, None)
+            if series is not None and dpg.does_item_exist(series):
+                dpg.delete_item(series)
+            dpg.delete_item(self.textures.pop(old_key))
+
+    def _showTile(self, key: TileKey) -> None:
+        if key in self.shown or not dpg.does_item_exist(self.axis_tag):
+            return
+
+        # Insert before the first non-tile series so markers drawn on the image stay on top
+        tile_series = set(self.shown.values())
+        before = next((child for child in dpg.get_item_children(self.axis_tag, 1) or [] if child not in tile_series), 0)
+        self.shown[key] = dpg.add_image_series(
+            self.textures[key],
+            parent=self.axis_tag,
+            before=before,
+            **self._tile_bounds(key),
+        )
+
+        if self._fit_pending:
+            self._fit_pending = False
+            dpg.fit_axis_data(self.x_axis_tag)
+            dpg.fit_axis_data(self.axis_tag)
@@ -0,0 +1,86 @@
+"""
+Main-thread dispatcher for UI updates requested by background work.
+
+Dear PyGui items must only be created, modified or deleted from the render
+thread. Worker threads (heat map generation, delayed actions) post callables
+here instead of touching dpg themselves; the render loop in Interface.show
+calls process() once per frame and runs the queued tasks in order until its
+time budget is used, so a burst of updates is spread over several frames
+instead of stalling one.
+"""
+
+import heapq
+import itertools
+import queue
+import threading
+import time
+import traceback
+from typing import Callable, List, Optional, Tuple
+
+from rich import print
+
+
+class UIDispatcher:
+    """Thread-safe FIFO of callables run on the render thread, plus delayed tasks."""
+
+    def __init__(self) -> None:
+        self._tasks: "queue.Queue[Tuple[Callable, tuple, dict]]" = queue.Queue()
+        self._delayed: List[Tuple[float, int, Callable, tuple, dict]] = []  # Heap ordered by due time
+        self._counter = itertools.count()  # Tie-breaker keeping delayed tasks in posting order
+        self._lock = threading.Lock()
+
+    def post(self, function: Callable, *args, **kwargs) -> None:
+        """Run ``function(*args, **kwargs)`` on the render thread at the next frame (callable from any thread)."""
+        self._tasks.put((function, args, kwargs))
+
+    def post_later(self, delay: float, function: Callable, *args, **kwargs) -> None:
+        """Run ``function(*args, **kwargs)`` on the render thread after ``delay`` seconds."""
+        with self._lock:
+            heapq.heappush(self._delayed, (time.perf_counter() + delay, next(self._counter), function, args, kwargs))
+
+    def process(self, budget_ms: float = 4.0) -> int:
+        """
+        Run queued tasks until the queue is empty or ``budget_ms`` has passed.
+        Must run on the render thread; at least one task runs per call.
+
+        Returns:
+            Number of tasks run.
+        """
+        now = time.perf_counter()
+        with self._lock:
+            while self._delayed and self._delayed[0][0] <= now:
+                _, _, function, args, kwargs = heapq.heappop(self._delayed)
+                self._tasks.put((function, args, kwargs))
+
+        deadline = now + budget_ms / 1000.0
+        processed = 0
+        while processed == 0 or time.perf_counter() < deadline:
+            try:
+                function, args, kwargs = self._tasks.get_nowait()
+            except queue.Empty:
+                break
+            processed += 1
+            try:
+                function(*args, **kwargs)
+            except Exception as e:
+                print(f"[red]Error en tarea de interfaz {getattr(function, '__name__', function)}: {e}[/red]")
+                traceback.print_exc()
+        return processed
+
+    def pending(self) -> int:
+        """Number of tasks waiting (queued plus delayed)."""
+        with self._lock:
+            return self._tasks.qsize() + len(self._delayed)
+
+
+_shared_dispatcher: Optional[UIDispatcher] = None
+_shared_lock = threading.Lock()
+
+
+def get_ui_dispatcher() -> UIDispatcher:
+    """Return the process-wide UI dispatcher drained by the render loop."""
+    global _shared_dispatcher
+    with _shared_lock:
+        if _shared_dispatcher is None:
+            _shared_dispatcher = UIDispatcher()
+        return _shared_dispatcher
@@ -1,11 +1,21 @@
 import os
+import copy
 import math
-import threading
 from datetime import datetime
 from time import time
 import dearpygui.dearpygui as dpg
 from rich import print
-from config import get_preference, save_preference
+from config import get_preference, save_preference, get_config
+from ._imageFilters import FilterPipeline, luminance
+from ._textureSlot import TextureSlot
+from ._vickersOverlay import GeometryOverlay
+from ._loupe import Loupe
+from ._commandLog import Command, CommandLog, shortcut
+from ._uiDispatcher import get_ui_dispatcher
+from ._imagePrefetcher import ImagePrefetcher
+from ._imageCache import get_image_cache
+from ._vickersDetection import detect_indentation, refine_corner
+from ._hardness import measure_vertices, hv_statistics, statistics, pixels_to_um, recompute_measurements, recompute_table
 
 class VickersCB:
     def __init__(self, callbacks=None) -> None:
@@ -24,12 +34,28 @@ class VickersCB:
         self.current_measurement = 0  # Current measurement index (0-based)
         self.measurements = []  # List of measurements, each with {points: [(x,y)...], d1: float, d2: float, d_avg: float, hv: float}
         self.current_points = []  # Points for current measurement being marked
+        self.current_clicks = []  # Positions as clicked/detected, before sub-pixel refinement
         
-        self.vickers_series_tags = []  # List of series tags for cleanup
+        self.overlay = GeometryOverlay("Processing_y_axis")  # Persistent series of current and previous measurements
+        self.vertex_drag_tags = []  # Drag points of detected vertices awaiting confirmation
+        self.history = CommandLog()  # Undo/redo of clicks, detections and vertex drags
         self.processing_mode = "Marcar Puntos"  # Current mode: "Mover Imagen" or "Marcar Puntos"
-        self.original_image_data = None  # Store original image data for reset
-        self.current_image_data = None  # Store current working image data
+        self.image_buffer = None  # ImageBuffer with original (read-only) and working pixels
+        self.filter_pipeline = FilterPipeline()  # Filters applied to the working image, replayable from the original
         self.current_image_path = None  # Store current image path for reload
+        self.image_slot = TextureSlot("loaded_image_texture", "image_series", "Processing_y_axis")  # Reused across images and filters
+        
+        # Background decoding of the neighbouring points' images
+        self.prefetch_neighbors = get_config()['Vickers']['prefetch_neighbors']
+        self.prefetcher = ImagePrefetcher()
+
+        # Optional sub-pixel snapping of vertices to the nearest corner
+        self.refine_vertices = get_preference("vickers_refine_vertices", default=False)
+        self.refine_window = get_config()['Vickers']['refine_window']
+
+        # Magnified crop around the cursor for placing vertices
+        self.loupe = Loupe("vickers_loupe_texture", get_config()['Vickers']['loupe_size'], get_config()['Vickers']['loupe_zoom'])
+        self.show_loupe = get_preference("vickers_show_loupe", default=True)
 
     def openFile(self, sender, app_data):
         # Debug info
@@ -50,7 +76,8 @@ class VickersCB:
 
         # Load and display the image
         try:
-            width, height, channels, data = dpg.load_image(full_path)
+            self.image_buffer = get_image_cache().get(full_path)
+            width, height = self.image_buffer.width, self.image_buffer.height
 
             # Store image dimensions
             self.image_width = width
@@ -58,35 +85,18 @@ class VickersCB:
             
             # Store current image path for reload
             self.current_image_path = full_path
-            
-            # Store original and current image data (convert to list for consistency)
-            self.original_image_data = [data[i] for i in range(len(data))]
-            self.current_image_data = self.original_image_data
+            self.resetFilterChain()
+            self.loupe.invalidate()
 
             # Get calibration value to convert pixels to µm
             calibration = get_preference("vickers_calibration", default=1.0)
             real_width = int(width * calibration)
             real_height = int(height * calibration)
 
-            # Delete existing image series first
-            if dpg.does_item_exist("image_series"):
-                dpg.delete_item("image_series")
-
-            # Delete existing texture if it exists
-            if dpg.does_item_exist("loaded_image_texture"):
-                dpg.delete_item("loaded_image_texture")
-
-            # Create texture for modifications
-            with dpg.texture_registry():
-                dpg.add_static_texture(width, height, data, tag="loaded_image_texture")
-
-            # Add image series to the plot with µm coordinates
-            dpg.add_image_series(
-                "loaded_image_texture",
-                bounds_min=(0, 0),
+            # Show the image in the plot with µm coordinates (texture reused if the size matches)
+            self.image_slot.show(
+                self.image_buffer,
                 bounds_max=(real_width, real_height),
-                parent="Processing_y_axis",
-                tag="image_series",
                 label=self.fileName[-34:-4],  # Remove file extension from label and limit to last 30 characters
             )
 
@@ -147,10 +157,55 @@ class VickersCB:
     def onCalibrationChange(self, sender, new_value):
         """
         Callback for calibration input changes.
-        Saves the new value and updates the image scale.
+        Saves the new value, updates the image scale and recomputes the stored HV values.
         """
+        # Vertices of the measurement in progress are in µm of the old calibration: keep their pixels
+        clicks = [self.plotToPixel(*c) for c in self.current_clicks]
+        points = [self.plotToPixel(*p) for p in self.current_points]
         save_preference("vickers_calibration", new_value)
         self.updateImageScale()
+        if points:
+            self.current_clicks = [self.pixelToPlot(*c) for c in clicks]
+            self.current_points = [self.pixelToPlot(*p) for p in points]
+            for tag, point in zip(self.vertex_drag_tags, self.current_points):
+                dpg.set_value(tag, point)
+            self.drawVickersGeometry()
+        self.recomputeHardness()
+
+    def onLoadChange(self, sender, new_value):
+        """Save the applied load and recompute the stored HV values."""
+        save_preference("vickers_load", new_value)
+        self.recomputeHardness()
+
+    def onLoadUnitChange(self, sender, new_value):
+        """Save the unit of the applied load and recompute the stored HV values."""
+        save_preference("vickers_load_unit", new_value)
+        self.recomputeHardness()
+
+    def recomputeHardness(self):
+        """
+        Recompute the current measurements and every table row from their vertex pixels
+        with the current calibration and load (the measurement in progress is rescaled
+        by onCalibrationChange).
+        """
+        calibration = get_preference("vickers_calibration", default=1.0)
+        load = get_preference("vickers_load", default=500.0)
+        unit = get_preference("vickers_load_unit", default="gf")
+
+        if recompute_measurements(self.measurements, calibration, load, unit):
+            self.updateMeasurementsTable()
+            self.updateMeasurementsSummary()
+            if len(self.current_points) == 4 and self.current_measurement < len(self.measurements):
+                self.current_points = list(self.measurements[self.current_measurement]["points"])
+            self.drawVickersGeometry()
+
+        if self.callbacks and hasattr(self.callbacks, 'dataTable'):
+            data_table = self.callbacks.dataTable
+            changed = recompute_table(data_table.table_data, calibration, load, unit)
+            for index in changed:
+                data_table.refreshRow(index)
+            if changed:
+                print(f"[cyan]HV recalculado para {len(changed)} puntos de la tabla[/cyan]")
 
     def onNMeasurementsChange(self, sender, new_value):
         """
@@ -199,16 +254,23 @@ class VickersCB:
         if plot_coords is None:
             return
 
+        # Detected vertices are being adjusted with their drag points
+        if self.vertex_drag_tags:
+            return
+
         # Block clicks if all measurements are complete
         if len(self.measurements) >= self.n_measurements:
             print(f"[yellow]⚠ Todas las mediciones completadas ({self.n_measurements}/{self.n_measurements}). Presione 'Reset Mediciones' para continuar.[/yellow]")
             return
 
+        before = self.snapshotState()
+
         # Check if current measurement is complete (4 points)
         if len(self.current_points) >= 4:
             # Move to next measurement
             self.current_measurement += 1
             self.current_points = []
+            self.current_clicks = []
             
             # Check if all measurements are complete
             if self.current_measurement >= self.n_measurements:
@@ -217,9 +279,11 @@ class VickersCB:
             
 
         # Add point to current measurement
-        self.current_points.append(plot_coords)
+        point = self.refineVertex(plot_coords)
+        self.current_clicks.append(tuple(plot_coords[:2]))
+        self.current_points.append(point)
         total_points = self.current_measurement * 4 + len(self.current_points)
-        print(f"[cyan]Medición {self.current_measurement + 1}, Punto {len(self.current_points)}: ({plot_coords[0]:.1f}, {plot_coords[1]:.1f}) µm[/cyan]")
+        print(f"[cyan]Medición {self.current_measurement + 1}, Punto {len(self.current_points)}: ({point[0]:.1f}, {point[1]:.1f}) µm[/cyan]")
 
         # Update UI
         dpg.set_value("vickers_current_measurement", f"{self.current_measurement + 1}/{self.n_measurements}")
@@ -232,81 +296,92 @@ class VickersCB:
         if len(self.current_points) == 4:
             self.saveMeasurement()
 
-    def drawVickersGeometry(self):
+        self.recordStep(f"punto {len(self.current_points)} de la medición {self.current_measurement + 1}", before)
+
+    def snapshotState(self):
+        """Copy of the measurement state (a few measurements of four points) for undo/redo."""
+        table_index = self.tableRowIndex()
+        table_row = None
+        if table_index is not None:
+            row = self.callbacks.dataTable.table_data[table_index]
+            table_row = (table_index, row.get('hv'), row.get('std_dev'), copy.deepcopy(row.get('measurements')))
+        return {
+            "measurements": copy.deepcopy(self.measurements),
+            "current_points": list(self.current_points),
+            "current_clicks": list(self.current_clicks),
+            "current_measurement": self.current_measurement,
+            "detecting": bool(self.vertex_drag_tags),
+            "table_row": table_row,
+        }
+
+    def restoreState(self, state):
         """
-        Draw Vickers measurement geometry progressively for current measurement.
-        - Circles at each vertex (different colors)
-        - Lines connecting vertices
-        - Diagonals with length annotations when 4 points complete
+        Go back to a snapshot, touching only what differs: the overlay series,
+        the measurements table and summary if the measurements changed, and the
+        data table row of the current image if its HV changed.
         """
-        # Clear previous drawings for current measurement
-        for tag in self.vickers_series_tags:
-            if dpg.does_item_exist(tag):
-                dpg.delete_item(tag)
-        self.vickers_series_tags.clear()
+        measurements_changed = state["measurements"] != self.measurements
+        self.measurements = copy.deepcopy(state["measurements"])
+        self.current_points = list(state["current_points"])
+        self.current_clicks = list(state["current_clicks"])
+        self.current_measurement = state["current_measurement"]
 
-        num_points = len(self.current_points)
-        if num_points == 0:
-            return
+        dpg.set_value("vickers_current_measurement", f"{min(self.current_measurement + 1, self.n_measurements)}/{self.n_measurements}")
+        dpg.set_value("vickers_npoints", f"{len(self.current_points)}/4")
+        if dpg.does_item_exist("waiting_popup"):
+            dpg.configure_item("waiting_popup", show=False)
 
-        # Draw circles at each vertex using scatter series
-        for i, (x, y) in enumerate(self.current_points):
-            tag = f"vickers_point_{self.current_measurement}_{i}"
-            dpg.add_scatter_series([x], [y], parent="Processing_y_axis", tag=tag)
-            self.vickers_series_tags.append(tag)
-
-        # Draw lines connecting vertices
-        if num_points >= 2:
-            # Line from P1 to P2
-            tag = f"vickers_line_{self.current_measurement}_1_2"
-            x_data = [self.current_points[0][0], self.current_points[1][0]]
-            y_data = [self.current_points[0][1], self.current_points[1][1]]
-            dpg.add_line_series(x_data, y_data, parent="Processing_y_axis", tag=tag)
-            self.vickers_series_tags.append(tag)
-
-        if num_points >= 3:
-            # Line from P2 to P3
-            tag = f"vickers_line_{self.current_measurement}_2_3"
-            x_data = [self.current_points[1][0], self.current_points[2][0]]
-            y_data = [self.current_points[1][1], self.current_points[2][1]]
-            dpg.add_line_series(x_data, y_data, parent="Processing_y_axis", tag=tag)
-            self.vickers_series_tags.append(tag)
-
-        if num_points >= 4:
-            # Line from P3 to P4
-            tag = f"vickers_line_{self.current_measurement}_3_4"
-            x_data = [self.current_points[2][0], self.current_points[3][0]]
-            y_data = [self.current_points[2][1], self.current_points[3][1]]
-            dpg.add_line_series(x_data, y_data, parent="Processing_y_axis", tag=tag)
-            self.vickers_series_tags.append(tag)
-
-            # Line from P4 to P1 (close the quadrilateral)
-            tag = f"vickers_line_{self.current_measurement}_4_1"
-            x_data = [self.current_points[3][0], self.current_points[0][0]]
-            y_data = [self.current_points[3][1], self.current_points[0][1]]
-            dpg.add_line_series(x_data, y_data, parent="Processing_y_axis", tag=tag)
-            self.vickers_series_tags.append(tag)
-
-            # Draw diagonals
-            p1 = self.current_points[0]
-            p2 = self.current_points[1]
-            p3 = self.current_points[2]
-            p4 = self.current_points[3]
-
-            d1_length = math.sqrt((p3[0] - p1[0]) ** 2 + (p3[1] - p1[1]) ** 2)
-            tag = f"vickers_diagonal_{self.current_measurement}_1_3"
-            x_data = [p1[0], p3[0]]
-            y_data = [p1[1], p3[1]]
-            dpg.add_line_series(x_data, y_data, label=f"M{self.current_measurement + 1} D1: {d1_length:.2f} µm", parent="Processing_y_axis", tag=tag)
-            self.vickers_series_tags.append(tag)
-
-            # Diagonal 2: P2 to P4
-            d2_length = math.sqrt((p4[0] - p2[0]) ** 2 + (p4[1] - p2[1]) ** 2)
-            tag = f"vickers_diagonal_{self.current_measurement}_2_4"
-            x_data = [p2[0], p4[0]]
-            y_data = [p2[1], p4[1]]
-            dpg.add_line_series(x_data, y_data, label=f"M{self.current_measurement + 1} D2: {d2_length:.2f} µm", parent="Processing_y_axis", tag=tag)
-            self.vickers_series_tags.append(tag)
+        self.clearVertexDragPoints()
+        if state["detecting"]:
+            self.showVertexDragPoints()
+        self.drawVickersGeometry()
+
+        if measurements_changed:
+            self.updateMeasurementsTable()
+            self.updateMeasurementsSummary()
+
+        if state["table_row"] is not None:
+            index, hv, std_dev, measurements = state["table_row"]
+            table_data = self.callbacks.dataTable.table_data
+            if index < len(table_data):
+                row = table_data[index]
+                if (row.get('hv'), row.get('std_dev'), row.get('measurements')) != (hv, std_dev, measurements):
+                    row['hv'], row['std_dev'] = hv, std_dev
+                    row['measurements'] = copy.deepcopy(measurements)
+                    if measurements is None:
+                        row.pop('measurements', None)
+                    self.callbacks.dataTable.refreshRow(index)
+
+    def recordStep(self, label, before, merge_key=None):
+        """Record the change made since the ``before`` snapshot as one undoable step."""
+        after = self.snapshotState()
+        self.history.push(Command(label, redo=lambda: self.restoreState(after),
+                                  undo=lambda: self.restoreState(before), merge_key=merge_key))
+
+    def undo(self, sender=None, app_data=None):
+        """Undo the last click, detection or vertex drag."""
+        self.history.undo()
+
+    def redo(self, sender=None, app_data=None):
+        """Redo the last undone step."""
+        self.history.redo()
+
+    def onShortcut(self, sender, app_data):
+        """Ctrl+Z / Ctrl+Y while the Vickers tab is active."""
+        action = shortcut(app_data, "tab_vickers")
+        if action == "undo":
+            self.undo()
+        elif action == "redo":
+            self.redo()
+
+    def drawVickersGeometry(self):
+        """
+        Draw the current measurement (outline, diagonals with their lengths once
+        the 4 points are in, vertices) and the completed ones as faint overlays.
+        Only updates the data of the persistent series in self.overlay.
+        """
+        self.overlay.show_previous([m["points"] for m in self.measurements[:self.current_measurement]])
+        self.overlay.show_current(self.current_points, self.current_measurement)
 
     def saveMeasurement(self):
         """
@@ -316,30 +391,21 @@ class VickersCB:
         if len(self.current_points) != 4:
             return
         
-        p1, p2, p3, p4 = self.current_points
-        
-        # Calculate diagonals
-        d1 = math.sqrt((p3[0] - p1[0]) ** 2 + (p3[1] - p1[1]) ** 2)
-        d2 = math.sqrt((p4[0] - p2[0]) ** 2 + (p4[1] - p2[1]) ** 2)
-        d_avg = (d1 + d2) / 2
-        
-        # Calculate Vickers hardness for this measurement
-        load_kgf = get_preference("vickers_load", default=500.0) / 1000.0  # g to kgf
-        d_mm = d_avg / 1000.0  # µm to mm
-        
-        if d_mm > 0:
-            hv = 1.854 * load_kgf / (d_mm ** 2)
-        else:
-            hv = 0
-        
-        # Store measurement
-        measurement = {
-            "points": self.current_points.copy(),
-            "d1": d1,
-            "d2": d2,
-            "d_avg": d_avg,
-            "hv": hv
-        }
+        # Diagonals and hardness for this measurement
+        measurement = measure_vertices(self.current_points, get_preference("vickers_load", default=500.0),
+                                       get_preference("vickers_load_unit", default="gf"))
+        d1, d2, d_avg, hv = measurement["d1"], measurement["d2"], measurement["d_avg"], measurement["hv"]
+        if self.image_width is not None:
+            # Vertex pixels are the source of truth: points, diagonals and HV are recomputed
+            # from them if the calibration or the load is corrected later
+            measurement["pixels"] = [self.plotToPixel(*p) for p in self.current_points]
+            measurement["image_size"] = (self.image_width, self.image_height)
+        if len(self.current_clicks) == 4:
+            # Positions before sub-pixel refinement and how far each vertex moved (µm)
+            measurement["clicked_points"] = self.current_clicks.copy()
+            measurement["corrections"] = [math.dist(c, p) for c, p in zip(self.current_clicks, self.current_points)]
+            if self.image_width is not None:
+                measurement["clicked_pixels"] = [self.plotToPixel(*c) for c in self.current_clicks]
         self.measurements.append(measurement)
         
         # Add row to table
@@ -358,16 +424,7 @@ class VickersCB:
             print("[yellow]Puede exportar el informe PDF o presionar 'Reset Mediciones' para un nuevo conjunto.[/yellow]")
             
             # Update HV value in data table with final average
-            hv_values = [m["hv"] for m in self.measurements]
-            hv_avg = sum(hv_values) / len(hv_values)
-            
-            # Calculate standard deviation
-            if len(hv_values) > 1:
-                variance = sum((x - hv_avg) ** 2 for x in hv_values) / (len(hv_values) - 1)
-                std_dev = math.sqrt(variance)
-            else:
-                std_dev = 0.0
-            
+            hv_avg, std_dev = hv_statistics([m["hv"] for m in self.measurements])
             self.updateTableHV(hv_avg, std_dev)
         else:
             # If not the last measurement, show waiting popup and schedule geometry clearing after 2 seconds
@@ -386,15 +443,21 @@ class VickersCB:
                                  width=popup_width, height=popup_height)
                 dpg.configure_item("waiting_popup", show=True)
             print(f"[cyan]Esperando 2 segundos antes de preparar la siguiente medición...[/cyan]")
-            threading.Timer(2.0, self.clearCurrentGeometry).start()
+            get_ui_dispatcher().post_later(2.0, self.clearCurrentGeometry)  # Runs on the render thread
 
     def clearCurrentGeometry(self):
         """Clear the geometry drawn for the current measurement to prepare for the next one."""
-        # Clear all drawn series for current measurement
-        for tag in self.vickers_series_tags:
-            if dpg.does_item_exist(tag):
-                dpg.delete_item(tag)
-        self.vickers_series_tags.clear()
+        # Nothing to clear if the completed measurement was undone in the meantime
+        if self.current_measurement >= len(self.measurements):
+            if dpg.does_item_exist("waiting_popup"):
+                dpg.configure_item("waiting_popup", show=False)
+            return
+
+        # The completed measurement stays as a faint overlay; the next click starts a new one
+        self.current_points = []
+        self.current_clicks = []
+        self.current_measurement = len(self.measurements)
+        self.drawVickersGeometry()
         
         # Hide waiting popup
         if dpg.does_item_exist("waiting_popup"):
@@ -410,27 +473,36 @@ class VickersCB:
         if not self.current_image_path:
             return
         
-        # Get current image full path
-        current_full_path = self.current_image_path
-        
         # Search for matching entry in data table
         data_table = self.callbacks.dataTable
-        for i, row in enumerate(data_table.table_data):
-            row_path = row.get('image_path', '')
-            
-            # Compare paths (normalize for comparison)
-            if os.path.normpath(row_path) == os.path.normpath(current_full_path):
-                # Update HV value and std_dev
-                row['hv'] = hv_value
-                if std_dev is not None:
-                    row['std_dev'] = std_dev
-                    print(f"[cyan]Actualizado HV={hv_value:.1f} ±{std_dev:.2f} para punto {row['id']} en la tabla[/cyan]")
-                else:
-                    print(f"[cyan]Actualizado HV={hv_value:.1f} para punto {row['id']} en la tabla[/cyan]")
-                
-                # Rebuild table to show updated value
-                data_table.rebuildTable()
-                break
+        i = self.tableRowIndex()
+        if i is None:
+            return
+        
+        # Update HV value and std_dev, keeping the measurements they derive from
+        row = data_table.table_data[i]
+        row['hv'] = hv_value
+        row['measurements'] = copy.deepcopy(self.measurements)
+        if std_dev is not None:
+            row['std_dev'] = std_dev
+            print(f"[cyan]Actualizado HV={hv_value:.1f} ±{std_dev:.2f} para punto {row['id']} en la tabla[/cyan]")
+        else:
+            print(f"[cyan]Actualizado HV={hv_value:.1f} para punto {row['id']} en la tabla[/cyan]")
+        
+        # Patch only this row's cells
+        data_table.refreshRow(i)
+
+    def tableRowIndex(self):
+        """Index of the data table row whose image is the current one, or None."""
+        if not self.callbacks or not hasattr(self.callbacks, 'dataTable') or not self.current_image_path:
+            return None
+        
+        # Compare paths (normalize for comparison)
+        current_full_path = os.path.normpath(self.current_image_path)
+        for i, row in enumerate(self.callbacks.dataTable.table_data):
+            if os.path.normpath(row.get('image_path') or '') == current_full_path:
+                return i
+        return None
 
     def updateMeasurementsTable(self):
         """Update the measurements table with all completed measurements."""
@@ -465,23 +537,10 @@ class VickersCB:
                 dpg.configure_item("promedios_finales_text", show=False)
             return
         
-        # Calculate averages
-        d1_values = [m["d1"] for m in self.measurements]
-        d2_values = [m["d2"] for m in self.measurements]
-        d_avg_values = [m["d_avg"] for m in self.measurements]
-        hv_values = [m["hv"] for m in self.measurements]
-        
-        d1_avg = sum(d1_values) / len(d1_values)
-        d2_avg = sum(d2_values) / len(d2_values)
-        d_final = sum(d_avg_values) / len(d_avg_values)
-        hv_avg = sum(hv_values) / len(hv_values)
-        
-        # Calculate standard deviation of hardness
-        if len(hv_values) > 1:
-            variance = sum((x - hv_avg) ** 2 for x in hv_values) / (len(hv_values) - 1)
-            std_dev = math.sqrt(variance)
-        else:
-            std_dev = 0
+        # Averages of all measurements in one pass
+        stats = {key: statistics([m[key] for m in self.measurements]) for key in ("d1", "d2", "d_avg", "hv")}
+        d1_avg, d2_avg, d_final = stats["d1"]["mean"], stats["d2"]["mean"], stats["d_avg"]["mean"]
+        hv_avg, std_dev = stats["hv"]["mean"], stats["hv"]["std"]
         
         # Update UI
         dpg.set_value("vickers_d1_avg_text", f"D1 promedio: {d1_avg:.2f} µm")
@@ -502,16 +561,17 @@ class VickersCB:
         """
         Reset Vickers measurement state and clear all drawings.
         """
-        # Clear all drawn series
-        for tag in self.vickers_series_tags:
-            if dpg.does_item_exist(tag):
-                dpg.delete_item(tag)
+        # Delete the geometry series (recreated above the image series on the next draw)
+        self.overlay.clear()
+
+        self.clearVertexDragPoints()
+        self.history.clear()
 
         # Reset state
         self.measurements.clear()
         self.current_points.clear()
+        self.current_clicks.clear()
         self.current_measurement = 0
-        self.vickers_series_tags.clear()
         self.n_measurements = dpg.get_value("vickers_n_measurements_input") if dpg.does_item_exist("vickers_n_measurements_input") else 1
 
         # Reset UI measurements
@@ -534,105 +594,240 @@ class VickersCB:
         self.resetVickersMeasurement()
         print("[green]Sistema reseteado. Listo para nuevo conjunto de mediciones.[/green]")
 
-    def _recreateImageTexture(self, image_data):
+    def detectIndentation(self, sender=None, app_data=None):
         """
-        Helper method to recreate image texture and series with new data.
-        Deletes existing texture/series and creates new ones with updated data.
+        Propose the four vertices of the indentation for the current measurement.
+
+        The vertices are drawn like clicked points and get drag points so they
+        can be nudged; 'Confirmar' then saves them as a regular measurement.
         """
-        # Get calibration for bounds
+        if self.image_buffer is None:
+            print("[yellow]Cargue una imagen antes de detectar la huella[/yellow]")
+            return
+
+        if len(self.measurements) >= self.n_measurements:
+            print(f"[yellow]⚠ Todas las mediciones completadas ({self.n_measurements}/{self.n_measurements}). Presione 'Reset Mediciones' para continuar.[/yellow]")
+            return
+
+        try:
+            # Detect on the working pixels so contrast filters help with faint indentations
+            vertices = detect_indentation(luminance(self.image_buffer.current))
+        except Exception as e:
+            import traceback
+
+            print(f"[red]Error en la detección automática: {e}[/red]")
+            traceback.print_exc()
+            return
+
+        if vertices is None:
+            print("[yellow]No se encontró ninguna huella. Marque los puntos manualmente.[/yellow]")
+            return
+
+        before = self.snapshotState()
+
+        # Replaces any partially marked points; a completed measurement moves on to the next one
+        self.current_measurement = len(self.measurements)
+
+        self.current_clicks = [self.pixelToPlot(col, row) for col, row in vertices]
+        self.current_points = [self.refineVertex(point) for point in self.current_clicks]
+
+        dpg.set_value("vickers_current_measurement", f"{self.current_measurement + 1}/{self.n_measurements}")
+        dpg.set_value("vickers_npoints", "4/4")
+        self.drawVickersGeometry()
+
+        self.clearVertexDragPoints()
+        self.showVertexDragPoints()
+        self.recordStep("detección automática", before)
+
+        d1 = math.dist(self.current_points[0], self.current_points[2])
+        d2 = math.dist(self.current_points[1], self.current_points[3])
+        print(f"[cyan]Huella detectada: D1 ≈ {d1:.2f} µm, D2 ≈ {d2:.2f} µm. Ajuste los vértices y presione 'Confirmar'.[/cyan]")
+
+    def showVertexDragPoints(self):
+        """Add a drag point on each vertex of the current measurement and enable 'Confirmar'."""
+        for i, (x, y) in enumerate(self.current_points):
+            tag = f"vickers_vertex_{i}"
+            dpg.add_drag_point(parent="ProcessingPlotParent", tag=tag, label=f"P{i + 1}", default_value=(x, y),
+                               color=(255, 255, 0, 255), thickness=2, user_data=i, callback=self.onVertexDrag)
+            self.vertex_drag_tags.append(tag)
+
+        if dpg.does_item_exist("confirm_detection_button"):
+            dpg.configure_item("confirm_detection_button", enabled=True)
+
+    def onVertexDrag(self, sender, app_data, user_data):
+        """Move a detected vertex to its drag point and redraw the geometry (one undo step per vertex drag)."""
+        before = self.snapshotState()
+        x, y = dpg.get_value(sender)[:2]
+        self.current_points[user_data] = (x, y)
+        self.current_clicks[user_data] = (x, y)  # Placed by hand: not refined
+        self.drawVickersGeometry()
+        self.recordStep(f"mover vértice {user_data + 1}", before, merge_key=("vertex", user_data))
+
+    def confirmDetection(self, sender=None, app_data=None):
+        """Save the detected (and possibly adjusted) vertices as the current measurement."""
+        if not self.vertex_drag_tags:
+            print("[yellow]No hay vértices detectados para confirmar[/yellow]")
+            return
+
+        before = self.snapshotState()
+        self.clearVertexDragPoints()
+        self.saveMeasurement()
+        self.recordStep("confirmar detección", before)
+
+    def clearVertexDragPoints(self):
+        """Remove the drag points of detected vertices."""
+        for tag in self.vertex_drag_tags:
+            if dpg.does_item_exist(tag):
+                dpg.delete_item(tag)
+        self.vertex_drag_tags.clear()
+
+        if dpg.does_item_exist("confirm_detection_button"):
+            dpg.configure_item("confirm_detection_button", enabled=False)
+
+    def pixelToPlot(self, col, row):
+        """Continuous pixel coordinates (row 0 at the top) to plot µm, matching the image series bounds."""
         calibration = get_preference("vickers_calibration", default=1.0)
-        real_width = int(self.image_width * calibration)
-        real_height = int(self.image_height * calibration)
-        
-        # Delete and recreate image series
-        if dpg.does_item_exist("image_series"):
-            dpg.delete_item("image_series")
-        
-        # Delete and recreate texture
-        if dpg.does_item_exist("loaded_image_texture"):
-            dpg.delete_item("loaded_image_texture")
-        with dpg.texture_registry():
-            dpg.add_static_texture(self.image_width, self.image_height, image_data, tag="loaded_image_texture") # type: ignore
-        
-        # Recreate image series
-        dpg.add_image_series(
-            "loaded_image_texture",
-            bounds_min=(0, 0),
-            bounds_max=(real_width, real_height),
-            parent="Processing_y_axis",
-            tag="image_series",
-            label=self.fileName[-34:-4] if self.fileName else "Image"
-        )
+        x, y = pixels_to_um((col, row), (self.image_width, self.image_height), calibration)
+        return (float(x), float(y))
 
+    def plotToPixel(self, x, y):
+        """Plot µm to continuous pixel coordinates (inverse of pixelToPlot)."""
+        calibration = get_preference("vickers_calibration", default=1.0)
+        scale_x = int(self.image_width * calibration) / self.image_width
+        scale_y = int(self.image_height * calibration) / self.image_height
+        return (x / scale_x, self.image_height - y / scale_y)
 
+    def onRefineVerticesChange(self, sender, new_value):
+        """Enable or disable sub-pixel refinement of marked vertices."""
+        self.refine_vertices = new_value
+        save_preference("vickers_refine_vertices", new_value)
 
+    def refineVertex(self, point):
+        """
+        Snap a vertex (plot µm) to the sub-pixel corner of the working image around it.
 
+        Returns the point unchanged when refinement is disabled, no image is
+        loaded or no corner is found within ``refine_window`` pixels.
+        """
+        point = (float(point[0]), float(point[1]))
+        if not self.refine_vertices or self.image_buffer is None:
+            return point
+
+        col, row = self.plotToPixel(*point)
+        if not (0 <= col < self.image_width and 0 <= row < self.image_height):
+            return point
+
+        # Luminance of a crop large enough for the window to follow the corner
+        margin = 2 * self.refine_window + 2
+        c0, r0 = max(0, int(col) - margin), max(0, int(row) - margin)
+        crop = luminance(self.image_buffer.current[r0:int(row) + margin + 1, c0:int(col) + margin + 1])
+
+        refined = refine_corner(crop, col - c0, row - r0, half_window=self.refine_window)
+        if refined is None:
+            print("[yellow]No se encontró una esquina cerca del punto; se mantiene la posición marcada[/yellow]")
+            return point
+        return self.pixelToPlot(refined[0] + c0, refined[1] + r0)
+
+    def _refreshImageTexture(self):
+        """Point the persistent image texture at the working pixels after a filter or reset."""
+        self.image_slot.update(self.image_buffer)
+        self.loupe.invalidate()
+
+    def onShowLoupeChange(self, sender, new_value):
+        """Show or hide the magnifier loupe."""
+        self.show_loupe = new_value
+        save_preference("vickers_show_loupe", new_value)
+        if dpg.does_item_exist("vickers_loupe_group"):
+            dpg.configure_item("vickers_loupe_group", show=new_value)
+
+    def onLoupeEnhanceChange(self, sender, new_value):
+        """Enable or disable the contrast stretch of the loupe."""
+        self.loupe.enhance = new_value
+        save_preference("vickers_loupe_enhance", new_value)
+
+    def updateLoupe(self):
+        """Show the neighbourhood of the cursor in the loupe (called every frame by the render loop)."""
+        if not self.show_loupe or self.image_buffer is None:
+            return
+        if not dpg.is_item_hovered("ProcessingPlotParent"):
+            return
 
-    def convertToBlackAndWhite(self, sender=None, app_data=None):
-        """Convert loaded image to black and white (grayscale)."""
-        if self.current_image_data is None or self.image_width is None or self.image_height is None:
-            print("[yellow]No image loaded to convert[/yellow]")
+        x, y = dpg.get_plot_mouse_pos()[:2]
+        col, row = self.plotToPixel(x, y)
+        self.loupe.update(self.image_buffer.current, col, row)
+
+    def resetFilterChain(self):
+        """Forget the applied filters (new image loaded or Reset pressed)."""
+        self.filter_pipeline.clear()
+        if dpg.does_item_exist("gamma_slider"):
+            dpg.set_value("gamma_slider", 1.0)
+
+    def _applyFilter(self, name, **params):
+        """Apply one filter in place on the working buffer and append it to the chain."""
+        if self.image_buffer is None:
+            print("[yellow]No image loaded to filter[/yellow]")
             return
         
         try:
-            # Convert to grayscale using luminosity method: 0.299*R + 0.587*G + 0.114*B
-            bw_data = []
-            for i in range(0, len(self.current_image_data), 4):
-                r = self.current_image_data[i]
-                g = self.current_image_data[i+1]
-                b = self.current_image_data[i+2]
-                a = self.current_image_data[i+3]
-                gray = 0.299 * r + 0.587 * g + 0.114 * b
-                bw_data.extend([gray, gray, gray, a])
-            
-            # Update current data and recreate texture
-            self.current_image_data = bw_data
-            self._recreateImageTexture(bw_data)
+            start = time()
+            self.filter_pipeline.add(name, **params)
+            FilterPipeline.apply_step(self.image_buffer.writable(), name, **params)
+            self._refreshImageTexture()
             
-            print("[green]Image converted to B/W[/green]")
+            print(f"[green]Filtro aplicado en {(time() - start) * 1000:.0f} ms: {self.filter_pipeline.describe()}[/green]")
             
         except Exception as e:
-            print(f"[red]Error converting to B/W: {e}[/red]")
+            print(f"[red]Error aplicando filtro '{name}': {e}[/red]")
             import traceback
             traceback.print_exc()
+
+    def convertToBlackAndWhite(self, sender=None, app_data=None):
+        """Convert loaded image to black and white (grayscale)."""
+        self._applyFilter("grayscale")
     
     def invertImage(self, sender=None, app_data=None):
         """Invert colors of loaded image."""
-        if self.current_image_data is None or self.image_width is None or self.image_height is None:
-            print("[yellow]No image loaded to invert[/yellow]")
+        self._applyFilter("invert")
+
+    def stretchContrast(self, sender=None, app_data=None):
+        """Stretch contrast between the 1st and 99th luminance percentiles."""
+        self._applyFilter("contrast")
+
+    def equalizeImage(self, sender=None, app_data=None):
+        """CLAHE-style local equalization to bring out faint indentation edges."""
+        self._applyFilter("equalize")
+
+    def sharpenImage(self, sender=None, app_data=None):
+        """Unsharp mask to sharpen indentation edges."""
+        self._applyFilter("sharpen")
+
+    def onGammaChange(self, sender, new_value):
+        """
+        Callback for the gamma slider.
+        Updates the gamma step and replays the whole chain from the original image.
+        """
+        if self.image_buffer is None:
             return
         
         try:
-            # Invert RGB values (keep alpha)
-            inverted_data = []
-            for i in range(0, len(self.current_image_data), 4):
-                r = self.current_image_data[i]
-                g = self.current_image_data[i+1]
-                b = self.current_image_data[i+2]
-                a = self.current_image_data[i+3]
-                inverted_data.extend([1.0 - r, 1.0 - g, 1.0 - b, a])
-            
-            # Update current data and recreate texture
-            self.current_image_data = inverted_data
-            self._recreateImageTexture(inverted_data)
-            
-            print("[green]Image inverted[/green]")
+            self.filter_pipeline.set("gamma", gamma=new_value)
+            self.image_buffer.set_current(self.filter_pipeline.render(self.image_buffer.original))
+            self._refreshImageTexture()
             
         except Exception as e:
-            print(f"[red]Error inverting image: {e}[/red]")
-            import traceback
-            traceback.print_exc()
+            print(f"[red]Error aplicando gamma: {e}[/red]")
     
     def resetImageToOriginal(self, sender=None, app_data=None):
         """Reset image to original state from stored data."""
-        if self.original_image_data is None or self.image_width is None or self.image_height is None:
+        if self.image_buffer is None:
             print("[yellow]No image loaded to reset[/yellow]")
             return
         
         try:
-            # Restore from original data and recreate texture
-            self.current_image_data = self.original_image_data
-            self._recreateImageTexture(self.original_image_data)
+            # Restore from original data and refresh the texture
+            self.resetFilterChain()
+            self.image_buffer.reset()
+            self._refreshImageTexture()
             
             print("[green]Image reset to original[/green]")
             
@@ -689,6 +884,23 @@ class VickersCB:
         # Load point
         self.loadPointByIndex(new_index)
     
+    def prefetchNeighbors(self, index):
+        """Decode in the background the images of the points around ``index`` (nearest first)."""
+        if self.prefetch_neighbors <= 0 or not self.callbacks or not hasattr(self.callbacks, 'dataTable'):
+            return
+        
+        table_data = self.callbacks.dataTable.table_data
+        count = len(table_data)
+        if count == 0:
+            return
+        
+        # Current image first so it stays cached, then next/previous alternately with wrap-around
+        indices = [index]
+        for offset in range(1, self.prefetch_neighbors + 1):
+            indices += [(index + offset) % count, (index - offset) % count]
+        
+        self.prefetcher.prefetch(table_data[i].get('image_path') for i in indices)
+
     def loadPointByIndex(self, index):
         """Load a specific point from the data table by index."""
         if not self.callbacks or not hasattr(self.callbacks, 'dataTable'):
@@ -719,6 +931,7 @@ class VickersCB:
         
         # Update current index
         self.current_table_index = index
+        self.prefetchNeighbors(index)
         
         print(f"[green]═══ Punto {point_data['id']} cargado (índice {index + 1}/{len(data_table.table_data)}) ═══[/green]")
         print(f"[cyan]Coordenadas: X={point_data['x']:.3f}, Y={point_data['y']:.3f}[/cyan]")
@@ -0,0 +1,275 @@
+"""
+Automatic detection of the four vertices of a Vickers indentation.
+
+The indentation is the dark, roughly square diamond left by the pyramid
+indenter. Detection runs in two passes on the luminance of the image:
+
+1. Coarse: on a downscaled copy, threshold dark regions (Otsu), label the
+   connected components and keep the one that looks most like a diamond
+   (square bounding box, about half of it filled, away from the borders).
+2. Fine: on a full-resolution crop around that component, threshold again,
+   take the boundary of the region and fit a straight line to each of the
+   four sides, leaving out the points near the tips (often rounded or
+   cracked). The vertices are the intersections of adjacent sides, which
+   gives sub-pixel positions.
+
+Vertices are returned as (column, row) pixel coordinates in the order top,
+right, bottom, left, so that top/bottom form the first diagonal and
+right/left the second, matching the click order of the Vickers tab.
+Requires scipy.
+
+refine_corner() snaps a single vertex (clicked or detected) to the sub-pixel
+point where the edges around it meet.
+"""
+
+import math
+from typing import Optional, Tuple
+
+import numpy as np
+
+try:
+    from scipy import ndimage
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+
+def otsu_threshold(values: np.ndarray, bins: int = 256) -> float:
+    """Otsu threshold of an array of values in the 0-1 range."""
+    hist, edges = np.histogram(values, bins=bins, range=(0.0, 1.0))
+    hist = hist.astype(np.float64)
+    centers = (edges[:-1] + edges[1:]) / 2
+
+    weight_low = np.cumsum(hist)
+    weight_high = weight_low[-1] - weight_low
+    sum_low = np.cumsum(hist * centers)
+    mean_low = sum_low / np.maximum(weight_low, 1)
+    mean_high = (sum_low[-1] - sum_low) / np.maximum(weight_high, 1)
+
+    between = weight_low * weight_high * (mean_low - mean_high) ** 2
+    return float(centers[np.argmax(between)])
+
+
+def _downscale(image: np.ndarray, factor: int) -> np.ndarray:
+    """Block-average downscale by an integer factor (edges cropped to a multiple of it)."""
+    if factor <= 1:
+        return image
+    h, w = (image.shape[0] // factor) * factor, (image.shape[1] // factor) * factor
+    return image[:h, :w].reshape(h // factor, factor, w // factor, factor).mean(axis=(1, 3))
+
+
+def _dark_regions(lum: np.ndarray, sigma: float) -> np.ndarray:
+    """Mask of dark regions: smoothed luminance below its Otsu threshold, cleaned and hole-filled."""
+    smooth = ndimage.gaussian_filter(lum, sigma=sigma)
+    mask = smooth < otsu_threshold(smooth)
+    mask = ndimage.binary_opening(mask, iterations=2)
+    return ndimage.binary_fill_holes(mask)
+
+
+def _pick_diamond(mask: np.ndarray) -> Optional[Tuple[slice, slice]]:
+    """Bounding box of the connected component that looks most like an indentation."""
+    labels, count = ndimage.label(mask)
+    if count == 0:
+        return None
+
+    height, width = mask.shape
+    areas = np.bincount(labels.ravel())[1:]
+    best, best_score = None, 0.0
+
+    for index, box in enumerate(ndimage.find_objects(labels)):
+        rows, cols = box
+        box_h, box_w = rows.stop - rows.start, cols.stop - cols.start
+        area = areas[index]
+        if area < 0.0005 * height * width or box_h < 8 or box_w < 8:
+            continue
+        if rows.start == 0 or cols.start == 0 or rows.stop == height or cols.stop == width:
+            continue  # Touches the border: background, shadow or a cut-off indentation
+
+        aspect = min(box_h, box_w) / max(box_h, box_w)
+        fill = area / (box_h * box_w)  # 0.5 for a perfect diamond
+        shape = aspect * max(0.0, 1.0 - 2.0 * abs(fill - 0.5))
+
+        # Indentations are usually centred in the micrograph
+        cy, cx = (rows.start + rows.stop) / 2, (cols.start + cols.stop) / 2
+        offset = math.hypot((cy - height / 2) / height, (cx - width / 2) / width)
+        score = shape * math.sqrt(area) * (1.0 - offset)
+
+        if score > best_score:
+            best, best_score = box, score
+
+    return best
+
+
+def _fit_line(points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Total least squares line through (N, 2) points: (point on the line, unit direction)."""
+    center = points.mean(axis=0)
+    _, _, vt = np.linalg.svd(points - center, full_matrices=False)
+    return center, vt[0]
+
+
+def _intersect(line_a, line_b) -> Optional[np.ndarray]:
+    (pa, da), (pb, db) = line_a, line_b
+    det = da[0] * (-db[1]) - da[1] * (-db[0])
+    if abs(det) < 1e-9:
+        return None
+    t = ((pb[0] - pa[0]) * (-db[1]) - (pb[1] - pa[1]) * (-db[0])) / det
+    return pa + t * da
+
+
+def _extreme_vertices(points: np.ndarray) -> np.ndarray:
+    """Top, right, bottom and left boundary points (mean of the points within 1 px of each extreme)."""
+    cols, rows = points[:, 0], points[:, 1]
+    vertices = []
+    for values, pick_min in ((rows, True), (cols, False), (rows, False), (cols, True)):
+        extreme = values.min() if pick_min else values.max()
+        vertices.append(points[np.abs(values - extreme) <= 1.0].mean(axis=0))
+    return np.array(vertices)
+
+
+def _fit_diamond(mask: np.ndarray, tip_margin: float = 0.15) -> Optional[np.ndarray]:
+    """Fit the four sides of the region in ``mask`` and return the vertices (top, right, bottom, left)."""
+    labels, count = ndimage.label(mask)
+    if count == 0:
+        return None
+
+    # Largest component of the crop
+    region = labels == (np.argmax(np.bincount(labels.ravel())[1:]) + 1)
+    boundary = region & ~ndimage.binary_erosion(region)
+    rows, cols = np.nonzero(boundary)
+    points = np.column_stack([cols, rows]).astype(np.float64) + 0.5  # Pixel centres
+    if len(points) < 20:
+        return None
+
+    estimate = _extreme_vertices(points)
+    center = estimate.mean(axis=0)
+
+    # Assign boundary points to the side between consecutive vertices by angle around the centre
+    angles = np.arctan2(points[:, 1] - center[1], points[:, 0] - center[0])
+    vertex_angles = np.arctan2(estimate[:, 1] - center[1], estimate[:, 0] - center[0])
+
+    lines = []
+    for k in range(4):
+        start, end = vertex_angles[k], vertex_angles[(k + 1) % 4]
+        span = (end - start) % (2 * np.pi)
+        relative = (angles - start) % (2 * np.pi)
+        side = points[(relative > tip_margin * span) & (relative < (1 - tip_margin) * span)]
+        if len(side) < 5:
+            return estimate
+        lines.append(_fit_line(side))
+
+    # Vertex k is where side k-1 (ending at it) meets side k (starting at it)
+    diagonal = max(np.linalg.norm(estimate[0] - estimate[2]), np.linalg.norm(estimate[1] - estimate[3]))
+    vertices = []
+    for k in range(4):
+        vertex = _intersect(lines[k - 1], lines[k])
+        if vertex is None or np.linalg.norm(vertex - estimate[k]) > 0.25 * diagonal:
+            vertex = estimate[k]  # Degenerate fit: keep the extreme point
+        vertices.append(vertex)
+    return np.array(vertices)
+
+
+def detect_indentation(lum: np.ndarray, work_size: int = 800) -> Optional[np.ndarray]:
+    """
+    Find the vertices of the Vickers indentation in a luminance image.
+
+    Args:
+        lum: (height, width) luminance in the 0-1 range
+        work_size: approximate size in pixels of the image used for the coarse search
+
+    Returns:
+        (4, 2) float array of (column, row) pixel coordinates ordered top,
+        right, bottom, left, or None if no indentation-like region is found.
+
+    Raises:
+        RuntimeError: if scipy is not installed
+    """
+    if not SCIPY_AVAILABLE:
+        raise RuntimeError("La detección automática requiere scipy (pip install scipy)")
+
+    lum = np.asarray(lum, dtype=np.float32)
+    height, width = lum.shape
+
+    # Coarse search on a downscaled copy
+    factor = max(1, int(math.ceil(max(height, width) / work_size)))
+    box = _pick_diamond(_dark_regions(_downscale(lum, factor), sigma=1.5))
+    if box is None:
+        return None
+
+    # Full-resolution crop around the candidate with a 20% margin
+    rows, cols = box
+    margin_r = int((rows.stop - rows.start) * factor * 0.2) + factor
+    margin_c = int((cols.stop - cols.start) * factor * 0.2) + factor
+    r0, r1 = max(0, rows.start * factor - margin_r), min(height, rows.stop * factor + margin_r)
+    c0, c1 = max(0, cols.start * factor - margin_c), min(width, cols.stop * factor + margin_c)
+
+    vertices = _fit_diamond(_dark_regions(lum[r0:r1, c0:c1], sigma=max(1.0, factor * 0.75)))
+    if vertices is None:
+        return None
+    return vertices + np.array([c0, r0], dtype=np.float64)
+
+
+def refine_corner(lum: np.ndarray, col: float, row: float, half_window: int = 10,
+                  iterations: int = 10) -> Optional[Tuple[float, float]]:
+    """
+    Snap a vertex to the sub-pixel corner formed by the edges around it.
+
+    Every pixel of a window around the estimate defines a line through it,
+    perpendicular to its gradient (the edge tangent). The corner is the
+    point with the least gradient-weighted squared distance to all those
+    lines, the solution of a 2x2 system:
+
+        sum(g g^T) q = sum(g g^T p)
+
+    Pixels are also weighted by a Gaussian centred on the current estimate,
+    and the window is re-centred until the point stops moving.
+
+    Args:
+        lum: (height, width) luminance in the 0-1 range
+        col, row: estimate in continuous pixel coordinates (pixel (c, r) spans c..c+1, r..r+1)
+        half_window: half size of the search window in pixels
+        iterations: maximum number of re-centring steps
+
+    Returns:
+        Refined (col, row), or None if the window holds no corner (flat area
+        or a single straight edge) or the estimate drifts out of the window.
+    """
+    height, width = lum.shape
+    start = np.array([col, row], dtype=np.float64)
+    estimate = start.copy()
+    sigma_window = half_window / 2
+
+    for _ in range(iterations):
+        # Window with a one-pixel border for the gradient
+        c0, r0 = int(estimate[0]) - half_window - 1, int(estimate[1]) - half_window - 1
+        c1, r1 = int(estimate[0]) + half_window + 2, int(estimate[1]) + half_window + 2
+        c0, r0, c1, r1 = max(0, c0), max(0, r0), min(width, c1), min(height, r1)
+        if c1 - c0 < 5 or r1 - r0 < 5:
+            return None
+
+        patch = np.asarray(lum[r0:r1, c0:c1], dtype=np.float64)
+        if SCIPY_AVAILABLE:
+            patch = ndimage.gaussian_filter(patch, sigma=1.0)
+        gy, gx = np.gradient(patch)
+
+        ys, xs = np.mgrid[r0:r1, c0:c1] + 0.5  # Pixel centres
+        weight = np.exp(-((xs - estimate[0]) ** 2 + (ys - estimate[1]) ** 2) / (2 * sigma_window ** 2))
+        gxx, gxy, gyy = weight * gx * gx, weight * gx * gy, weight * gy * gy
+
+        a = np.array([[gxx.sum(), gxy.sum()], [gxy.sum(), gyy.sum()]])
+        b = np.array([(gxx * xs + gxy * ys).sum(), (gxy * xs + gyy * ys).sum()])
+
+        # Edges in two directions, both above the noise (most window pixels are off the edges,
+        # so the median squared gradient estimates the noise level)
+        eigenvalues = np.linalg.eigvalsh(a)
+        noise = 1.5 * weight.sum() * np.median(gx * gx + gy * gy)
+        if eigenvalues[1] <= 1e-12 or eigenvalues[0] < max(0.05 * eigenvalues[1], noise):
+            return None
+
+        previous = estimate
+        estimate = np.linalg.solve(a, b)
+        if np.linalg.norm(estimate - start) > half_window:
+            return None
+        if np.linalg.norm(estimate - previous) < 0.01:
+            break
+
+    return float(estimate[0]), float(estimate[1])
@@ -0,0 +1,115 @@
+"""
+Vickers measurement geometry drawn on the image plot.
+
+The measurement being marked is drawn with three persistent series: the
+outline (a closed polyline once the four vertices are in), the two diagonals
+(one series in segments mode) and a scatter of the vertices. Completed
+measurements share another three faint series, so the number of plot items
+stays at six no matter how many measurements or clicks there are. Every
+redraw only calls ``set_value`` on existing series; they are recreated only
+after clear(), which keeps them above a newly created image series.
+"""
+
+import math
+from typing import List, Sequence, Tuple
+
+import dearpygui.dearpygui as dpg
+
+
+Point = Tuple[float, float]
+
+CURRENT_COLORS = {"outline": (255, 255, 0, 255), "diagonals": (0, 220, 255, 255), "vertices": (255, 80, 80, 255)}
+PREVIOUS_COLORS = {"outline": (255, 255, 0, 90), "diagonals": (0, 220, 255, 90), "vertices": (255, 80, 80, 90)}
+
+
+class GeometryOverlay:
+    """Current and previous measurements as six persistent plot series."""
+
+    def __init__(self, axis_tag: str, prefix: str = "vickers_geometry") -> None:
+        self.axis_tag = axis_tag
+        self.prefix = prefix
+
+    def _tag(self, layer: str, kind: str) -> str:
+        return f"{self.prefix}_{layer}_{kind}"
+
+    def _theme(self, layer: str, kind: str, color) -> str:
+        """Theme of one series, created once and kept across clear()."""
+        tag = f"{self._tag(layer, kind)}_theme"
+        if not dpg.does_item_exist(tag):
+            with dpg.theme(tag=tag):
+                component = dpg.mvScatterSeries if kind == "vertices" else dpg.mvLineSeries
+                with dpg.theme_component(component):
+                    if kind == "vertices":
+                        dpg.add_theme_color(dpg.mvPlotCol_MarkerFill, color, category=dpg.mvThemeCat_Plots)
+                        dpg.add_theme_color(dpg.mvPlotCol_MarkerOutline, color, category=dpg.mvThemeCat_Plots)
+                    else:
+                        dpg.add_theme_color(dpg.mvPlotCol_Line, color, category=dpg.mvThemeCat_Plots)
+                    if layer == "previous":
+                        dpg.add_theme_style(dpg.mvPlotStyleVar_LineWeight, 1.5, category=dpg.mvThemeCat_Plots)
+                        dpg.add_theme_style(dpg.mvPlotStyleVar_MarkerSize, 5, category=dpg.mvThemeCat_Plots)
+        return tag
+
+    def _series(self, layer: str, kind: str) -> str:
+        """Tag of a series, creating it (hidden and empty) on first use."""
+        tag = self._tag(layer, kind)
+        if dpg.does_item_exist(tag):
+            return tag
+
+        colors = PREVIOUS_COLORS if layer == "previous" else CURRENT_COLORS
+        if kind == "vertices":
+            dpg.add_scatter_series([], [], parent=self.axis_tag, tag=tag, show=False)
+        else:
+            # Previous outlines are segments too: four per measurement, without joining measurements
+            segments = kind == "diagonals" or layer == "previous"
+            dpg.add_line_series([], [], parent=self.axis_tag, tag=tag, show=False, segments=segments)
+        dpg.bind_item_theme(tag, self._theme(layer, kind, colors[kind]))
+        return tag
+
+    def _set(self, layer: str, kind: str, points: Sequence[Point], label: str = "", **config) -> None:
+        if not dpg.does_item_exist(self.axis_tag):
+            return
+        tag = self._series(layer, kind)
+        xs, ys = [float(p[0]) for p in points], [float(p[1]) for p in points]
+        dpg.set_value(tag, [xs, ys])
+        dpg.configure_item(tag, show=bool(points), label=label or f"##{tag}", **config)  # "##" keeps it out of the legend
+
+    def show_current(self, points: Sequence[Point], index: int) -> None:
+        """Draw the measurement being marked (1 to 4 vertices); ``index`` numbers it in the legend."""
+        points = list(points)
+        complete = len(points) == 4
+
+        self._set("current", "outline", points if len(points) >= 2 else [], loop=complete)
+        self._set("current", "vertices", points)
+
+        if complete:
+            p1, p2, p3, p4 = points
+            label = f"M{index + 1} D1: {math.dist(p1, p3):.2f} µm, D2: {math.dist(p2, p4):.2f} µm"
+            self._set("current", "diagonals", [p1, p3, p2, p4], label=label)
+        else:
+            self._set("current", "diagonals", [])
+
+    def show_previous(self, measurements: List[Sequence[Point]]) -> None:
+        """Draw completed measurements (lists of four vertices) as faint overlays."""
+        outline, diagonals, vertices = [], [], []
+        for points in measurements:
+            p1, p2, p3, p4 = points
+            outline += [p1, p2, p2, p3, p3, p4, p4, p1]
+            diagonals += [p1, p3, p2, p4]
+            vertices += [p1, p2, p3, p4]
+
+        label = f"Mediciones anteriores ({len(measurements)})" if measurements else ""
+        self._set("previous", "outline", outline)
+        self._set("previous", "diagonals", diagonals, label=label)
+        self._set("previous", "vertices", vertices)
+
+    def clear_current(self) -> None:
+        """Hide the measurement being marked."""
+        self.show_current([], 0)
+
+    def clear(self) -> None:
+        """Delete all series (new image or project); they are recreated on the next draw."""
+        for layer in ("current", "previous"):
+            for kind in ("outline", "diagonals", "vertices"):
+                tag = self._tag(layer, kind)
+                if dpg.does_item_exist(tag):
+                    dpg.delete_item(tag)
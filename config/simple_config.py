@@ -62,6 +62,11 @@ DEFAULTS = {
         "jpeg_file": "#FF0000FF",
         "bmp_file": "#00FFFFFF",
     },
+    "Vickers": {"prefetch_neighbors": 2, "refine_window": 10, "loupe_size": 192, "loupe_zoom": 4},
+    "Cache": {"image_cache_mb": 1024, "decoded_sidecar": False},
+    "Mapping": {"tile_size": 512, "tile_threshold": 8192, "max_tile_textures": 64},
+    "Report": {"grid_columns": 4, "image_size": 800},
+    "HeatMap": {"neighbors": 16},
     "UI.Labels": {
         "select_image_prompt": "Select a Image to Use",
         "import_button": "Import Image",
@@ -97,13 +102,14 @@ def _get_value(parser, section, key, default_value=None):
             value = parser.get(section, key)
 
             # Type conversion based on default value type (if available)
+            # (bool is checked first because it is a subclass of int)
             if default_value is not None:
-                if isinstance(default_value, int):
+                if isinstance(default_value, bool):
+                    return parser.getboolean(section, key)
+                elif isinstance(default_value, int):
                     return int(value)
                 elif isinstance(default_value, float):
                     return float(value)
-                elif isinstance(default_value, bool):
-                    return parser.getboolean(section, key)
 
             # Return as string if no type hint from default
             return value
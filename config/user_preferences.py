@@ -27,7 +27,8 @@ PREFERENCES_FILE = "user_preferences.json"
 # Default preferences
 DEFAULT_PREFERENCES = {
     "vickers_calibration": 1.0,  # µm/pixel
-    "vickers_load": 500.0,  # grams
+    "vickers_load": 500.0,  # in vickers_load_unit
+    "vickers_load_unit": "gf",  # gf, kgf or N (ISO 6507)
     "viewport_maximized": False,  # viewport maximized state
     "viewport_width": None,  # last viewport width (None = use config default)
     "viewport_height": None,  # last viewport height (None = use config default)
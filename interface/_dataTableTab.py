@@ -41,6 +41,8 @@ def showDataTableTab(callbacks, fonts):
                     tag="load_default_images_button",
                     callback=callbacks.dataTable.loadDefaultImages
                 )
+                dpg.add_text("", tag="thumbnail_progress_text", color=hex_to_rgba(config["UI.Colors"]["blue_text"]))
+                dpg.add_text("", tag="image_cache_stats_text", color=hex_to_rgba(config["UI.Colors"]["green_text"]))
                             
             dpg.add_spacer(height=10)
             
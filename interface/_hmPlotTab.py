@@ -81,7 +81,7 @@ def showHMPlotTab(callbacks, fonts):
             # Interpolation method
             dpg.add_text("Método de Interpolación:")
             dpg.add_combo(
-                items=["linear", "cubic", "nearest"],
+                items=["linear", "cubic", "nearest", "rbf", "kriging"],
                 default_value="cubic",
                 tag="hm_interpolation_combo",
                 width=-1,
@@ -108,13 +108,21 @@ def showHMPlotTab(callbacks, fonts):
             
             dpg.add_spacer(height=5)
             
-            # Surface overlay checkbox
-            dpg.add_checkbox(
-                label="Img. Overlay",
-                tag="hm_show_overlay_checkbox",
-                default_value=False,
-                callback=callbacks.hmPlot.onShowSurfaceOverlayChange
-            )
+            # Surface overlay and kriging variance checkboxes (horizontal)
+            with dpg.group(horizontal=True):
+                dpg.add_checkbox(
+                    label="Img. Overlay",
+                    tag="hm_show_overlay_checkbox",
+                    default_value=False,
+                    callback=callbacks.hmPlot.onShowSurfaceOverlayChange
+                )
+                dpg.add_spacer(width=20)
+                dpg.add_checkbox(
+                    label="Varianza (kriging)",
+                    tag="hm_show_variance_checkbox",
+                    default_value=False,
+                    callback=callbacks.hmPlot.onShowVarianceChange
+                )
             
             dpg.add_spacer(height=10)
             
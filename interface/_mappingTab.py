@@ -123,6 +123,22 @@ def showMappingTab(callbacks, fonts):
                     callback=callbacks.heatMap.restartHeatMap
                 )
 
+            with dpg.group(horizontal=True):
+                dpg.add_button(
+                    tag="heatmap_undo_button",
+                    label="Deshacer",
+                    callback=callbacks.heatMap.undo
+                )
+                dpg.add_spacer(width=5)
+                dpg.add_button(
+                    tag="heatmap_redo_button",
+                    label="Rehacer",
+                    callback=callbacks.heatMap.redo
+                )
+
+            dpg.add_text("Arrastrar un punto lo mueve, Shift+clic lo elimina (Ctrl+Z / Ctrl+Y)",
+                         color=(180, 180, 180, 255), wrap=-1)
+
             dpg.add_text("Total: 0 puntos", tag="heatmap_point_count", color=hex_to_rgba(config["UI.Colors"]["green_text"]))
             dpg.bind_item_font("heatmap_point_count", fonts["bold"])
 
@@ -221,3 +237,7 @@ def showMappingTab(callbacks, fonts):
     # Register global mouse click handler for heat map
     with dpg.handler_registry():
         dpg.add_mouse_click_handler(button=0, callback=callbacks.heatMap.onPlotClick)
+        dpg.add_mouse_drag_handler(button=0, threshold=2, callback=callbacks.heatMap.onPlotDrag)
+        dpg.add_mouse_release_handler(button=0, callback=callbacks.heatMap.onPlotRelease)
+        dpg.add_key_press_handler(dpg.mvKey_Z, callback=callbacks.heatMap.onShortcut)
+        dpg.add_key_press_handler(dpg.mvKey_Y, callback=callbacks.heatMap.onShortcut)
@@ -29,6 +29,7 @@ def showVickersTab(callbacks, fonts):
          - Equal aspect ratio for accurate measurements
          - Axis labels in micrometers (µm)
          - Mouse click handler for placing measurement points
+         - Ctrl+Z / Ctrl+Y to undo and redo clicks, detections and vertex drags
     Configuration is loaded from the application's config file using get_config().
     User preferences for Vickers parameters are persisted using get_preference() and
     save_preference() functions.
@@ -101,17 +102,25 @@ def showVickersTab(callbacks, fonts):
                 callback=callbacks.imageProcessing.onCalibrationChange,
             )
 
-            # input text (float): Carga aplicada (g)
-            dpg.add_input_float(
-                label="Carga Aplicada (g)",
-                tag="vickers_load_input",
-                default_value=get_preference("vickers_load", default=500.0),
-                min_value=0.1,
-                min_clamped=True,
-                width=200,
-                format="%.2f",
-                callback=lambda s, v: save_preference("vickers_load", v),
-            )
+            # input text (float): Carga aplicada, in the unit chosen next to it
+            with dpg.group(horizontal=True):
+                dpg.add_input_float(
+                    tag="vickers_load_input",
+                    default_value=get_preference("vickers_load", default=500.0),
+                    min_value=0.001,
+                    min_clamped=True,
+                    width=200,
+                    format="%.3f",
+                    callback=callbacks.imageProcessing.onLoadChange,
+                )
+                dpg.add_combo(
+                    items=["gf", "kgf", "N"],
+                    tag="vickers_load_unit_combo",
+                    default_value=get_preference("vickers_load_unit", default="gf"),
+                    width=60,
+                    callback=callbacks.imageProcessing.onLoadUnitChange,
+                )
+                dpg.add_text("Carga Aplicada")
 
             # input int: Número de mediciones
             dpg.add_input_int(
@@ -126,6 +135,33 @@ def showVickersTab(callbacks, fonts):
                 callback=callbacks.imageProcessing.onNMeasurementsChange,
             )
 
+            dpg.add_checkbox(
+                label="Refinar vértices (subpíxel)",
+                tag="vickers_refine_vertices_checkbox",
+                default_value=get_preference("vickers_refine_vertices", default=False),
+                callback=callbacks.imageProcessing.onRefineVerticesChange,
+            )
+
+            # Magnifier loupe: zoomed crop around the cursor while marking vertices
+            loupe = callbacks.imageProcessing.loupe
+            loupe.enhance = get_preference("vickers_loupe_enhance", default=True)
+            loupe.create()
+            with dpg.group(horizontal=True):
+                dpg.add_checkbox(
+                    label="Lupa",
+                    tag="vickers_show_loupe_checkbox",
+                    default_value=get_preference("vickers_show_loupe", default=True),
+                    callback=callbacks.imageProcessing.onShowLoupeChange,
+                )
+                dpg.add_checkbox(
+                    label="Realzar contraste",
+                    tag="vickers_loupe_enhance_checkbox",
+                    default_value=loupe.enhance,
+                    callback=callbacks.imageProcessing.onLoupeEnhanceChange,
+                )
+            with dpg.group(tag="vickers_loupe_group", show=get_preference("vickers_show_loupe", default=True)):
+                dpg.add_image(loupe.texture_tag, width=loupe.size, height=loupe.size, tag="vickers_loupe_image")
+
             dpg.add_spacer(height=5)
             dpg.add_separator()
             dpg.add_spacer(height=5)
@@ -143,6 +179,27 @@ def showVickersTab(callbacks, fonts):
                     label="Reiniciar",
                     callback=callbacks.imageProcessing.resetMeasurementsButton
                 )
+                dpg.add_button(
+                    tag="detect_indentation_button",
+                    label="Detectar",
+                    callback=callbacks.imageProcessing.detectIndentation
+                )
+                dpg.add_button(
+                    tag="confirm_detection_button",
+                    label="Confirmar",
+                    enabled=False,
+                    callback=callbacks.imageProcessing.confirmDetection
+                )
+                dpg.add_button(
+                    tag="vickers_undo_button",
+                    label="Deshacer",
+                    callback=callbacks.imageProcessing.undo
+                )
+                dpg.add_button(
+                    tag="vickers_redo_button",
+                    label="Rehacer",
+                    callback=callbacks.imageProcessing.redo
+                )
 
             with dpg.group(horizontal=True, horizontal_spacing=20):
                 dpg.add_text("Medición Actual:")
@@ -250,9 +307,22 @@ def showVickersTab(callbacks, fonts):
             with dpg.group(horizontal=True, horizontal_spacing=10):
                 with dpg.child_window(tag="image_buttons", height=-1, width=-120, border=False):
                     with dpg.group(horizontal=True, horizontal_spacing=10, indent=10):
-                        dpg.add_button(label="B/W", tag="bw_button", width=100, height=40, callback=callbacks.imageProcessing.convertToBlackAndWhite)
-                        dpg.add_button(label="Invert", tag="invert_button", width=100, height=40, callback=callbacks.imageProcessing.invertImage)
-                        dpg.add_button(label="Reset", tag="reset_image_button", width=100, height=40, callback=callbacks.imageProcessing.resetImageToOriginal)
+                        dpg.add_button(label="B/W", tag="bw_button", width=70, height=40, callback=callbacks.imageProcessing.convertToBlackAndWhite)
+                        dpg.add_button(label="Invert", tag="invert_button", width=70, height=40, callback=callbacks.imageProcessing.invertImage)
+                        dpg.add_button(label="Contraste", tag="contrast_button", width=90, height=40, callback=callbacks.imageProcessing.stretchContrast)
+                        dpg.add_button(label="CLAHE", tag="equalize_button", width=70, height=40, callback=callbacks.imageProcessing.equalizeImage)
+                        dpg.add_button(label="Nitidez", tag="sharpen_button", width=70, height=40, callback=callbacks.imageProcessing.sharpenImage)
+                        dpg.add_slider_float(
+                            label="Gamma",
+                            tag="gamma_slider",
+                            default_value=1.0,
+                            min_value=0.3,
+                            max_value=3.0,
+                            format="%.2f",
+                            width=100,
+                            callback=callbacks.imageProcessing.onGammaChange,
+                        )
+                        dpg.add_button(label="Reset", tag="reset_image_button", width=70, height=40, callback=callbacks.imageProcessing.resetImageToOriginal)
 
                 with dpg.child_window(tag="exit_button", height=-1, width=-1, border=False):
                     # Create theme for exit button (red background)
@@ -281,3 +351,5 @@ def showVickersTab(callbacks, fonts):
     # Register global mouse click handler for Vickers measurement (outside the group context)
     with dpg.handler_registry():
         dpg.add_mouse_click_handler(button=0, callback=callbacks.imageProcessing.onPlotClick)
+        dpg.add_key_press_handler(dpg.mvKey_Z, callback=callbacks.imageProcessing.onShortcut)
+        dpg.add_key_press_handler(dpg.mvKey_Y, callback=callbacks.imageProcessing.onShortcut)
@@ -78,6 +78,22 @@ class Interface:
         while dpg.is_dearpygui_running():
             dpg.render_dearpygui_frame()
             
+            # Apply UI updates posted by background threads
+            self.callbacks.ui.process()
+            
+            # Upload thumbnails decoded by the background workers
+            self.callbacks.dataTable.processThumbnailQueue()
+            
+            # Magnified crop around the cursor in the Vickers plot
+            self.callbacks.imageProcessing.updateLoupe()
+            
+            # Load the surface image tiles visible at the current zoom
+            self.callbacks.heatMap.updateTiledView()
+            
+            # Refresh the decoded-image cache counters twice per second or so
+            if frame_count % 30 == 0:
+                self.callbacks.dataTable.updateImageCacheStats()
+            
             # Center text elements after a few frames (when sizes are available)
             if frame_count == 3:
                 self.center_title_elements()
@@ -111,6 +127,11 @@ class Interface:
             except:
                 pass
         
+        # Stop background thumbnail, tile and prefetch workers
+        self.callbacks.dataTable.shutdownThumbnailLoader()
+        self.callbacks.imageProcessing.prefetcher.shutdown()
+        self.callbacks.heatMap.tiled_view.shutdown()
+        
         dpg.destroy_context()
 
     def showTabBar(self):